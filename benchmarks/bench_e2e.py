@@ -0,0 +1,264 @@
+# benchmarks/bench_e2e.py
+"""
+Offline end-to-end benchmark: the real bot code against local fakes of
+the RSS feeds, article pages, Groq and X (see benchmarks.fake_services).
+
+Reports per-stage latency, one end-to-end run through the same stage
+graph main() uses, throughput over many articles, and peak RSS. Results
+are compared against a stored baseline so regressions show up as diffs.
+
+Run from the repo root:
+    python -m benchmarks.bench_e2e                   # compare to baseline
+    python -m benchmarks.bench_e2e --save-baseline   # record a new baseline
+    python -m benchmarks.bench_e2e --browser         # include headless Chrome stages
+    BROWSER_PROFILE=full python -m benchmarks.bench_e2e --browser
+                                                     # ...without the resource policy, for comparison
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.fake_services import FakeServices
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "e2e.json")
+REGRESSION_THRESHOLD = 0.20  # flag stages more than 20% slower than baseline...
+REGRESSION_MIN_SECONDS = 0.05  # ...and slower by at least this much in absolute terms
+
+
+def peak_rss_mb() -> dict:
+    """Peak resident set size of this process and of reaped children (Chrome)."""
+    per_mb = 1024 * 1024 if sys.platform == "darwin" else 1024  # ru_maxrss: bytes on macOS, KB on Linux
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / per_mb, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / per_mb, 1),
+    }
+
+
+class Timer:
+    def __init__(self):
+        self.stages = {}
+
+    def record(self, name: str, seconds: float, items: int = 1, **extra):
+        entry = {"seconds": round(seconds, 4), "items": items}
+        if items > 1:
+            entry["items_per_s"] = round(items / seconds, 2) if seconds else None
+        entry.update(extra)
+        self.stages[name] = entry
+        rate = f"  {entry['items_per_s']:8.2f}/s" if "items_per_s" in entry else ""
+        print(f"  {name:<22} {seconds:8.3f}s  ×{items:<4}{rate}")
+
+    def run(self, name: str, fn, items: int = 1, **extra):
+        start = time.perf_counter()
+        result = fn()
+        self.record(name, time.perf_counter() - start, items, **extra)
+        return result
+
+
+def configure_env(services: FakeServices, workdir: str, stream: bool):
+    """Point the bot at the fakes. Must run before any bot module is imported."""
+    os.environ.update({
+        "GROQ_API_KEY": "bench",
+        "GROQ_BASE_URL": services.base_url,
+        "X_BASE_URL": services.base_url,
+        "X_USERNAME": "bench",
+        "X_PASSWORD": "bench",
+        "X_SESSION_PATH": os.path.join(workdir, ".session", "x_cookies.json"),
+        "X_CHROME_PROFILE_DIR": "",
+        "LLM_STREAM": "1" if stream else "0",
+    })
+    # All bot state lives under relative data/ paths; keep it out of the repo
+    os.chdir(workdir)
+
+
+def run_benchmark(args) -> dict:
+    services = FakeServices(
+        feeds=args.feeds, items=args.items,
+        llm_first_token=args.llm_first_token, llm_tokens_per_second=args.llm_tps,
+    ).start()
+    workdir = tempfile.mkdtemp(prefix="bot-bench-")
+    repo_dir = os.getcwd()
+    configure_env(services, workdir, not args.no_stream)
+
+    from bot import fetcher, http_client, image_pipeline, page_cache
+    from bot.ai_writer import generate_tweet, generate_tweets
+    from bot.image_extractor import get_article_image
+    from bot.pipeline import Stage, run_stages
+    from bot.ranker import rank_articles
+
+    fetcher.RSS_FEEDS[:] = services.catalogue.feed_urls()
+    image_pipeline.IMAGE_DIR = os.path.join(workdir, "images")
+    image_pipeline.INDEX_PATH = os.path.join(image_pipeline.IMAGE_DIR, "index.json")
+
+    timer = Timer()
+    print(f"[BENCH] Fakes on {services.base_url}, state in {workdir}")
+    print(f"[BENCH] {args.feeds} feeds × {args.items} items, LLM first token "
+          f"{args.llm_first_token}s @ {args.llm_tps:g} tok/s, stream={not args.no_stream}")
+    try:
+        # ── Fetch: cold (full downloads) then warm (conditional GET → 304) ──
+        articles, _ = timer.run("fetch_cold", fetcher.fetch_articles_with_report,
+                                items=args.feeds)
+        timer.run("fetch_warm", fetcher.fetch_articles_with_report, items=args.feeds)
+        ranked = timer.run("rank", lambda: rank_articles(articles, top_k=len(articles)),
+                           items=len(articles))
+
+        # ── One run through main()'s stage graph, minus the browser ─────
+        article = ranked[0]
+        page_cache.expect_text([article["link"]])
+        stages = [
+            Stage("image", lambda ctx: get_article_image(article["link"])),
+            Stage("generate", lambda ctx: generate_tweet(page_cache.enrich_article(article), ctx.check)),
+        ]
+        if args.browser:
+            from bot.poster import open_session, post_tweet_thread
+            stages.append(Stage("browser", lambda ctx: open_session(ctx.check), cleanup=lambda d: d.quit()))
+            stages.append(Stage("post", lambda ctx: post_tweet_thread(
+                ctx.results["generate"]["tweets"], ctx.results["image"], ctx.results["browser"]),
+                deps=("image", "generate", "browser")))
+        start = time.perf_counter()
+        run_stages(stages)
+        timer.record("end_to_end", time.perf_counter() - start)
+
+        # ── Throughput over the whole catalogue (distinct URLs, cold caches) ──
+        batch = [a for a in services.catalogue.bot_articles() if a["link"] != article["link"]]
+        batch = batch[:args.throughput]
+        latencies = []
+        for a in batch:
+            t0 = time.perf_counter()
+            get_article_image(a["link"])
+            latencies.append(time.perf_counter() - t0)
+        timer.record("image_throughput", sum(latencies), items=len(batch),
+                     p50_ms=round(statistics.median(latencies) * 1e3, 1))
+        timer.run("generate_throughput", lambda: generate_tweets(batch), items=len(batch))
+
+        if args.browser:
+            from bot.poster import open_session, post_tweet_thread
+            driver = timer.run("browser_login_warm", open_session)
+            tweets = generate_tweet(batch[0])["tweets"]
+            timer.run("post_thread", lambda: post_tweet_thread(tweets, None, driver))
+
+        pool = http_client.pool_stats()
+        pages = dict(page_cache.CACHE_STATS)
+        browser = None
+        if args.browser:
+            from bot import browser_profile
+            stats = browser_profile.RESOURCE_STATS
+            loads = stats["page_loads"].values()
+            browser = {
+                "profile": browser_profile.BROWSER_PROFILE,
+                "peak_chrome_mb": round(stats["peak_chrome_mb"], 1),
+                "requests": stats["requests"],
+                "blocked": sum(stats["blocked"].values()),
+                "avg_page_load_ms": round(sum(l["total_ms"] for l in loads)
+                                          / max(1, sum(l["count"] for l in loads)), 1),
+            }
+    finally:
+        services.stop()
+        os.chdir(repo_dir)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "config": {
+            "feeds": args.feeds, "items": args.items, "throughput": args.throughput,
+            "llm_first_token": args.llm_first_token, "llm_tps": args.llm_tps,
+            "stream": not args.no_stream, "browser": args.browser,
+            "browser_profile": os.environ.get("BROWSER_PROFILE", "lean") if args.browser else None,
+        },
+        "machine": f"{platform.system()} {platform.machine()} py{platform.python_version()}",
+        "stages": timer.stages,
+        "http": {"requests": pool["requests"], "handshakes": pool["handshakes"],
+                 "reuse_rate": pool["reuse_rate"]},
+        "page_cache": pages,
+        "browser": browser,
+        "llm_calls": services.llm_calls,
+        "posts": len(services.posts),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def compare(result: dict, baseline: dict) -> int:
+    """Print per-stage diffs against the baseline; returns the number of regressions."""
+    if baseline.get("config") != result["config"]:
+        print("[BENCH] Baseline was recorded with a different config; diffs are indicative only")
+    print(f"\n[BENCH] vs baseline ({baseline.get('machine', '?')}):")
+    regressions = 0
+    for name, now in result["stages"].items():
+        before = baseline.get("stages", {}).get(name)
+        if not before:
+            print(f"  {name:<22} {now['seconds']:8.3f}s  (new)")
+            continue
+        delta = now["seconds"] - before["seconds"]
+        ratio = delta / before["seconds"] if before["seconds"] else 0.0
+        flag = ""
+        if ratio > REGRESSION_THRESHOLD and delta > REGRESSION_MIN_SECONDS:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif ratio < -REGRESSION_THRESHOLD and -delta > REGRESSION_MIN_SECONDS:
+            flag = "  faster"
+        print(f"  {name:<22} {before['seconds']:8.3f}s → {now['seconds']:8.3f}s  {ratio:+7.1%}{flag}")
+    rss_before = baseline.get("peak_rss_mb", {}).get("self")
+    if rss_before:
+        print(f"  {'peak_rss_mb':<22} {rss_before:8.1f}  → {result['peak_rss_mb']['self']:8.1f}")
+    chrome_before = (baseline.get("browser") or {}).get("peak_chrome_mb")
+    if chrome_before and result["browser"]:
+        print(f"  {'peak_chrome_mb':<22} {chrome_before:8.1f}  → {result['browser']['peak_chrome_mb']:8.1f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--feeds", type=int, default=6)
+    parser.add_argument("--items", type=int, default=20, help="items per feed")
+    parser.add_argument("--throughput", type=int, default=40,
+                        help="articles for the image/LLM throughput stages")
+    parser.add_argument("--llm-first-token", type=float, default=0.4)
+    parser.add_argument("--llm-tps", type=float, default=150.0, help="fake LLM tokens per second")
+    parser.add_argument("--no-stream", action="store_true", help="use blocking LLM calls")
+    parser.add_argument("--browser", action="store_true",
+                        help="also drive headless Chrome through the mock X")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--json", help="also write the raw results here")
+    args = parser.parse_args()
+
+    if args.browser and not shutil.which("chromedriver"):
+        sys.exit("[BENCH] --browser needs chromedriver on PATH")
+
+    result = run_benchmark(args)
+    print(f"\n[BENCH] HTTP: {result['http']['requests']} requests over "
+          f"{result['http']['handshakes']} connections; LLM calls: {result['llm_calls']}; "
+          f"peak RSS {result['peak_rss_mb']['self']} MB (children {result['peak_rss_mb']['children']} MB)")
+    pages = result["page_cache"]
+    print(f"[BENCH] Page cache: {pages['misses']} fetches, {pages['refetched']} refetches, "
+          f"{pages['hits']} hits, {pages['joined']} joined in-flight fetches")
+    if result["browser"]:
+        b = result["browser"]
+        print(f"[BENCH] Browser ({b['profile']}): peak Chrome {b['peak_chrome_mb']} MB, "
+              f"avg page load {b['avg_page_load_ms']} ms, blocked {b['blocked']} of {b['requests']} requests")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(result, f, indent=2)
+            f.write("\n")
+        print(f"[BENCH] Saved baseline to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, "r") as f:
+            regressions = compare(result, json.load(f))
+        if regressions:
+            sys.exit(f"[BENCH] {regressions} stage(s) regressed")
+    else:
+        print(f"[BENCH] No baseline at {args.baseline}; run with --save-baseline to create one")
+
+
+if __name__ == "__main__":
+    main()
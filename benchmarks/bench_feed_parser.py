@@ -0,0 +1,80 @@
+# benchmarks/bench_feed_parser.py
+"""
+Benchmark bot.feed_parser against feedparser + entry_to_article.
+
+Feeds come from the same generator as the offline e2e benchmark (RSS 2.0
+and Atom, newest first, 30 minutes between items), so with the 24h
+cutoff only the first ~48 entries are in the window.
+
+Run from the repo root:  python -m benchmarks.bench_feed_parser [items ...]
+"""
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone, timedelta
+
+import feedparser
+
+from benchmarks.fake_services import Catalogue
+from bot import feed_parser
+from bot.fetcher import MAX_AGE_HOURS, entry_to_article
+
+SIZES = [50, 200, 1000]
+REPEATS = 5
+
+
+def with_feedparser(data: bytes, cutoff: float) -> list:
+    feed = feedparser.parse(data)
+    source = feed.feed.get("title", "Unknown Source")
+    return [entry_to_article(e, source) for e in feed.entries]
+
+
+def with_streaming(data: bytes, cutoff: float) -> list:
+    return feed_parser.parse_feed(data)["articles"]
+
+
+def with_streaming_cutoff(data: bytes, cutoff: float) -> list:
+    return feed_parser.parse_feed(data, cutoff_ts=cutoff)["articles"]
+
+
+PARSERS = [
+    ("feedparser", with_feedparser),
+    ("streaming", with_streaming),
+    ("streaming+cutoff", with_streaming_cutoff),
+]
+
+
+def measure(fn, data: bytes, cutoff: float) -> tuple:
+    """(best seconds over REPEATS, peak traced allocation bytes, articles)."""
+    best = float("inf")
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        articles = fn(data, cutoff)
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    fn(data, cutoff)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, len(articles)
+
+
+def bench(items: int):
+    catalogue = Catalogue("https://bench.example", feeds=2, items=items)
+    cutoff = (datetime.now(timezone.utc) - timedelta(hours=MAX_AGE_HOURS)).timestamp()
+    for f, kind in ((0, "rss"), (1, "atom")):
+        data = catalogue.feeds[f][0]
+        baseline = None
+        for name, fn in PARSERS:
+            seconds, peak, count = measure(fn, data, cutoff)
+            baseline = baseline or seconds
+            print(
+                f"{kind:>4} items={items:>5} {len(data) / 1024:7.1f}KB  {name:<17}"
+                f"{seconds * 1e3:8.2f}ms  peak={peak / 1024:8.1f}KB  "
+                f"articles={count:>5}  speedup={baseline / seconds:5.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    sizes = [int(s) for s in sys.argv[1:]] or SIZES
+    for n in sizes:
+        bench(n)
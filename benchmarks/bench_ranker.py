@@ -0,0 +1,60 @@
+# benchmarks/bench_ranker.py
+"""
+Synthetic benchmark for bot.ranker.
+
+"cold" includes the one-off keyword extraction per article, "warm" is a
+re-rank of the same pool (what the daemon does every poll).
+
+Run from the repo root:  python -m benchmarks.bench_ranker [N ...]
+"""
+import random
+import sys
+import time
+
+from bot.ranker import KEYWORD_LIST, rank_articles
+
+SIZES = [1000, 10000, 50000]
+SOURCES = ["TechCrunch", "The Verge", "Ars Technica", "Wired", "Hacker News: Front Page", "Some Blog"]
+FILLER = "the company said on tuesday that its new product would ship later this year".split()
+
+_rng = random.Random(7)
+
+
+def make_articles(n: int, now: float) -> list:
+    articles = []
+    for i in range(n):
+        words = _rng.sample(FILLER, 8) + _rng.sample(KEYWORD_LIST, 2)
+        _rng.shuffle(words)
+        articles.append({
+            "id": f"https://example.com/{i}",
+            "title": " ".join(words),
+            "summary": " ".join(_rng.choices(FILLER, k=60)),
+            "source": _rng.choice(SOURCES),
+            "published_ts": now - _rng.random() * 86400,
+            "cluster_size": _rng.choice([1, 1, 1, 2, 3, 5]),
+        })
+    return articles
+
+
+def bench(n: int):
+    now = time.time()
+    articles = make_articles(n, now)
+
+    t0 = time.perf_counter()
+    rank_articles(articles, top_k=10, now=now)
+    cold = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    top = rank_articles(articles, top_k=10, now=now)
+    warm = time.perf_counter() - t0
+
+    print(
+        f"n={n:>6}  cold={cold * 1e3:8.1f}ms  warm={warm * 1e3:7.1f}ms  "
+        f"({warm / n * 1e6:.2f}us/article)  best={top[0]['score']:.3f}"
+    )
+
+
+if __name__ == "__main__":
+    sizes = [int(s) for s in sys.argv[1:]] or SIZES
+    for n in sizes:
+        bench(n)
@@ -0,0 +1,122 @@
+# benchmarks/bench_similarity.py
+"""
+Synthetic benchmark for bot.similarity.
+
+Builds corpora of N stories where every base story has a few rewritten
+"other outlet" variants, then measures LSH index build/query time and
+recall/precision against exact Jaccard, plus a pairwise baseline for
+the small sizes.
+
+Run from the repo root:  python -m benchmarks.bench_similarity
+"""
+import random
+import sys
+import time
+
+from bot.similarity import (
+    LSHIndex, SIMILARITY_THRESHOLD, cluster_articles, shingles, signature,
+)
+
+SIZES = [500, 2000, 5000]
+VARIANTS_PER_STORY = 3
+PAIRWISE_MAX = 2000  # brute force beyond this takes too long to be useful
+
+_rng = random.Random(42)
+VOCAB = [f"w{i}" for i in range(20000)]
+
+
+def make_story() -> dict:
+    title = _rng.sample(VOCAB, 10)
+    summary = _rng.sample(VOCAB, 40)
+    return {"title": " ".join(title), "summary": " ".join(summary)}
+
+
+def rewrite(story: dict, change: float = 0.25) -> dict:
+    """Another outlet's take: replace a share of the words."""
+    def mutate(text):
+        words = text.split()
+        for i in range(len(words)):
+            if _rng.random() < change:
+                words[i] = _rng.choice(VOCAB)
+        _rng.shuffle(words)
+        return " ".join(words)
+    return {"title": mutate(story["title"]), "summary": mutate(story["summary"])}
+
+
+def make_corpus(n: int) -> tuple:
+    """Returns (articles, story_of) where story_of[i] is the base story index."""
+    articles, story_of = [], []
+    story = 0
+    while len(articles) < n:
+        base = make_story()
+        group = [base] + [rewrite(base) for _ in range(VARIANTS_PER_STORY)]
+        for a in group[: n - len(articles)]:
+            a["id"] = f"a{len(articles)}"
+            articles.append(a)
+            story_of.append(story)
+        story += 1
+    return articles, story_of
+
+
+def jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b) if a | b else 0.0
+
+
+def bench(n: int):
+    articles, story_of = make_corpus(n)
+
+    t0 = time.perf_counter()
+    sigs = [signature(a) for a in articles]
+    t_sig = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    index = LSHIndex()
+    for i, sig in enumerate(sigs):
+        index.add(i, sig)
+    t_build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    found = set()
+    for i, sig in enumerate(sigs):
+        for j in index.query(sig):
+            if j != i:
+                found.add((min(i, j), max(i, j)))
+    t_query = time.perf_counter() - t0
+
+    truth = {
+        (i, j)
+        for i in range(n) for j in range(i + 1, min(n, i + VARIANTS_PER_STORY + 1))
+        if story_of[i] == story_of[j]
+    }
+    recall = len(found & truth) / len(truth) if truth else 1.0
+    precision = len(found & truth) / len(found) if found else 1.0
+
+    t0 = time.perf_counter()
+    clusters = cluster_articles([dict(a) for a in articles])
+    t_cluster = time.perf_counter() - t0
+
+    line = (
+        f"n={n:>6}  sig={t_sig * 1e3:8.1f}ms  build={t_build * 1e3:7.1f}ms  "
+        f"query={t_query / n * 1e6:7.1f}us/doc  cluster={t_cluster * 1e3:8.1f}ms  "
+        f"clusters={len(clusters):>5}  recall={recall:.2f}  precision={precision:.2f}"
+    )
+
+    if n <= PAIRWISE_MAX:
+        feats = [shingles(a) for a in articles]
+        t0 = time.perf_counter()
+        exact = {
+            (i, j)
+            for i in range(n) for j in range(i + 1, n)
+            if jaccard(feats[i], feats[j]) >= SIMILARITY_THRESHOLD
+        }
+        t_pair = time.perf_counter() - t0
+        lsh_recall = len(found & exact) / len(exact) if exact else 1.0
+        line += f"  pairwise={t_pair * 1e3:8.1f}ms  recall_vs_exact={lsh_recall:.2f}"
+
+    print(line)
+
+
+if __name__ == "__main__":
+    sizes = [int(s) for s in sys.argv[1:]] or SIZES
+    for n in sizes:
+        bench(n)
@@ -0,0 +1,482 @@
+# benchmarks/fake_services.py
+"""
+Local stand-ins for everything the bot talks to, served from one
+threaded HTTP server on 127.0.0.1:
+
+  /feeds/<n>.xml          RSS 2.0 (even n) or Atom (odd n) feeds, with ETag/304
+  /articles/<f>-<k>.html  article pages built from fixtures/article.html
+  /images/<f>-<k>.jpg     a large JPEG for the image pipeline to normalise
+  /images/logo.png, /images/pixel.gif
+                          the site logo and tracking pixel every article page
+                          also carries (all images honour Range requests)
+  /openai/v1/chat/completions
+                          Groq-compatible chat endpoint (point the SDK at it
+                          with GROQ_BASE_URL); configurable latency, SSE streaming
+  /i/flow/login, /home, /compose/tweet, /intent/post, /<user>[/with_replies]
+                          a minimal X that login_to_x / compose_thread /
+                          post_single_tweet can drive (point X_BASE_URL at it);
+                          profiles render emoji as <img alt> like X does
+  /fonts/, /profile_images/, /i/jot/
+                          the weight the real pages carry (web font, avatar,
+                          telemetry script) for the browser resource policy to block
+
+Used by benchmarks.bench_e2e; can also be run on its own:
+    python -m benchmarks.fake_services [port]
+"""
+import hashlib
+import io
+import itertools
+import json
+import os
+import re
+import socket
+import sys
+import threading
+import time
+from email.utils import format_datetime
+from datetime import datetime, timezone, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from html import escape
+from urllib.parse import urlparse, parse_qs
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+FEED_COUNT = 6
+ITEMS_PER_FEED = 20
+ITEM_SPACING_MINUTES = 30
+ARTICLE_PARAGRAPHS = 60    # ~60KB pages, like a real article with boilerplate
+IMAGE_SIZE = (2400, 1600)  # bigger than MAX_DIMENSIONS so normalisation does real work
+RANGE_RE = re.compile(r"bytes=(\d+)-(\d*)$")
+
+LLM_FIRST_TOKEN_SECONDS = 0.4
+LLM_TOKENS_PER_SECOND = 150.0
+LLM_TOKENS_PER_CHUNK = 3
+
+TITLE_RE = re.compile(r"ARTICLE TITLE: (.*)")
+AUTH_COOKIE = "bench_auth"
+TWITTER_EPOCH_MS = 1288834974657
+EMOJI_RE = re.compile("[\U0001F000-\U0001FAFF\u2600-\u27BF]")
+
+
+class Catalogue:
+    """Deterministic feeds/articles derived from fixtures/headlines.json."""
+
+    def __init__(self, base_url: str, feeds: int = FEED_COUNT, items: int = ITEMS_PER_FEED):
+        with open(os.path.join(FIXTURES_DIR, "headlines.json"), "r") as f:
+            headlines = json.load(f)
+        with open(os.path.join(FIXTURES_DIR, "article.html"), "r") as f:
+            self.article_template = f.read()
+        self.base_url = base_url
+        self.started = datetime.now(timezone.utc).replace(microsecond=0)
+        self.articles = []
+        self.feeds = {}
+        for f in range(feeds):
+            entries = []
+            for k in range(items):
+                h = headlines[(f * items + k) % len(headlines)]
+                slug = f"{f}-{k}"
+                entries.append({
+                    "id": f"{base_url}/articles/{slug}.html",
+                    "title": h["title"],
+                    "summary": h["summary"],
+                    "link": f"{base_url}/articles/{slug}.html",
+                    "image": f"{base_url}/images/{slug}.jpg",
+                    "source": f"Bench Feed {f}",
+                    "published": self.started - timedelta(minutes=ITEM_SPACING_MINUTES * k),
+                })
+            self.articles.extend(entries)
+            body = self._atom(f, entries) if f % 2 else self._rss(f, entries)
+            self.feeds[f] = (body.encode("utf-8"), f'"{hashlib.sha1(body.encode()).hexdigest()[:16]}"')
+        self.by_slug = {a["link"].rsplit("/", 1)[1][:-5]: a for a in self.articles}
+        self.image = self._make_image()
+        self.logo = self._make_small((240, 60), "PNG")
+        self.pixel = self._make_small((1, 1), "GIF")
+
+    def feed_urls(self) -> list:
+        return [f"{self.base_url}/feeds/{f}.xml" for f in sorted(self.feeds)]
+
+    def bot_articles(self) -> list:
+        """The catalogue as fetcher.entry_to_article-shaped dicts."""
+        return [
+            {
+                "id": a["id"], "title": a["title"], "link": a["link"],
+                "summary": a["summary"], "source": a["source"],
+                "published": a["published"].isoformat(),
+                "published_ts": a["published"].timestamp(),
+            }
+            for a in self.articles
+        ]
+
+    def _rss(self, f: int, entries: list) -> str:
+        items = "".join(
+            f"<item><title>{escape(e['title'])}</title><link>{e['link']}</link>"
+            f"<guid>{e['id']}</guid><pubDate>{format_datetime(e['published'])}</pubDate>"
+            f"<description>{escape('<p>' + e['summary'] + '</p>')}</description></item>\n"
+            for e in entries
+        )
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n<rss version="2.0"><channel>'
+            f"<title>Bench Feed {f}</title><link>{self.base_url}/</link>"
+            f"<description>Benchmark feed</description>\n{items}</channel></rss>\n"
+        )
+
+    def _atom(self, f: int, entries: list) -> str:
+        items = "".join(
+            f"<entry><title>{escape(e['title'])}</title><link href=\"{e['link']}\"/>"
+            f"<id>{e['id']}</id><updated>{e['published'].isoformat()}</updated>"
+            f"<published>{e['published'].isoformat()}</published>"
+            f"<summary type=\"html\">{escape('<p>' + e['summary'] + '</p>')}</summary></entry>\n"
+            for e in entries
+        )
+        return (
+            '<?xml version="1.0" encoding="utf-8"?>\n<feed xmlns="http://www.w3.org/2005/Atom">'
+            f"<title>Bench Feed {f}</title><id>{self.base_url}/feeds/{f}</id>"
+            f"<updated>{self.started.isoformat()}</updated>\n{items}</feed>\n"
+        )
+
+    def article_html(self, slug: str) -> bytes | None:
+        a = self.by_slug.get(slug)
+        if a is None:
+            return None
+        paragraph = f"<p>{escape(a['summary'])} " + "Lorem ipsum dolor sit amet. " * 30 + "</p>\n"
+        return self.article_template.format(
+            title=escape(a["title"]), summary=escape(a["summary"]), url=a["link"],
+            image_url=a["image"], body=paragraph * ARTICLE_PARAGRAPHS,
+        ).encode("utf-8")
+
+    @staticmethod
+    def _make_image() -> bytes:
+        from PIL import Image
+        w, h = IMAGE_SIZE
+        gradient = Image.linear_gradient("L").resize((w, h))
+        img = Image.merge("RGB", (
+            gradient,
+            gradient.transpose(Image.FLIP_TOP_BOTTOM),
+            gradient.transpose(Image.FLIP_LEFT_RIGHT),
+        ))
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=92)
+        return buf.getvalue()
+
+    @staticmethod
+    def _make_small(size: tuple, fmt: str) -> bytes:
+        from PIL import Image
+        buf = io.BytesIO()
+        Image.new("RGB", size, (200, 30, 30)).save(buf, fmt)
+        return buf.getvalue()
+
+
+def _emoji_img(match) -> str:
+    return f'<img alt="{match.group(0)}" src="/emoji/{ord(match.group(0)):x}.svg">'
+
+
+def fake_completion(prompt: str) -> str:
+    """A well-formed LABEL/TWEET1-4 reply for TWEET_PROMPT, or a one-line rewrite."""
+    match = TITLE_RE.search(prompt)
+    if not match:
+        return "🔥 JUST IN: shortened rewrite of the tweet #Tech"
+    title = match.group(1).strip()[:150]
+    return (
+        "LABEL: 🔥 JUST IN\n"
+        f"TWEET1: 🔥 JUST IN: {title} #Tech #AI\n"
+        "TWEET2: 2/ Here's what changed and why it matters for developers and users alike.\n"
+        "TWEET3: 3/ Expect competitors to respond quickly; pricing and availability are the ones to watch.\n"
+        "TWEET4: 4/ Would you switch? Tell us below 👇\n"
+    )
+
+
+# ── Minimal X ─────────────────────────────────────────────────────
+LOGIN_PAGE = """<!DOCTYPE html><html><head><title>Log in to X</title></head><body>
+<div id="flow">
+  <input autocomplete="username" name="text">
+  <div role="button" id="next"><span>Next</span></div>
+</div>
+<script>
+document.getElementById('next').onclick = function () {
+  setTimeout(function () {
+    document.getElementById('flow').innerHTML =
+      '<input type="password" name="password">' +
+      '<button id="login"><span>Log in</span></button>';
+    document.getElementById('login').onclick = function () {
+      document.cookie = '%s=1; path=/';
+      setTimeout(function () { location.href = '/home'; }, 50);
+    };
+  }, 100);
+};
+</script></body></html>""" % AUTH_COOKIE
+
+# What every app page pulls in besides the app itself
+PAGE_EXTRAS = """<style>@font-face { font-family: Chirp; src: url(/fonts/chirp.woff2); }
+body { font-family: Chirp, sans-serif; }</style>
+<script src="/i/jot/client_event.js" async></script>"""
+FONT_BYTES = 180 * 1024
+
+HOME_PAGE = """<!DOCTYPE html><html><head><title>Home / X</title>%s</head><body>
+<img src="/profile_images/avatar.jpg" width="48" height="48">
+<nav><a data-testid="AppTabBar_Home_Link" href="/home">Home</a>
+<a data-testid="SideNav_NewTweet_Button" href="/compose/tweet">Post</a></nav>
+</body></html>""" % PAGE_EXTRAS
+
+COMPOSE_PAGE = """<!DOCTYPE html><html><head><title>Compose / X</title>%s</head><body>
+<img src="/profile_images/avatar.jpg" width="48" height="48">
+<div id="composer" data-reply-to="%%s">
+  <div id="boxes"><div data-testid="tweetTextarea_0" contenteditable="true" role="textbox"></div></div>
+  <input type="file" accept="image/jpeg,image/png,image/webp,image/gif" id="media">
+  <div id="media-preview"></div>
+  <button data-testid="addButton">+</button>
+  <button data-testid="tweetButton" disabled>Post</button>
+</div>
+<script>
+const composer = document.getElementById('composer');
+const post = composer.querySelector('[data-testid="tweetButton"]');
+function boxes() { return Array.from(document.querySelectorAll('[contenteditable="true"]')); }
+document.addEventListener('input', function () {
+  post.disabled = !boxes().every(b => b.innerText.trim().length > 0);
+}, true);
+document.getElementById('media').onchange = function () {
+  setTimeout(function () {
+    document.getElementById('media-preview').innerHTML = '<div data-testid="attachments">img</div>';
+  }, 150);
+};
+composer.querySelector('[data-testid="addButton"]').onclick = function () {
+  const n = boxes().length;
+  const box = document.createElement('div');
+  box.setAttribute('data-testid', 'tweetTextarea_' + n);
+  box.setAttribute('contenteditable', 'true');
+  box.setAttribute('role', 'textbox');
+  document.getElementById('boxes').appendChild(box);
+  post.disabled = true;
+};
+post.onclick = function () {
+  post.disabled = true;
+  fetch('/api/post', {method: 'POST', headers: {'Content-Type': 'application/json'},
+    body: JSON.stringify({reply_to: composer.dataset.replyTo, tweets: boxes().map(b => b.innerText)})})
+    .then(r => r.json())
+    .then(function (res) {
+      composer.remove();
+      const toast = document.createElement('div');
+      toast.setAttribute('data-testid', 'toast');
+      toast.innerHTML = 'Your post was sent. <a href="/bench/status/' + res.ids[0] + '">View</a>';
+      document.body.appendChild(toast);
+    });
+};
+</script></body></html>""" % PAGE_EXTRAS.replace("%", "%%")
+
+
+class FakeServices:
+    """Owns the server thread plus what the fakes recorded (posts, LLM calls)."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, feeds: int = FEED_COUNT,
+                 items: int = ITEMS_PER_FEED, llm_first_token: float = LLM_FIRST_TOKEN_SECONDS,
+                 llm_tokens_per_second: float = LLM_TOKENS_PER_SECOND):
+        self.llm_first_token = llm_first_token
+        self.llm_tokens_per_second = llm_tokens_per_second
+        self.posts = []
+        self.llm_calls = 0
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        handler = type("Handler", (_Handler,), {"services": self})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self.base_url = f"http://{host}:{self.server.server_address[1]}"
+        self.catalogue = Catalogue(self.base_url, feeds, items)
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def record_post(self, payload: dict) -> list:
+        with self._lock:
+            # Snowflake-style: creation time in the high bits, like X's status IDs
+            now_ms = int(time.time() * 1000) - TWITTER_EPOCH_MS
+            ids = [str((now_ms << 22) + next(self._seq) % (1 << 22)) for _ in payload.get("tweets", [])]
+            self.posts.append({**payload, "ids": ids})
+        return ids
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so the bot's connection pool is exercised
+    services = None
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate writes; without this, Nagle plus
+        # delayed ACKs stall every response after the first on a kept-alive connection
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the bot closed a stream early or dropped an idle connection
+
+    # ── helpers ───────────────────────────────────────────────────
+    def _send(self, status: int, body: bytes = b"", content_type: str = "text/html; charset=utf-8",
+              headers: dict | None = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        if body and self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _send_ranged(self, body: bytes, content_type: str):
+        """Serve `body`, honouring a single-range Range header like a CDN would."""
+        match = RANGE_RE.match(self.headers.get("Range") or "")
+        if not match or int(match.group(1)) >= len(body):
+            return self._send(200, body, content_type, {"Accept-Ranges": "bytes"})
+        start = int(match.group(1))
+        end = min(int(match.group(2) or len(body) - 1), len(body) - 1)
+        return self._send(206, body[start:end + 1], content_type, {
+            "Accept-Ranges": "bytes", "Content-Range": f"bytes {start}-{end}/{len(body)}",
+        })
+
+    def _logged_in(self) -> bool:
+        return f"{AUTH_COOKIE}=1" in (self.headers.get("Cookie") or "")
+
+    # ── routes ────────────────────────────────────────────────────
+    def do_GET(self):
+        url = urlparse(self.path)
+        path = url.path
+        cat = self.services.catalogue
+
+        if path.startswith("/feeds/") and path.endswith(".xml"):
+            feed = cat.feeds.get(int(path[7:-4])) if path[7:-4].isdigit() else None
+            if feed is None:
+                return self._send(404)
+            body, etag = feed
+            if self.headers.get("If-None-Match") == etag:
+                return self._send(304, headers={"ETag": etag})
+            return self._send(200, body, "application/rss+xml; charset=utf-8", {"ETag": etag})
+
+        if path.startswith("/articles/") and path.endswith(".html"):
+            html = cat.article_html(path[10:-5])
+            return self._send(200, html) if html else self._send(404)
+
+        if path == "/images/logo.png":
+            return self._send_ranged(cat.logo, "image/png")
+        if path == "/images/pixel.gif":
+            return self._send_ranged(cat.pixel, "image/gif")
+        if path.startswith("/images/"):
+            return self._send_ranged(cat.image, "image/jpeg")
+
+        if path.startswith("/fonts/"):
+            return self._send(200, b"\0" * FONT_BYTES, "font/woff2")
+        if path.startswith("/profile_images/"):
+            return self._send(200, cat.image, "image/jpeg")
+        if path.startswith("/i/jot/"):
+            return self._send(200, b"void 0;", "application/javascript")
+        if path == "/robots.txt":
+            return self._send(200, b"User-agent: *\n", "text/plain")
+        if path == "/i/flow/login":
+            return self._send(200, LOGIN_PAGE.encode())
+        if path == "/home":
+            if not self._logged_in():
+                return self._send(302, headers={"Location": "/i/flow/login"})
+            return self._send(200, HOME_PAGE.encode())
+        if path in ("/compose/tweet", "/compose/post", "/intent/post"):
+            if not self._logged_in():
+                return self._send(302, headers={"Location": "/i/flow/login"})
+            reply_to = parse_qs(url.query).get("in_reply_to", [""])[0]
+            return self._send(200, (COMPOSE_PAGE % escape(reply_to)).encode())
+        if re.fullmatch(r"/[^/]+(/with_replies)?", path):
+            # Profile: newest post first, emoji as <img alt> like X renders them
+            user = path.split("/")[1]
+            posts = [(i, t) for p in reversed(self.services.posts)
+                     for i, t in reversed(list(zip(p["ids"], p["tweets"])))]
+            articles = "".join(
+                f'<article><a href="/{user}/status/{i}"><time>now</time></a>'
+                f'<div data-testid="tweetText">{EMOJI_RE.sub(_emoji_img, escape(t))}</div></article>'
+                for i, t in posts
+            ) or '<div data-testid="emptyState">No posts yet</div>'
+            return self._send(200, f"<html><body>{articles}</body></html>".encode())
+        return self._send(404)
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if self.path == "/api/post":
+            ids = self.services.record_post(payload)
+            return self._send(200, json.dumps({"ids": ids}).encode(), "application/json")
+        if self.path.rstrip("/").endswith("/openai/v1/chat/completions"):
+            return self._chat(payload)
+        return self._send(404)
+
+    # ── fake Groq ─────────────────────────────────────────────────
+    def _chat(self, payload: dict):
+        services = self.services
+        with services._lock:
+            services.llm_calls += 1
+        prompt = payload["messages"][-1]["content"]
+        text = fake_completion(prompt)
+        tokens = re.findall(r"\S+\s*", text)
+        per_token = 1.0 / services.llm_tokens_per_second
+        model = payload.get("model", "bench-model")
+        created = int(time.time())
+        time.sleep(services.llm_first_token)
+
+        if not payload.get("stream"):
+            time.sleep(per_token * len(tokens))
+            body = {
+                "id": "chatcmpl-bench", "object": "chat.completion", "created": created,
+                "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": text}}],
+                "usage": {"prompt_tokens": len(prompt.split()), "completion_tokens": len(tokens),
+                          "total_tokens": len(prompt.split()) + len(tokens)},
+            }
+            return self._send(200, json.dumps(body).encode(), "application/json")
+
+        # Server-sent events over chunked encoding, paced like a real model
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def event(data: str):
+            raw = f"data: {data}\n\n".encode()
+            self.wfile.write(f"{len(raw):x}\r\n".encode() + raw + b"\r\n")
+            self.wfile.flush()
+
+        def chunk(delta: dict, finish=None) -> str:
+            return json.dumps({
+                "id": "chatcmpl-bench", "object": "chat.completion.chunk", "created": created,
+                "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+            })
+
+        try:
+            event(chunk({"role": "assistant", "content": ""}))
+            for i in range(0, len(tokens), LLM_TOKENS_PER_CHUNK):
+                piece = tokens[i:i + LLM_TOKENS_PER_CHUNK]
+                time.sleep(per_token * len(piece))
+                event(chunk({"content": "".join(piece)}))
+            event(chunk({}, "stop"))
+            event("[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # client stopped reading early
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    services = FakeServices(port=port).start()
+    print(f"Fake services on {services.base_url}")
+    print("  feeds:", *services.catalogue.feed_urls(), sep="\n    ")
+    print(f"  GROQ_BASE_URL={services.base_url}  X_BASE_URL={services.base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        services.stop()
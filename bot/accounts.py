@@ -0,0 +1,407 @@
+# bot/accounts.py
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import queue
+import re
+import signal
+import sys
+import time
+
+from bot import metrics
+
+# ── Multi-account worker pool ─────────────────────────────────────
+# One process per topic account, each with its own Chrome, cookie jar and
+# profile dir, fed with (account, thread, image) jobs prepared once in the
+# parent. Each account posts under its own token bucket, and a global
+# semaphore bounds how many browsers are alive at once so memory stays
+# within the host's budget. Workers only post: dedup state is written by
+# the parent as results come back, so there is a single writer.
+# Per account, the token bucket level and one run journal per thread live
+# under ACCOUNT_STATE_DIR, so rate limits hold across runs and a thread a
+# crashed worker had started is resumed, not reposted, by the next run.
+#
+# Accounts come from the environment:
+#   X_ACCOUNTS=ai,security
+#   X_USERNAME_AI / X_PASSWORD_AI     credentials per account
+#   X_TOPICS_AI=ai,llm,openai         optional keywords an article must match
+ACCOUNT_POSTS_PER_RUN = int(os.environ.get("ACCOUNT_POSTS_PER_RUN", 1))
+ACCOUNT_POSTS_PER_HOUR = float(os.environ.get("ACCOUNT_POSTS_PER_HOUR", 2))
+ACCOUNT_BURST = int(os.environ.get("ACCOUNT_BURST", 1))
+BROWSER_MEMORY_MB = int(os.environ.get("BROWSER_MEMORY_MB", 400))  # budget per live Chrome
+BROWSER_IDLE_RELEASE_SECONDS = 60  # give the browser slot back if the next token is further off
+ACCOUNTS_RUN_MINUTES = float(os.environ.get("ACCOUNTS_RUN_MINUTES", 45))  # then stuck workers are stopped
+WORKER_EXIT_SECONDS = 10
+SESSION_DIR = ".session"
+ACCOUNT_STATE_DIR = "data/accounts"
+
+_NAME_RE = re.compile(r"[^A-Za-z0-9]+")
+
+
+class TokenBucket:
+    """
+    `rate_per_hour` tokens per hour, holding at most `burst`; starts full.
+    With `path`, the level is saved there on every take and restored on
+    the next run (wall-clock time, so the refill spans the gap between runs).
+    """
+
+    def __init__(self, rate_per_hour: float, burst: int = 1, path: str | None = None):
+        self.rate = rate_per_hour / 3600
+        self.burst = burst
+        self.path = path
+        self.tokens = float(burst)
+        self.updated = time.time()
+        if path:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                state = json.load(f)
+            self.tokens = min(float(self.burst), float(state["tokens"]))
+            self.updated = min(time.time(), float(state["updated"]))
+        except (OSError, ValueError, KeyError, TypeError):
+            pass  # no (readable) state yet: start full
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"tokens": self.tokens, "updated": self.updated}, f)
+        os.replace(tmp_path, self.path)
+
+    def _refill(self):
+        now = time.time()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self) -> float:
+        """Seconds until a token is available (0 if one is now)."""
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate else float("inf")
+
+    def take(self):
+        """Block until a token is available, then spend it."""
+        while (wait := self.wait_time()) > 0:
+            time.sleep(wait)
+        self.tokens -= 1
+        if self.path:
+            self._save()
+
+
+def load_accounts() -> list:
+    """Accounts configured in X_ACCOUNTS, skipping any without credentials."""
+    accounts = []
+    for name in filter(None, (n.strip() for n in os.environ.get("X_ACCOUNTS", "").split(","))):
+        key = _NAME_RE.sub("_", name).upper()
+        username = os.environ.get(f"X_USERNAME_{key}")
+        password = os.environ.get(f"X_PASSWORD_{key}")
+        if not username or not password:
+            print(f"[ACCOUNTS] {name}: X_USERNAME_{key} / X_PASSWORD_{key} not set, skipping")
+            continue
+        topics = os.environ.get(f"X_TOPICS_{key}", "")
+        accounts.append({
+            "name": name,
+            "key": key.lower(),
+            "username": username,
+            "password": password,
+            "topics": [t.strip().lower() for t in topics.split(",") if t.strip()],
+        })
+    return accounts
+
+
+def bucket_path(account: dict) -> str:
+    return os.path.join(ACCOUNT_STATE_DIR, f"{account['key']}_bucket.json")
+
+
+def journal_path(account: dict, article_id: str) -> str:
+    digest = hashlib.sha1(article_id.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(ACCOUNT_STATE_DIR, f"{account['key']}_journal_{digest}.json")
+
+
+def max_browsers(accounts: int) -> int:
+    """X_MAX_BROWSERS, else as many browsers as MemAvailable fits, within 1..accounts."""
+    if os.environ.get("X_MAX_BROWSERS"):
+        return max(1, min(accounts, int(os.environ["X_MAX_BROWSERS"])))
+    try:
+        with open("/proc/meminfo") as f:
+            meminfo = dict(line.split(":", 1) for line in f)
+        available_mb = int(meminfo["MemAvailable"].split()[0]) // 1024
+    except (OSError, KeyError, ValueError):
+        return 1
+    return max(1, min(accounts, available_mb // BROWSER_MEMORY_MB))
+
+
+def matches(account: dict, article: dict) -> bool:
+    if not account["topics"]:
+        return True
+    text = f"{article['title']} {article.get('summary', '')}".lower()
+    return any(topic in text for topic in account["topics"])
+
+
+def assign_articles(accounts: list, ranked: list, taken: set = frozenset()) -> list:
+    """
+    (account, article) pairs: each account gets its best-ranked matching
+    articles, no article twice and none of the ids in `taken`.
+    """
+    taken = set(taken)
+    pairs = []
+    for account in accounts:
+        picked = 0
+        for article in ranked:
+            if picked >= ACCOUNT_POSTS_PER_RUN:
+                break
+            if article["id"] in taken or not matches(account, article):
+                continue
+            taken.add(article["id"])
+            pairs.append((account, article))
+            picked += 1
+        if not picked:
+            print(f"[ACCOUNTS] {account['name']}: no matching article this run")
+    return pairs
+
+
+# ── Worker process ────────────────────────────────────────────────
+def _use_account(account: dict):
+    """
+    Point this process at one account: credentials (read at login time),
+    its own cookie jar, Chrome profile dir, debug captures and metrics file.
+    Module settings are assigned directly because a spawned worker may
+    already have imported them with the parent's values (via __main__).
+    """
+    from bot import debug_capture, poster, session_store
+
+    os.environ["X_USERNAME"] = account["username"]
+    os.environ["X_PASSWORD"] = account["password"]
+    session_store.SESSION_PATH = os.path.join(SESSION_DIR, f"{account['key']}_cookies.json")
+    if poster.CHROME_PROFILE_DIR:
+        poster.CHROME_PROFILE_DIR = os.path.join(poster.CHROME_PROFILE_DIR, account["key"])
+    debug_capture.DEBUG_DIR = os.path.join(debug_capture.DEBUG_DIR, account["key"])
+    os.environ["BOT_PROM_PATH"] = f"data/metrics_{account['key']}.prom"
+    metrics.configure()
+
+
+def _worker(account: dict, jobs, results, browsers, deadline: float):
+    _use_account(account)
+    from bot import waits
+    from bot.poster import open_session, post_tweet_thread
+    from bot.run_journal import RunJournal
+
+    # The parent terminates workers still running at the deadline; exit
+    # through the finally below so Chrome is quit rather than orphaned
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(1))
+    name = account["name"]
+    bucket = TokenBucket(ACCOUNT_POSTS_PER_HOUR, ACCOUNT_BURST, bucket_path(account))
+    driver = None
+
+    def release():
+        nonlocal driver
+        if driver is not None:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            driver = None
+            browsers.release()
+
+    try:
+        while (job := jobs.get()) is not None:
+            wait = bucket.wait_time()
+            if time.time() + wait > deadline:
+                print(f"[WORKER {name}] Rate limited for {wait / 60:.0f}m, past this run's deadline; "
+                      f"leaving the thread for the next run")
+                results.put({"account": name, "article_id": job["article"]["id"], "ok": False,
+                             "deferred": True, "seconds": 0.0})
+                continue
+            if wait > BROWSER_IDLE_RELEASE_SECONDS:
+                print(f"[WORKER {name}] Rate limited for {wait:.0f}s, releasing browser slot")
+                release()
+            bucket.take()
+
+            start = time.monotonic()
+            if driver is None:
+                browsers.acquire()
+                try:
+                    with metrics.span("accounts.open_session", account=name):
+                        driver = open_session()
+                except Exception as e:
+                    browsers.release()
+                    print(f"[WORKER {name}] Could not open a session: {e}")
+                    results.put({"account": name, "article_id": job["article"]["id"], "ok": False,
+                                 "seconds": time.monotonic() - start})
+                    continue
+            journal = RunJournal(job["journal_path"])
+            if not journal.active:
+                journal.start(job["article"])
+                journal.record("thread", {"tweets": job["tweets"]})
+                journal.record("image", {"url": None, "path": job["image_path"]})
+            with metrics.span("accounts.post", account=name):
+                ok = post_tweet_thread(job["tweets"], job["image_path"], driver=driver,
+                                       keep_open=True, journal=journal)
+            waits.RUN_TIMINGS.clear()
+            results.put({"account": name, "article_id": job["article"]["id"], "ok": ok,
+                         "seconds": time.monotonic() - start})
+            if not ok:
+                release()  # don't trust browser state after a failure
+    finally:
+        release()
+        metrics.flush()
+
+
+# ── Parent ────────────────────────────────────────────────────────
+def resume_jobs(accounts: list) -> list:
+    """Jobs for threads a previous run journaled but didn't finish; abandons expired ones."""
+    from bot.fetcher import mark_posted
+    from bot.run_journal import RunJournal
+
+    jobs = []
+    for account in accounts:
+        for path in sorted(glob.glob(os.path.join(ACCOUNT_STATE_DIR, f"{account['key']}_journal_*.json"))):
+            journal = RunJournal(path)
+            if journal.expired() or (journal.active and not journal.get("thread")):
+                print(f"[ACCOUNTS] {account['name']}: abandoning unfinished thread for "
+                      f"{journal.article['title']}")
+                if journal.posted():
+                    mark_posted(journal.article)  # part of the thread is live, never pick it again
+                journal.clear()
+                continue
+            if not journal.active:
+                continue
+            image_path = (journal.get("image") or {}).get("path")
+            print(f"[ACCOUNTS] {account['name']}: resuming {journal.article['title']} "
+                  f"(attempt {journal.get('attempts') + 1})")
+            jobs.append({
+                "account": account["name"], "article": journal.article,
+                "tweets": journal.get("thread")["tweets"],
+                "image_path": image_path if image_path and os.path.exists(image_path) else None,
+                "journal_path": path,
+            })
+    return jobs
+
+
+def prepare_jobs(accounts: list) -> list:
+    """
+    Resume journaled threads first; then fetch and rank once, give each
+    remaining account its articles, and generate threads and images.
+    """
+    from bot import page_cache
+    from bot.ai_writer import generate_tweets
+    from bot.fetcher import fetch_latest_articles
+    from bot.image_extractor import get_article_image
+    from bot.ranker import rank_articles, log_ranking
+
+    resumed = resume_jobs(accounts)
+    busy = {job["account"] for job in resumed}
+    fresh = [a for a in accounts if a["name"] not in busy]
+    if not fresh:
+        return resumed
+    with metrics.span("stage.fetch"):
+        articles = fetch_latest_articles()
+    if not articles:
+        return resumed
+    with metrics.span("stage.rank", candidates=len(articles)):
+        ranked = rank_articles(articles, top_k=len(articles))
+    pairs = assign_articles(fresh, ranked, taken={job["article"]["id"] for job in resumed})
+    picked = [article for _, article in pairs]
+    log_ranking(picked)
+
+    page_cache.prefetch([a["link"] for a in picked], text=True)
+    for article in picked:
+        page_cache.enrich_article(article)
+    with metrics.span("stage.generate", articles=len(picked)):
+        threads = generate_tweets(picked)
+    return resumed + [
+        {"account": account["name"], "article": article, "tweets": thread["tweets"],
+         "image_path": get_article_image(article["link"]),
+         "journal_path": journal_path(account, article["id"])}
+        for (account, article), thread in zip(pairs, threads)
+    ]
+
+
+def run():
+    from bot.fetcher import mark_posted
+    from bot.run_journal import RunJournal
+
+    accounts = load_accounts()
+    if not accounts:
+        print("[ACCOUNTS] No accounts configured (set X_ACCOUNTS)")
+        return False
+    jobs = prepare_jobs(accounts)
+    if not jobs:
+        print("[ACCOUNTS] Nothing to post")
+        return True
+
+    slots = max_browsers(len(accounts))
+    # spawn, not fork: the parent holds HTTP pools and threads a fork would copy mid-use
+    ctx = multiprocessing.get_context("spawn")
+    browsers = ctx.BoundedSemaphore(slots)
+    results = ctx.Queue()
+    queues = {a["name"]: ctx.Queue() for a in accounts}
+    for job in jobs:
+        queues[job["account"]].put(job)
+    busy = [a for a in accounts if any(j["account"] == a["name"] for j in jobs)]
+    print(f"[ACCOUNTS] {len(jobs)} threads for {len(busy)} accounts, {slots} browsers at a time")
+
+    start = time.monotonic()
+    deadline = time.time() + ACCOUNTS_RUN_MINUTES * 60
+    workers = []
+    for account in busy:
+        queues[account["name"]].put(None)
+        proc = ctx.Process(target=_worker, name=f"poster-{account['key']}",
+                           args=(account, queues[account["name"]], results, browsers, deadline))
+        proc.start()
+        workers.append(proc)
+
+    by_id = {job["article"]["id"]: job for job in jobs}
+    posted = failed = deferred = 0
+    pending = len(jobs)
+    while pending:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            print(f"[ACCOUNTS] Deadline of {ACCOUNTS_RUN_MINUTES:g}m passed with {pending} jobs "
+                  f"unreported; stopping workers (their journals resume next run)")
+            break
+        try:
+            result = results.get(timeout=min(5, remaining))
+        except queue.Empty:
+            if not any(p.is_alive() for p in workers):
+                print(f"[ACCOUNTS] Workers exited with {pending} jobs unreported")
+                break
+            continue
+        pending -= 1
+        job = by_id[result["article_id"]]
+        if result["ok"]:
+            posted += 1
+            mark_posted(job["article"])
+            RunJournal(job["journal_path"]).clear()
+            metrics.incr("account_posts", account=result["account"], result="ok")
+            print(f"[ACCOUNTS] ✅ {result['account']} posted in {result['seconds']:.1f}s")
+        elif result.get("deferred"):
+            deferred += 1
+            metrics.incr("account_posts", account=result["account"], result="deferred")
+        else:
+            failed += 1
+            journal = RunJournal(job["journal_path"])
+            if journal.active:
+                journal.record_failure("post_tweet_thread returned False")
+            metrics.incr("account_posts", account=result["account"], result="failed")
+            print(f"[ACCOUNTS] ❌ {result['account']} failed after {result['seconds']:.1f}s")
+    for proc in workers:
+        proc.join(max(0.0, deadline - time.time()))
+        if proc.is_alive():
+            proc.terminate()
+            proc.join(WORKER_EXIT_SECONDS)
+        if proc.is_alive():
+            print(f"[ACCOUNTS] {proc.name} did not exit, killing it")
+            proc.kill()
+            proc.join()
+
+    elapsed = time.monotonic() - start
+    rate = posted / elapsed * 60 if elapsed else 0.0
+    print(f"[ACCOUNTS] {posted} posted, {failed} failed, {deferred} deferred, {pending} unreported "
+          f"in {elapsed:.1f}s ({rate:.2f} posts/min across {len(workers)} workers, {slots} browsers)")
+    return failed == 0 and pending == 0
@@ -1,19 +1,34 @@
 # bot/ai_writer.py
 import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from groq import Groq
 from dotenv import load_dotenv
 
+from bot import llm_cache, metrics
+from bot.pipeline import Cancelled
+from bot.stream_parser import StreamingTweetParser, to_raw
+from bot.tweet_text import MAX_WEIGHTED_LENGTH, URL_WEIGHT, truncate_to_weight, weighted_length
+
 load_dotenv()
 
 client = Groq(api_key=os.environ["GROQ_API_KEY"])
 
+MODEL = "llama-3.3-70b-versatile"
+TEMPERATURE = 0.7
+MAX_TOKENS = 500
+LLM_MAX_CONCURRENCY = 4  # parallel Groq calls in generate_tweets (rate-limit friendly)
+STREAM_GENERATION = os.environ.get("LLM_STREAM", "1") != "0"
+EXCERPT_CHARS = 1500  # article body text added to the prompt (keeps it well under the context budget)
+
 TWEET_PROMPT = """
 You are a tech news Twitter editor. Write an engaging tweet about this article.
 
 ARTICLE TITLE: {title}
 ARTICLE SUMMARY: {summary}
 SOURCE: {source}
-
+{excerpt}
 INSTRUCTIONS:
 1. Classify as one of:
    - 🚨 BREAKING — confirmed official announcement
@@ -39,24 +54,49 @@ TWEET3: [thread continuation]
 TWEET4: [optional question to audience]
 """
 
-def generate_tweet(article: dict) -> dict:
+@metrics.traced()
+def generate_tweet(article: dict, checkpoint=None) -> dict:
+    """
+    Thread for one article. `checkpoint()` is called before the request and
+    as each streamed tweet completes; it raises to abandon the generation.
+    """
+    # Body text from page_cache.enrich_article, when the page was read
+    body = (article.get("body") or "")[:EXCERPT_CHARS]
     prompt = TWEET_PROMPT.format(
         title=article["title"],
         summary=article.get("summary", "No summary available"),
         source=article.get("source", "Tech News"),
+        excerpt=f"ARTICLE EXCERPT: {body}\n" if body else "",
     )
 
+    # Same prompt + model + sampling settings → reuse the earlier completion
+    key = llm_cache.cache_key(TWEET_PROMPT, MODEL, TEMPERATURE, MAX_TOKENS,
+                              article["title"], article.get("summary"),
+                              article.get("source"), body)
+    raw = llm_cache.get(key)
+    if raw is not None:
+        print(f"[AI] Cache hit for: {article['title'][:60]}")
+        return parse_ai_response(raw, article)
+
     try:
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=500,
-            temperature=0.7,
-        )
-        raw = response.choices[0].message.content.strip()
+        if checkpoint is not None:
+            checkpoint()
+        if STREAM_GENERATION:
+            raw = generate_streaming(prompt, article, checkpoint)
+        else:
+            response = client.chat.completions.create(
+                model=MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=MAX_TOKENS,
+                temperature=TEMPERATURE,
+            )
+            raw = response.choices[0].message.content.strip()
         print(f"[AI] Raw response:\n{raw}\n")
+        llm_cache.put(key, raw)
         return parse_ai_response(raw, article)
 
+    except Cancelled:
+        raise
     except Exception as e:
         print(f"[AI] Groq error: {e}")
         return {
@@ -67,6 +107,120 @@ def generate_tweet(article: dict) -> dict:
         }
 
 
+# ── Streaming generation ──────────────────────────────────────────
+REWRITE_PROMPT = """
+Rewrite this tweet so it is at most {limit} characters long.
+Keep the emoji label, the key facts and at most 2 hashtags. Do NOT include a URL.
+Reply with the rewritten tweet only, on a single line.
+
+TWEET: {text}
+"""
+
+
+def tweet_limit(field: str) -> int:
+    """Weighted length budget for a field; TWEET1 also carries the link."""
+    if field == "TWEET1":
+        return MAX_WEIGHTED_LENGTH - URL_WEIGHT - 2  # "\n\n" + link
+    return MAX_WEIGHTED_LENGTH
+
+
+def regenerate_tweet(field: str, text: str) -> str:
+    """Ask the model for a shorter version of one tweet; truncate as a last resort."""
+    limit = tweet_limit(field)
+    try:
+        response = client.chat.completions.create(
+            model=MODEL,
+            messages=[{"role": "user", "content": REWRITE_PROMPT.format(limit=limit - 10, text=text)}],
+            max_tokens=150,
+            temperature=TEMPERATURE,
+        )
+        rewritten = response.choices[0].message.content.strip().splitlines()[0].strip()
+        if rewritten.startswith(f"{field}:"):
+            rewritten = rewritten[len(field) + 1:].strip()
+        if 0 < weighted_length(rewritten) <= limit:
+            print(f"[AI] Regenerated {field} to fit")
+            return rewritten
+    except Exception as e:
+        print(f"[AI] Regeneration of {field} failed: {e}")
+    return truncate_to_weight(text, limit)
+
+
+def generate_streaming(prompt: str, article: dict, checkpoint=None) -> str:
+    """
+    Stream the completion through StreamingTweetParser. Each tweet is
+    length-checked the moment its line completes; an over-length one is
+    rewritten in the background while the rest keeps streaming, and the
+    stream is closed as soon as TWEET4 is done.
+    Returns the response text with any rewrites applied.
+    """
+    start = time.monotonic()
+    parser = StreamingTweetParser()
+    fixes = {}
+
+    stream = client.chat.completions.create(
+        model=MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        max_tokens=MAX_TOKENS,
+        temperature=TEMPERATURE,
+        stream=True,
+    )
+    with ThreadPoolExecutor(max_workers=2) as pool:
+
+        def check(events):
+            for field, value in events:
+                if checkpoint is not None and field.startswith("TWEET"):
+                    checkpoint()
+                if field == "TWEET1":
+                    print(f"[AI] TWEET1 ready after {time.monotonic() - start:.2f}s")
+                if field.startswith("TWEET") and weighted_length(value) > tweet_limit(field):
+                    print(f"[AI] {field} over the limit, regenerating")
+                    fixes[field] = pool.submit(regenerate_tweet, field, value)
+
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                check(parser.feed(chunk.choices[0].delta.content or ""))
+                if parser.done:
+                    print("[AI] TWEET4 complete, stopping stream early")
+                    break
+        finally:
+            stream.close()
+        check(parser.close())
+
+        fields = dict(parser.fields)
+        for field, future in fixes.items():
+            fields[field] = future.result()
+
+    print(f"[AI] Streamed generation took {time.monotonic() - start:.2f}s")
+    return to_raw(fields)
+
+
+def generate_tweets(articles: list, max_workers: int = LLM_MAX_CONCURRENCY,
+                    out_queue: queue.Queue | None = None) -> list:
+    """
+    Generate threads for several articles at once.
+    Cache hits are returned without a network call; misses run with
+    bounded concurrency so the batch takes about one round-trip.
+    If `out_queue` is given, each (article, tweet_data) pair is put on it
+    as soon as it is ready. Returns tweet_data dicts in input order.
+    """
+    results = [None] * len(articles)
+    if not articles:
+        return results
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(generate_tweet, a): i for i, a in enumerate(articles)}
+        for future in as_completed(futures):
+            i = futures[future]
+            results[i] = future.result()
+            if out_queue is not None:
+                out_queue.put((articles[i], results[i]))
+
+    llm_cache.print_cache_stats()
+    return results
+
+
 def parse_ai_response(raw: str, article: dict) -> dict:
     result = {"label": "🔥 JUST IN", "tweets": []}
 
@@ -0,0 +1,193 @@
+# bot/browser_profile.py
+import json
+import os
+import time
+from collections import Counter
+from urllib.parse import urlparse
+from dotenv import load_dotenv
+
+from bot import metrics
+
+load_dotenv()
+
+# ── Chrome launch profile and resource policy ─────────────────────
+# The login and compose flows only need x.com's HTML, its JS bundles and
+# its API calls. Images, fonts, video and telemetry are blocked through
+# CDP before they are requested, and the "lean" profile launches Chrome
+# with a smaller viewport, fewer renderer processes and background
+# services off. BROWSER_PROFILE=full restores the old behaviour, which is
+# also the baseline the stats below are compared against.
+BROWSER_PROFILE = os.environ.get("BROWSER_PROFILE", "lean")
+
+FULL_WINDOW_SIZE = "1920,1080"
+LEAN_WINDOW_SIZE = "1280,900"  # still wide enough for the desktop layout
+LEAN_FLAGS = [
+    "--renderer-process-limit=2",
+    "--disable-site-isolation-trials",  # one renderer per tab instead of per site
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-features=Translate,MediaRouter,OptimizationHints,AutofillServerCommunication",
+    "--metrics-recording-only",
+    "--mute-audio",
+    "--no-first-run",
+]
+
+# Network.setBlockedURLs takes wildcard patterns, not an allowlist, so the
+# policy is "block these classes"; ALLOWED_HOSTS is what the flows need
+# and anything else that still loads is reported so the list can grow.
+# Uploads go to upload.x.com from a local file and are not affected.
+BLOCKED_URL_PATTERNS = [
+    # images (the compose preview is a local blob: URL)
+    "*pbs.twimg.com/*", "*abs-0.twimg.com/emoji/*",
+    "*.jpg*", "*.jpeg*", "*.png*", "*.gif*", "*.webp*", "*format=jpg*", "*format=webp*",
+    # fonts
+    "*.woff*", "*.ttf*", "*.otf*",
+    # video
+    "*video.twimg.com/*", "*.mp4*", "*.m3u8*",
+    # telemetry and ads
+    "*/i/jot*", "*/1.1/jot/*", "*/i/adsct*", "*ads-twitter.com/*", "*analytics.twitter.com/*",
+    "*google-analytics.com/*", "*googletagmanager.com/*", "*doubleclick.net/*",
+]
+ALLOWED_HOSTS = (
+    "x.com", "twitter.com", "abs.twimg.com", "api.x.com", "api.twitter.com",
+    "upload.x.com", "upload.twitter.com",
+    urlparse(os.environ.get("X_BASE_URL", "https://x.com")).hostname,
+)
+
+RESOURCE_STATS = {
+    "requests": 0,
+    "blocked": Counter(),       # resource type -> requests blocked by the policy
+    "other_hosts": Counter(),   # loaded from outside ALLOWED_HOSTS
+    "page_loads": {},           # path -> {"count", "total_ms", "max_ms"}
+    "peak_chrome_mb": 0.0,
+}
+
+
+def lean() -> bool:
+    return BROWSER_PROFILE != "full"
+
+
+def configure_options(options):
+    """Apply the launch profile and enable the network log the stats are read from."""
+    options.add_argument(f"--window-size={LEAN_WINDOW_SIZE if lean() else FULL_WINDOW_SIZE}")
+    if lean():
+        for flag in LEAN_FLAGS:
+            options.add_argument(flag)
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+
+
+def apply_resource_policy(driver):
+    """Install the URL blocklist on a fresh driver (no-op for the full profile)."""
+    if not lean():
+        return
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+
+
+def _allowed(host: str) -> bool:
+    return any(host == h or host.endswith("." + h) for h in ALLOWED_HOSTS)
+
+
+def collect_network_log(driver):
+    """Drain Chrome's performance log into RESOURCE_STATS."""
+    try:
+        entries = driver.get_log("performance")
+    except Exception:
+        return
+    for entry in entries:
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, ValueError):
+            continue
+        params = message.get("params", {})
+        if message.get("method") == "Network.requestWillBeSent":
+            RESOURCE_STATS["requests"] += 1
+            url = urlparse(params.get("request", {}).get("url", ""))
+            if url.scheme in ("http", "https") and not _allowed(url.hostname or ""):
+                RESOURCE_STATS["other_hosts"][url.hostname] += 1
+        elif message.get("method") == "Network.loadingFailed" and params.get("blockedReason") == "inspector":
+            kind = params.get("type", "Other").lower()
+            RESOURCE_STATS["blocked"][kind] += 1
+            metrics.incr("browser_blocked", type=kind)
+
+
+def chrome_memory_mb(driver) -> float:
+    """
+    Memory of chromedriver and every Chrome process under it, from /proc.
+    Uses PSS where available so pages shared between processes count once.
+    Returns 0.0 where /proc isn't available.
+    """
+    try:
+        root = driver.service.process.pid
+        children = {}
+        for pid in filter(str.isdigit, os.listdir("/proc")):
+            try:
+                with open(f"/proc/{pid}/stat") as f:
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(ppid, []).append(int(pid))
+    except (AttributeError, OSError):
+        return 0.0
+
+    total_kb = 0
+    stack = [root]
+    while stack:
+        pid = stack.pop()
+        stack.extend(children.get(pid, []))
+        total_kb += _process_kb(pid)
+    return total_kb / 1024
+
+
+def _process_kb(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def load(driver, url: str):
+    """driver.get(url), recording how long the page took and sampling Chrome's memory."""
+    start = time.monotonic()
+    driver.get(url)
+    elapsed_ms = (time.monotonic() - start) * 1000
+    path = urlparse(url).path or "/"
+    stats = RESOURCE_STATS["page_loads"].setdefault(path, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+    stats["count"] += 1
+    stats["total_ms"] += elapsed_ms
+    stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+    sample(driver)
+
+
+def sample(driver):
+    """Update peak memory and drain the network log."""
+    RESOURCE_STATS["peak_chrome_mb"] = max(RESOURCE_STATS["peak_chrome_mb"], chrome_memory_mb(driver))
+    collect_network_log(driver)
+
+
+def print_report(driver=None):
+    """Page-load times, blocked requests and peak memory so far (sampling `driver` first)."""
+    if driver is not None:
+        sample(driver)
+    stats = RESOURCE_STATS
+    blocked = sum(stats["blocked"].values())
+    print(f"\n[BROWSER] Profile: {BROWSER_PROFILE}, peak Chrome memory {stats['peak_chrome_mb']:.0f} MB")
+    for path, load_stats in stats["page_loads"].items():
+        print(f"  {path:<28} ×{load_stats['count']:<3} avg {load_stats['total_ms'] / load_stats['count']:7.0f}ms"
+              f"  max {load_stats['max_ms']:7.0f}ms")
+    kinds = ", ".join(f"{k}={n}" for k, n in stats["blocked"].most_common())
+    print(f"  blocked {blocked} of {stats['requests']} requests" + (f" ({kinds})" if kinds else ""))
+    if stats["other_hosts"]:
+        hosts = ", ".join(f"{h}×{n}" for h, n in stats["other_hosts"].most_common(5))
+        print(f"  loaded from outside the allowlist: {hosts}")
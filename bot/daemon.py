@@ -0,0 +1,298 @@
+# bot/daemon.py
+import json
+import os
+import signal
+import threading
+import time
+
+from bot import http_client, metrics, page_cache, waits
+from bot.ai_writer import generate_tweets
+from bot.fetcher import fetch_latest_articles, is_recent, mark_posted
+from bot.image_extractor import get_article_image
+from bot.poster import open_session, post_tweet_thread, session_is_valid
+from bot.ranker import rank_articles, log_ranking
+from bot.run_journal import RunJournal
+from bot.similarity import StoryIndex
+
+# ── Long-running daemon ───────────────────────────────────────────
+# Instead of paying interpreter start, imports, Chrome launch and login
+# for a single post, the daemon stays up: it polls feeds on a schedule,
+# keeps a persistent priority queue of ranked threads that are already
+# generated (with images), and drains it under a posting-rate policy
+# using one warm browser and the shared HTTP pool.
+QUEUE_PATH = "data/post_queue.json"
+JOURNAL_PATH = "data/daemon_journal.json"  # posting progress of the thread in flight
+POLL_INTERVAL_MINUTES = float(os.environ.get("POLL_INTERVAL_MINUTES", 30))
+MIN_POST_SPACING_MINUTES = float(os.environ.get("MIN_POST_SPACING_MINUTES", 180))
+DAILY_POST_CAP = int(os.environ.get("DAILY_POST_CAP", 4))
+QUEUE_MAX = 20            # keep only the best N prepared threads
+CANDIDATES_PER_POLL = 5   # top-ranked new articles to prepare each poll
+MAX_POST_ATTEMPTS = 3
+POST_FAILURE_BACKOFF_MINUTES = 5  # wait before retrying after a failed post
+DAY_SECONDS = 24 * 3600
+
+
+class PostQueue:
+    """
+    Prepared threads waiting to be posted, plus the posting history the
+    rate policy needs. Every change is checkpointed to QUEUE_PATH so a
+    restarted daemon resumes where it left off.
+    """
+
+    def __init__(self, path: str = QUEUE_PATH):
+        self.path = path
+        self.items = []          # {"article", "tweets", "image_path", "attempts", "queued_at"}
+        self.posted_at = []      # timestamps of successful posts (last 24h)
+        self.last_poll = 0.0
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[DAEMON] Ignoring unreadable queue checkpoint: {e}")
+            return
+        self.items = state.get("items", [])
+        self.posted_at = state.get("posted_at", [])
+        self.last_poll = state.get("last_poll", 0.0)
+        print(f"[DAEMON] Resumed {len(self.items)} queued threads from {self.path}")
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "items": self.items,
+                "posted_at": self.posted_at,
+                "last_poll": self.last_poll,
+            }, f)
+        os.replace(tmp_path, self.path)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def ids(self) -> set:
+        return {item["article"]["id"] for item in self.items}
+
+    def push(self, article: dict, tweets: list, image_path: str | None):
+        article = {k: v for k, v in article.items() if not k.startswith("_")}
+        self.items.append({
+            "article": article,
+            "tweets": tweets,
+            "image_path": image_path,
+            "attempts": 0,
+            "queued_at": time.time(),
+        })
+
+    def prune(self):
+        """Drop threads whose article has aged out, then keep the best QUEUE_MAX."""
+        before = len(self.items)
+        self.items = [i for i in self.items if is_recent(i["article"])]
+        self.reprioritise()
+        del self.items[QUEUE_MAX:]
+        if len(self.items) != before:
+            print(f"[DAEMON] Pruned queue {before} → {len(self.items)}")
+
+    def reprioritise(self):
+        """Re-score queued articles now, so recency decay is current; best first."""
+        if not self.items:
+            return
+        by_id = {i["article"]["id"]: i for i in self.items}
+        ranked = rank_articles([i["article"] for i in self.items], top_k=len(self.items))
+        self.items = [by_id[a["id"]] for a in ranked]
+
+    def pop(self, prefer_id: str | None = None) -> dict | None:
+        """Best item, or the one with `prefer_id` (a thread half-posted before a crash)."""
+        for i, item in enumerate(self.items):
+            if item["article"]["id"] == prefer_id:
+                return self.items.pop(i)
+        self.reprioritise()
+        return self.items.pop(0) if self.items else None
+
+    # ── Rate policy ───────────────────────────────────────────────
+    def next_post_time(self, now: float) -> float:
+        """Earliest time the rate policy allows another post."""
+        self.posted_at = [t for t in self.posted_at if now - t < DAY_SECONDS]
+        earliest = now
+        if self.posted_at:
+            earliest = max(earliest, self.posted_at[-1] + MIN_POST_SPACING_MINUTES * 60)
+        if len(self.posted_at) >= DAILY_POST_CAP:
+            earliest = max(earliest, self.posted_at[-DAILY_POST_CAP] + DAY_SECONDS)
+        return earliest
+
+    def record_post(self, now: float):
+        self.posted_at.append(now)
+
+
+class Daemon:
+    def __init__(self, queue: PostQueue | None = None):
+        self.queue = queue or PostQueue()
+        self.driver = None
+        self.retry_after = 0.0   # no post attempts before this time (after a failure)
+        self._stop = threading.Event()
+
+    def stop(self, *_):
+        print("[DAEMON] Stop requested, finishing current step")
+        self._stop.set()
+
+    # ── Feed polling ──────────────────────────────────────────────
+    @metrics.traced("daemon.poll")
+    def poll(self):
+        """Fetch, rank and prepare the best new articles into the queue."""
+        print("\n[DAEMON] Polling feeds...")
+        queued = self.queue.ids()
+        articles = [a for a in fetch_latest_articles() if a["id"] not in queued]
+        self.queue.last_poll = time.time()
+        if not articles:
+            print("[DAEMON] Nothing new")
+            self.queue.save()
+            return
+
+        ranked = rank_articles(articles, top_k=CANDIDATES_PER_POLL)
+        log_ranking(ranked)
+        # One fetch per page feeds both enrichment and image extraction
+        page_cache.prefetch([a["link"] for a in ranked], text=True)
+        for article in ranked:
+            page_cache.enrich_article(article)
+        thread_data = generate_tweets(ranked)
+        for article, tweet_data in zip(ranked, thread_data):
+            if self._stop.is_set():
+                break
+            self.queue.push(article, tweet_data["tweets"], get_article_image(article["link"]))
+        self.queue.prune()
+        self.queue.save()
+        http_client.print_pool_stats()
+        page_cache.print_cache_stats()
+        print(f"[DAEMON] Queue holds {len(self.queue)} prepared threads")
+
+    # ── Posting ───────────────────────────────────────────────────
+    def _warm_driver(self):
+        """Return a logged-in driver, relaunching only if the warm one is dead or logged out."""
+        if self.driver is not None:
+            try:
+                if session_is_valid(self.driver):
+                    return self.driver
+            except Exception as e:
+                print(f"[DAEMON] Browser unresponsive ({e}), relaunching")
+            self._quit_driver()
+        self.driver = open_session()
+        return self.driver
+
+    def _quit_driver(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+
+    @metrics.traced("daemon.post")
+    def post_next(self):
+        journal = RunJournal(JOURNAL_PATH)
+        item = self.queue.pop(journal.article["id"] if journal.active else None)
+        if item is None:
+            return
+        try:
+            success = self._post(item, journal)
+        except Exception as e:
+            print(f"[DAEMON] Post raised: {e}")
+            success = False
+        if success is None:
+            pass  # skipped
+        elif success:
+            mark_posted(item["article"])
+            journal.clear()
+            self.queue.record_post(time.time())
+            print("[DAEMON] ✅ Posted")
+        else:
+            self._post_failed(item, journal)
+        self.queue.save()
+
+    def _post(self, item: dict, journal: RunJournal) -> bool | None:
+        """Post one queued thread; None if it was skipped as a repeat story."""
+        article = item["article"]
+        if not journal.active or journal.article["id"] != article["id"]:
+            journal.start(article)
+            journal.record("thread", {"tweets": item["tweets"]})
+        elif journal.posted():
+            print(f"[DAEMON] Resuming half-posted thread ({len(journal.posted())} tweets live)")
+        repeat = StoryIndex().find_repeat(article)
+        if repeat and not journal.posted():
+            print(f"[DAEMON] Skipping '{article['title']}' — same story as {repeat}")
+            journal.clear()
+            return None
+
+        print(f"\n[DAEMON] Posting: {article['title']}")
+        image_path = item["image_path"]
+        if image_path and not os.path.exists(image_path):
+            image_path = None  # evicted from the image cache since it was queued
+        try:
+            driver = self._warm_driver()
+        except Exception as e:
+            print(f"[DAEMON] Could not open a session: {e}")
+            return False
+        success = post_tweet_thread(item["tweets"], image_path=image_path,
+                                    driver=driver, keep_open=True, journal=journal)
+        waits.RUN_TIMINGS.clear()
+        return success
+
+    def _post_failed(self, item: dict, journal: RunJournal):
+        """Requeue a failed thread (or give up on it) and back off before the next post."""
+        self._quit_driver()  # don't trust browser state after a failure
+        self.retry_after = time.time() + POST_FAILURE_BACKOFF_MINUTES * 60
+        item["attempts"] += 1
+        if item["attempts"] < MAX_POST_ATTEMPTS:
+            self.queue.items.append(item)
+            print(f"[DAEMON] ❌ Post failed (attempt {item['attempts']}), requeued; "
+                  f"retrying in {POST_FAILURE_BACKOFF_MINUTES:g}m")
+        else:
+            print(f"[DAEMON] ❌ Giving up on '{item['article']['title']}'")
+            if journal.posted():
+                mark_posted(item["article"])  # part of the thread is live, never pick it again
+            journal.clear()
+
+    # ── Main loop ─────────────────────────────────────────────────
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        print(f"[DAEMON] Started: poll every {POLL_INTERVAL_MINUTES:g}m, "
+              f"min spacing {MIN_POST_SPACING_MINUTES:g}m, cap {DAILY_POST_CAP}/day")
+        try:
+            while not self._stop.is_set():
+                now = time.time()
+                next_poll = self.queue.last_poll + POLL_INTERVAL_MINUTES * 60
+                if now >= next_poll:
+                    try:
+                        self.poll()
+                    except Exception as e:
+                        print(f"[DAEMON] Poll failed: {e}")
+                        self.queue.last_poll = now
+                    metrics.flush()
+                    continue
+
+                next_post = max(self.queue.next_post_time(now), self.retry_after)
+                if self.queue and now >= next_post:
+                    try:
+                        self.post_next()
+                    except Exception as e:
+                        print(f"[DAEMON] Post failed: {e}")
+                        self._quit_driver()
+                        self.retry_after = now + POST_FAILURE_BACKOFF_MINUTES * 60
+                    metrics.flush()
+                    continue
+
+                wake = next_poll if not self.queue else min(next_poll, next_post)
+                self._stop.wait(max(1.0, wake - now))
+        finally:
+            self.queue.save()
+            self._quit_driver()
+            metrics.flush()
+            waits.save_history()
+            print("[DAEMON] Stopped")
+
+
+def run():
+    Daemon().run()
@@ -0,0 +1,120 @@
+# bot/debug_capture.py
+import base64
+import json
+import os
+import re
+import time
+from collections import deque
+from dotenv import load_dotenv
+
+from bot import metrics
+
+load_dotenv()
+
+# ── Browser debug capture ─────────────────────────────────────────
+# Steps record snapshots into a small in-memory ring; nothing touches the
+# disk unless a step fails, at which point the failing page is captured
+# in full and the whole ring is written out for the workflow to upload.
+#   off         record nothing
+#   on-failure  steps leave cheap breadcrumbs (URL, title); the screenshot
+#               and DOM are only taken of the page that failed (default)
+#   always      every step keeps a JPEG screenshot and truncated DOM too
+DEBUG_CAPTURE = os.environ.get("DEBUG_CAPTURE", "on-failure")
+DEBUG_DIR = os.environ.get("DEBUG_CAPTURE_DIR", "/tmp/bot-debug")
+RING_SIZE = 8
+DOM_CHARS = 50_000
+JPEG_QUALITY = 50
+
+LEVELS = ("off", "on-failure", "always")
+_ring = deque(maxlen=RING_SIZE)
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+
+
+def _slug(step: str) -> str:
+    return _SLUG_RE.sub("_", step.lower()).strip("_")[:40]
+
+
+def _page_state(driver, dom: bool) -> dict:
+    """URL and title (plus the DOM, cut in the browser) in a single round trip."""
+    script = "return [location.href, document.title, arguments[0] ? " \
+             "document.documentElement.outerHTML.slice(0, arguments[0]) : null];"
+    try:
+        url, title, html = driver.execute_script(script, DOM_CHARS if dom else 0)
+        return {"url": url, "title": title, "dom": html}
+    except Exception as e:
+        return {"url": None, "title": None, "dom": None, "error": f"page state: {e}"}
+
+
+def _screenshot(driver) -> tuple:
+    """(image bytes, extension); JPEG through CDP where possible, it's several times smaller."""
+    try:
+        shot = driver.execute_cdp_cmd(
+            "Page.captureScreenshot", {"format": "jpeg", "quality": JPEG_QUALITY}
+        )
+        return base64.b64decode(shot["data"]), "jpg"
+    except Exception:
+        return driver.get_screenshot_as_png(), "png"
+
+
+def _capture(driver, step: str, full: bool, error=None) -> dict:
+    snap = {"step": step, "at": time.time(), **_page_state(driver, dom=full)}
+    if error is not None:
+        snap["failure"] = str(error)[:500]
+    if full:
+        try:
+            snap["image"], snap["image_ext"] = _screenshot(driver)
+        except Exception as e:
+            snap["error"] = f"screenshot: {e}"
+    _ring.append(snap)
+    return snap
+
+
+def snapshot(driver, step: str):
+    """Record a step that went fine; kept in memory only."""
+    if DEBUG_CAPTURE not in LEVELS[1:]:
+        return
+    _capture(driver, step, full=DEBUG_CAPTURE == "always")
+    metrics.incr("debug_capture", kind="snapshot")
+
+
+def failure(driver, step: str, error=None) -> str | None:
+    """Capture the failing page in full and write the ring to disk; returns the directory."""
+    if DEBUG_CAPTURE not in LEVELS[1:]:
+        return None
+    _capture(driver, step, full=True, error=error)
+    return dump(step)
+
+
+def dump(reason: str) -> str | None:
+    """Write the ring (oldest first) to DEBUG_DIR/<time>-<reason>/ and empty it."""
+    if not _ring:
+        return None
+    out_dir = os.path.join(DEBUG_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{_slug(reason)}")
+    os.makedirs(out_dir, exist_ok=True)
+    index = []
+    for i, snap in enumerate(_ring, 1):
+        base = os.path.join(out_dir, f"{i:02d}-{_slug(snap['step'])}")
+        entry = {k: v for k, v in snap.items() if k not in ("image", "image_ext", "dom")}
+        if snap.get("image"):
+            entry["screenshot"] = os.path.basename(f"{base}.{snap['image_ext']}")
+            with open(f"{base}.{snap['image_ext']}", "wb") as f:
+                f.write(snap["image"])
+        if snap.get("dom"):
+            entry["dom"] = os.path.basename(f"{base}.html")
+            with open(f"{base}.html", "w", encoding="utf-8") as f:
+                f.write(snap["dom"])
+        index.append(entry)
+    with open(os.path.join(out_dir, "index.json"), "w") as f:
+        json.dump(index, f, indent=2)
+    _ring.clear()
+    metrics.incr("debug_capture", kind="dump")
+    print(f"[DEBUG] Wrote {len(index)} snapshots to {out_dir}")
+    return out_dir
+
+
+def finish():
+    """End of a browser session: with `always`, keep its snapshots even though nothing failed."""
+    if DEBUG_CAPTURE == "always":
+        dump("session")
+    else:
+        _ring.clear()
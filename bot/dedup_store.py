@@ -0,0 +1,133 @@
+# bot/dedup_store.py
+import json
+import os
+import time
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# ── Posted-article dedup store ────────────────────────────────────
+# Append-only JSON-lines log on disk + in-memory dict for O(1) lookups.
+# Each line is {"id": <normalised url>, "ts": <unix time posted>}.
+POSTED_LOG_PATH = "data/posted_ids.jsonl"
+LEGACY_POSTED_IDS_PATH = "data/posted_ids.json"  # old list format, migrated on first load
+POSTED_RETENTION_DAYS = 90
+COMPACT_RATIO = 0.25  # rewrite the log once this share of lines has expired
+
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "ref_src"}
+
+
+def normalise_id(article_id: str) -> str:
+    """
+    Canonicalise an article URL so trivially different links dedup together:
+    lowercase scheme/host, drop utm_* and click-tracking params, the
+    fragment and any trailing slash. Non-URL IDs are only stripped.
+    """
+    article_id = (article_id or "").strip()
+    parts = urlsplit(article_id)
+    if not parts.scheme or not parts.netloc:
+        return article_id
+
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    ]
+    path = parts.path.rstrip("/")
+    return urlunsplit((
+        parts.scheme.lower(),
+        parts.netloc.lower(),
+        path,
+        urlencode(query),
+        "",
+    ))
+
+
+class PostedStore:
+    """Set-like store of posted article IDs with time-based retention."""
+
+    def __init__(self, path: str = POSTED_LOG_PATH,
+                 retention_days: float = POSTED_RETENTION_DAYS):
+        self.path = path
+        self.retention = retention_days * 86400
+        self._ids = {}  # normalised id -> posted timestamp
+        self._load()
+
+    def __contains__(self, article_id: str) -> bool:
+        return normalise_id(article_id) in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, article_id: str, ts: float | None = None):
+        """Record an article as posted and append it to the log durably."""
+        key = normalise_id(article_id)
+        ts = ts if ts is not None else time.time()
+        self._ids[key] = ts
+        self._append([{"id": key, "ts": ts}])
+
+    # ── Persistence ───────────────────────────────────────────────
+    def _load(self):
+        if not os.path.exists(self.path):
+            self._migrate_legacy()
+            return
+
+        cutoff = time.time() - self.retention
+        lines = expired = 0
+        with open(self.path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                lines += 1
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    # Torn final line from a crash mid-append — skip it
+                    expired += 1
+                    continue
+                if rec["ts"] < cutoff:
+                    expired += 1
+                    continue
+                self._ids[rec["id"]] = rec["ts"]
+
+        if lines and expired / lines >= COMPACT_RATIO:
+            self._compact()
+
+    def _append(self, records: list):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        data = "".join(json.dumps(r) + "\n" for r in records)
+        with open(self.path, "a") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _compact(self):
+        """Rewrite the log with only live entries (atomic replace)."""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            for key, ts in self._ids.items():
+                f.write(json.dumps({"id": key, "ts": ts}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        print(f"[DEDUP] Compacted log to {len(self._ids)} entries")
+
+    def _migrate_legacy(self):
+        """Import IDs from the old posted_ids.json list, if present."""
+        if not os.path.exists(LEGACY_POSTED_IDS_PATH):
+            return
+        try:
+            with open(LEGACY_POSTED_IDS_PATH, "r") as f:
+                legacy = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[DEDUP] Could not read {LEGACY_POSTED_IDS_PATH}: {e}")
+            return
+
+        now = time.time()
+        records = []
+        for article_id in legacy:
+            key = normalise_id(article_id)
+            if key not in self._ids:
+                self._ids[key] = now
+                records.append({"id": key, "ts": now})
+        if records:
+            self._append(records)
+        print(f"[DEDUP] Migrated {len(records)} IDs from {LEGACY_POSTED_IDS_PATH}")
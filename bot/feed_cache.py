@@ -0,0 +1,102 @@
+# bot/feed_cache.py
+import json
+import os
+import threading
+import time
+
+from bot import metrics
+
+# ── Persistent conditional-GET cache for RSS_FEEDS ────────────────
+# Stores each feed's ETag / Last-Modified and the articles parsed from
+# its last full download, so a 304 can skip both transfer and parsing.
+FEED_CACHE_PATH = "data/feed_cache.json"
+FEED_CACHE_MAX_STALE_HOURS = 6  # after this, refetch in full even if the server says 304
+FEED_CACHE_EVICT_DAYS = 7       # drop feeds that haven't been requested for this long
+
+CACHE_STATS = {"hits": 0, "misses": 0, "stale": 0, "evicted": 0}
+_stats_lock = threading.Lock()
+
+
+def count(stat: str, n: int = 1):
+    """Thread-safe increment of a CACHE_STATS counter."""
+    with _stats_lock:
+        CACHE_STATS[stat] += n
+    metrics.incr("feed_cache", n, result=stat)
+
+
+def load_feed_cache() -> dict:
+    """Load the feed cache, or an empty one if missing/corrupt."""
+    if not os.path.exists(FEED_CACHE_PATH):
+        return {}
+    try:
+        with open(FEED_CACHE_PATH, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[FEEDCACHE] Ignoring unreadable cache: {e}")
+        return {}
+
+
+def save_feed_cache(cache: dict):
+    """Write the cache atomically so a crash never leaves half a file."""
+    os.makedirs(os.path.dirname(FEED_CACHE_PATH) or ".", exist_ok=True)
+    tmp_path = FEED_CACHE_PATH + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, FEED_CACHE_PATH)
+
+
+def is_stale(entry: dict) -> bool:
+    """True if the cached copy is too old to be revalidated with a 304."""
+    age = time.time() - entry.get("fetched_at", 0)
+    return age > FEED_CACHE_MAX_STALE_HOURS * 3600
+
+
+def conditional_headers(entry: dict | None) -> dict:
+    """Build If-None-Match / If-Modified-Since headers for a cached feed."""
+    if not entry:
+        return {}
+    if is_stale(entry):
+        count("stale")
+        return {}
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def store(cache: dict, feed_url: str, resp, articles: list):
+    """Record a fresh 200 response and its parsed articles."""
+    now = time.time()
+    cache[feed_url] = {
+        "etag": resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+        "fetched_at": now,
+        "checked_at": now,
+        "articles": articles,
+    }
+
+
+def touch(cache: dict, feed_url: str):
+    """Mark a cached feed as revalidated by a 304."""
+    cache[feed_url]["checked_at"] = time.time()
+
+
+def evict(cache: dict, active_urls: list):
+    """Drop feeds no longer configured or not requested for FEED_CACHE_EVICT_DAYS."""
+    cutoff = time.time() - FEED_CACHE_EVICT_DAYS * 86400
+    for url in list(cache):
+        if url not in active_urls or cache[url].get("checked_at", 0) < cutoff:
+            del cache[url]
+            count("evicted")
+
+
+def print_cache_stats():
+    total = CACHE_STATS["hits"] + CACHE_STATS["misses"]
+    ratio = CACHE_STATS["hits"] / total if total else 0.0
+    print(
+        f"[FEEDCACHE] hits={CACHE_STATS['hits']} misses={CACHE_STATS['misses']} "
+        f"stale={CACHE_STATS['stale']} evicted={CACHE_STATS['evicted']} "
+        f"hit_ratio={ratio:.0%}"
+    )
@@ -0,0 +1,203 @@
+# bot/feed_parser.py
+import html
+import re
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from lxml import etree
+
+# ── Streaming RSS/Atom parser ─────────────────────────────────────
+# A pull parser for the feeds we actually consume (RSS 2.0, RSS 1.0/RDF,
+# Atom). Entries become compact article dicts as soon as their closing
+# tag is seen and are then dropped from the tree, so memory stays flat.
+# In date-ordered feeds, reading stops once entries fall past the age
+# cutoff. Anything it can't handle raises FeedParseError and the caller
+# falls back to feedparser.
+CHUNK_SIZE = 16 * 1024
+SUMMARY_CHARS = 500
+SCAN_FACTOR = 4  # first raw HTML window per output char; grows if tags eat more than that
+OLD_ENTRIES_BEFORE_STOP = 3  # consecutive past-cutoff entries in an ordered feed
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+RSS1 = "{http://purl.org/rss/1.0/}"
+CONTENT = "{http://purl.org/rss/1.0/modules/content/}"
+DC = "{http://purl.org/dc/elements/1.1/}"
+
+ENTRY_TAGS = ("item", RSS1 + "item", ATOM + "entry")
+FEED_TAGS = {"channel", RSS1 + "channel", ATOM + "feed"}
+TITLE_TAGS = ("title", RSS1 + "title", ATOM + "title")
+
+# child tag -> field, in order of preference where several map to one field
+FIELD_TAGS = {
+    "title": "title", RSS1 + "title": "title", ATOM + "title": "title",
+    "link": "link", RSS1 + "link": "link",
+    "guid": "id", ATOM + "id": "id",
+    "description": "summary", RSS1 + "description": "summary", ATOM + "summary": "summary",
+    CONTENT + "encoded": "content", ATOM + "content": "content",
+    "pubDate": "published", DC + "date": "published", ATOM + "published": "published",
+    ATOM + "updated": "updated",
+}
+
+P_TAG_RE = re.compile(r"</?p\b[^>]*>", re.IGNORECASE)
+TAG_RE = re.compile(r"<[^<>]*>")  # a literal "<" never swallows the tag after it
+CUT_TAG_RE = re.compile(r"<[^<>]*$")  # a tag cut in half at the end of a scan window
+
+
+class FeedParseError(Exception):
+    pass
+
+
+def _strip_tags(raw: str, cut: bool = False) -> str:
+    text = raw
+    if "<" in text:
+        text = TAG_RE.sub("", P_TAG_RE.sub(" ", text))
+        if cut:
+            text = CUT_TAG_RE.sub("", text)
+    if "&" in text:
+        text = html.unescape(text)
+    return text.strip()
+
+
+def clean_html(raw: str, limit: int) -> str:
+    """
+    First `limit` characters of `raw` with tags stripped and entities
+    decoded. Only a prefix is cleaned, widened until it yields more than
+    `limit` characters of text, so heavy markup can't shorten the result.
+    """
+    window = limit * SCAN_FACTOR
+    while True:
+        text = _strip_tags(raw[:window], cut=window < len(raw))
+        # A tag or entity cut at the window edge only affects the text past `limit`
+        if len(text) > limit + 8 or window >= len(raw):
+            return text[:limit]
+        window *= 4
+
+
+def parse_date(value: str) -> float | None:
+    """RFC 822 (RSS) or ISO 8601 (Atom, dc:date) → UTC timestamp, or None."""
+    value = value.strip()
+    if not value:
+        return None
+    try:
+        if value[4:5] == "-":  # 2024-05-01T...
+            dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        else:
+            dt = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def _text(el) -> str:
+    if len(el):  # Atom type="xhtml": markup as child elements
+        return "".join(el.itertext())
+    return el.text or ""
+
+
+def _entry_fields(entry) -> dict:
+    fields = {}
+    for child in entry:
+        field = FIELD_TAGS.get(child.tag)
+        if field is None or field in fields:
+            continue
+        fields[field] = _text(child)
+    if "link" not in fields:
+        for link in entry.iterfind(ATOM + "link"):
+            if link.get("rel", "alternate") == "alternate" and link.get("href"):
+                fields["link"] = link.get("href")
+                break
+    return fields
+
+
+def _to_article(fields: dict, source: str) -> dict:
+    title = fields.get("title", "").strip() or "No title"
+    if "<" in title or "&" in title:
+        title = clean_html(title, len(title))
+    link = fields.get("link", "").strip() or fields.get("id", "").strip()
+    published = fields.get("published") or fields.get("updated") or ""
+    return {
+        "id": link,
+        "title": title,
+        "link": link,
+        "summary": clean_html(fields.get("summary") or fields.get("content") or "",
+                              SUMMARY_CHARS),
+        "source": source,
+        "published": published.strip() or "Unknown date",
+        "published_ts": parse_date(published),
+    }
+
+
+def parse_feed(data: bytes, cutoff_ts: float | None = None) -> dict:
+    """
+    Parse feed bytes into article dicts (same shape as
+    fetcher.entry_to_article). With `cutoff_ts`, stops once the feed has
+    been newest-first so far and OLD_ENTRIES_BEFORE_STOP entries in a row
+    are older than the cutoff.
+    Returns {"source", "articles", "entries", "stopped_early"}.
+    Raises FeedParseError for malformed XML or documents that aren't feeds.
+    """
+    parser = etree.XMLPullParser(events=("end",), tag=ENTRY_TAGS + TITLE_TAGS,
+                                 no_network=True, resolve_entities=False)
+    source = None
+    articles = []
+    pending = []         # entries seen before the feed title (rare)
+    last_ts = None
+    ordered = True
+    old_run = 0
+    entries = 0
+    stopped_early = False
+
+    try:
+        for offset in range(0, len(data), CHUNK_SIZE):
+            parser.feed(data[offset:offset + CHUNK_SIZE])
+            for _, el in parser.read_events():
+                if el.tag in TITLE_TAGS:
+                    parent = el.getparent()
+                    if source is None and parent is not None and parent.tag in FEED_TAGS:
+                        source = _text(el).strip() or "Unknown Source"
+                    continue
+
+                entries += 1
+                fields = _entry_fields(el)
+                # Free the entry and anything before it; the tree never grows
+                el.clear(keep_tail=True)
+                parent = el.getparent()
+                if parent is not None:
+                    while el.getprevious() is not None:
+                        del parent[0]
+
+                article = _to_article(fields, source or "Unknown Source")
+                (articles if source else pending).append(article)
+
+                ts = article["published_ts"]
+                if ts is not None:
+                    if last_ts is not None and ts > last_ts:
+                        ordered = False
+                    last_ts = ts
+                if cutoff_ts is not None and ts is not None and ts < cutoff_ts:
+                    old_run += 1
+                else:
+                    old_run = 0
+                if ordered and old_run >= OLD_ENTRIES_BEFORE_STOP:
+                    stopped_early = True
+                    break
+            if stopped_early:
+                break
+        if not stopped_early:
+            parser.close()
+    except etree.XMLSyntaxError as e:
+        raise FeedParseError(str(e)) from e
+
+    if not entries and source is None:
+        raise FeedParseError("no feed title or entries found")
+    source = source or "Unknown Source"
+    for article in pending:
+        article["source"] = source
+    return {
+        "source": source,
+        "articles": pending + articles,
+        "entries": entries,
+        "stopped_early": stopped_early,
+    }
@@ -1,9 +1,14 @@
 # bot/fetcher.py
 import feedparser
-import json
-import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeout
 from datetime import datetime, timezone, timedelta
 
+from bot import feed_cache, feed_parser, http_client, metrics, trends
+from bot.dedup_store import PostedStore
+from bot.similarity import StoryIndex, cluster_articles, remember_posted_story
+
 # ── RSS feeds (all free, no auth needed) ──────────────────────────
 RSS_FEEDS = [
     "https://techcrunch.com/feed/",
@@ -14,92 +19,267 @@ RSS_FEEDS = [
     "https://feeds.feedburner.com/venturebeat/SZYF", # VentureBeat
 ]
 
-POSTED_IDS_PATH = "data/posted_ids.json"
 MAX_AGE_HOURS = 24  # only fetch news from last 24 hours
 
+# ── Concurrent fetch settings ─────────────────────────────────────
+FEED_TIMEOUT_SECONDS = 10    # per-feed connect/read timeout
+FETCH_DEADLINE_SECONDS = 20  # overall budget for the whole fetch stage
+MAX_FEED_WORKERS = 8
+
 
-def load_posted_ids():
-    """Load list of already-posted article IDs."""
-    if not os.path.exists(POSTED_IDS_PATH):
-        return []
-    with open(POSTED_IDS_PATH, "r") as f:
-        return json.load(f)
+def load_posted_ids() -> PostedStore:
+    """Load the store of already-posted article IDs (supports `id in store`)."""
+    return PostedStore()
 
 
-def save_posted_ids(ids: list):
-    """Save updated posted IDs list back to file."""
-    # Keep only last 500 to prevent file bloat
-    ids = ids[-500:]
-    with open(POSTED_IDS_PATH, "w") as f:
-        json.dump(ids, f, indent=2)
+def mark_posted(article: dict):
+    """Durably record an article (and its story fingerprint) as posted."""
+    store = PostedStore()
+    store.add(article["id"])
+    # The page's canonical URL too, so the same story under another link is skipped
+    if article.get("canonical") and article["canonical"] not in store:
+        store.add(article["canonical"])
+    remember_posted_story(article)
 
 
-def is_recent(entry) -> bool:
+def is_recent(article: dict) -> bool:
     """Check if article was published within last MAX_AGE_HOURS."""
-    if not hasattr(entry, "published_parsed") or entry.published_parsed is None:
+    if article.get("published_ts") is None:
         return True  # if no date, include it anyway
-    pub_time = datetime(*entry.published_parsed[:6], tzinfo=timezone.utc)
     cutoff = datetime.now(timezone.utc) - timedelta(hours=MAX_AGE_HOURS)
-    return pub_time >= cutoff
+    return article["published_ts"] >= cutoff.timestamp()
+
+
+def entry_to_article(entry, source: str) -> dict:
+    """Turn a feedparser entry into the compact article dict used downstream."""
+    # Build a unique ID from the article link
+    article_id = entry.get("link", entry.get("id", ""))
+
+    summary = feed_parser.clean_html(entry.get("summary", ""), feed_parser.SUMMARY_CHARS)
 
+    published_ts = None
+    if getattr(entry, "published_parsed", None) is not None:
+        published_ts = datetime(
+            *entry.published_parsed[:6], tzinfo=timezone.utc
+        ).timestamp()
 
-def fetch_latest_articles(max_articles: int = 5) -> list:
+    return {
+        "id": article_id,
+        "title": entry.get("title", "No title"),
+        "link": article_id,
+        "summary": summary,
+        "source": source,
+        "published": entry.get("published", "Unknown date"),
+        "published_ts": published_ts,
+    }
+
+
+def parse_feed_bytes(feed_url: str, data: bytes) -> list:
     """
-    Fetch latest unposted articles from all RSS feeds.
-    Returns a list of article dicts.
+    Parse with the streaming parser, which stops at the age cutoff in
+    date-ordered feeds; fall back to feedparser for anything it rejects.
+    """
+    cutoff = (datetime.now(timezone.utc) - timedelta(hours=MAX_AGE_HOURS)).timestamp()
+    with metrics.span("feed_parser.parse", feed=feed_url, bytes=len(data)) as span:
+        try:
+            parsed = feed_parser.parse_feed(data, cutoff_ts=cutoff)
+        except feed_parser.FeedParseError as e:
+            print(f"[FETCHER] Streaming parser failed for {feed_url} ({e}), using feedparser")
+        else:
+            span.set(entries=parsed["entries"], stopped_early=parsed["stopped_early"])
+            return parsed["articles"]
+
+    with metrics.span("feedparser.parse", feed=feed_url, bytes=len(data)):
+        feed = feedparser.parse(data)
+    source = feed.feed.get("title", "Unknown Source")
+    return [entry_to_article(e, source) for e in feed.entries]
+
+
+def fetch_feed(feed_url: str, cache: dict | None = None) -> dict:
+    """
+    Download and parse a single feed.
+    With a feed cache, sends a conditional GET and reuses the cached
+    articles on 304 without parsing anything.
+    Returns a result dict with the parsed articles and timing info;
+    never raises, errors are reported in result["error"].
+    """
+    start = time.monotonic()
+    result = {
+        "url": feed_url,
+        "status": "error",
+        "latency": 0.0,
+        "bytes": 0,
+        "articles": [],
+        "error": None,
+    }
+    cached = cache.get(feed_url) if cache is not None else None
+    try:
+        headers = feed_cache.conditional_headers(cached)
+        resp = http_client.get(feed_url, headers=headers,
+                               timeout=(http_client.CONNECT_TIMEOUT, FEED_TIMEOUT_SECONDS))
+
+        if resp.status_code == 304 and cached:
+            feed_cache.count("hits")
+            feed_cache.touch(cache, feed_url)
+            result["articles"] = cached["articles"]
+            result["status"] = "cached"
+        else:
+            resp.raise_for_status()
+            result["bytes"] = len(resp.content)
+            metrics.incr("bytes", result["bytes"], kind="feed")
+
+            # Parse as soon as this feed's bytes are in, while others still download
+            result["articles"] = parse_feed_bytes(feed_url, resp.content)
+            result["status"] = "ok"
+            if cache is not None:
+                feed_cache.count("misses")
+                feed_cache.store(cache, feed_url, resp, result["articles"])
+    except Exception as e:
+        result["error"] = str(e)
+    result["latency"] = time.monotonic() - start
+    return result
+
+
+def fetch_all_feeds(feed_urls: list = None, deadline: float = FETCH_DEADLINE_SECONDS,
+                    cache: dict | None = None) -> list:
+    """
+    Fetch every feed in parallel. Feeds that have not finished within
+    `deadline` seconds are abandoned and reported with status "timeout".
+    Returns one result dict per feed, in the same order as `feed_urls`.
+    """
+    feed_urls = feed_urls if feed_urls is not None else RSS_FEEDS
+    start = time.monotonic()
+    results = {}
+
+    pool = ThreadPoolExecutor(max_workers=min(MAX_FEED_WORKERS, len(feed_urls) or 1))
+    futures = {pool.submit(fetch_feed, url, cache): url for url in feed_urls}
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            result = future.result()
+            results[result["url"]] = result
+            print(f"[FETCHER] {result['status']:>7} {result['latency']:.2f}s  {result['url']}")
+    except FuturesTimeout:
+        print(f"[FETCHER] Fetch deadline of {deadline}s reached")
+    finally:
+        # Don't block on stragglers; their threads finish in the background
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    elapsed = time.monotonic() - start
+    for url in feed_urls:
+        if url not in results:
+            results[url] = {
+                "url": url,
+                "status": "timeout",
+                "latency": elapsed,
+                "bytes": 0,
+                "articles": [],
+                "error": f"no response within {deadline}s",
+            }
+    return [results[url] for url in feed_urls]
+
+
+def print_fetch_report(report: list):
+    """Log per-feed latency, size and entry counts."""
+    print("[FETCHER] Per-feed report:")
+    for r in report:
+        line = (
+            f"  {r['status']:>7}  {r['latency']:6.2f}s  {r['bytes']:>8} B  "
+            f"{r['entries']:>3} entries  {r['url']}"
+        )
+        if r["error"]:
+            line += f"  ({r['error']})"
+        print(line)
+
+
+def fetch_articles_with_report(max_articles: int | None = None) -> tuple:
+    """
+    Fetch latest unposted articles from all RSS feeds concurrently.
+    Returns (articles, report) where report holds one latency entry per feed.
+    Articles are newest first; pass max_articles to cap the list.
     """
     posted_ids = load_posted_ids()
+    cache = feed_cache.load_feed_cache()
+    results = fetch_all_feeds(RSS_FEEDS, cache=cache)
+    # Threads abandoned at the deadline may still write into `cache`
+    # while we save, so snapshot it first
+    cache = dict(cache)
+    feed_cache.evict(cache, RSS_FEEDS)
+    feed_cache.save_feed_cache(cache)
+    feed_cache.print_cache_stats()
+    stories = StoryIndex()
     articles = []
+    repeats = 0
 
-    for feed_url in RSS_FEEDS:
-        print(f"[FETCHER] Checking feed: {feed_url}")
-        try:
-            feed = feedparser.parse(feed_url)
-        except Exception as e:
-            print(f"[FETCHER] Failed to parse {feed_url}: {e}")
-            continue
-
-        for entry in feed.entries:
-            # Build a unique ID from the article link
-            article_id = entry.get("link", entry.get("id", ""))
+    # Everything seen counts towards trends, posted and old entries included
+    trend_index = trends.get_index()
+    with metrics.span("trends.update"):
+        added = trend_index.add([a for r in results for a in r["articles"]])
+    if added:
+        trend_index.save()
+    trends.print_trends(trend_index)
 
+    # Walk results in RSS_FEEDS order so the outcome doesn't depend on
+    # which feed happened to respond first
+    for result in results:
+        metrics.incr("articles_seen", len(result["articles"]))
+        for article in result["articles"]:
             # Skip if already posted
-            if article_id in posted_ids:
+            if article["id"] in posted_ids:
+                metrics.incr("articles_skipped", reason="posted")
                 continue
 
             # Skip if too old
-            if not is_recent(entry):
+            if not is_recent(article):
+                metrics.incr("articles_skipped", reason="old")
                 continue
 
-            # Extract summary (strip HTML tags roughly)
-            summary = entry.get("summary", "")
-            summary = summary.replace("<p>", " ").replace("</p>", " ")
-            # Basic tag strip
-            import re
-            summary = re.sub(r"<[^>]+>", "", summary).strip()
-            summary = summary[:500]  # cap length
-
-            article = {
-                "id": article_id,
-                "title": entry.get("title", "No title"),
-                "link": article_id,
-                "summary": summary,
-                "source": feed.feed.get("title", "Unknown Source"),
-                "published": entry.get("published", "Unknown date"),
-            }
+            # Skip if another outlet's version of this story was posted recently
+            if stories.find_repeat(article):
+                metrics.incr("articles_skipped", reason="repeat_story")
+                repeats += 1
+                continue
 
+            article = dict(article)
+            article["trend_score"] = trend_index.article_score(article)
             articles.append(article)
 
-            # Stop once we have enough candidates
-            if len(articles) >= max_articles * 3:
-                break
+    # Collapse the same story from different outlets into one candidate
+    clusters = cluster_articles(articles)
+    articles = [members[0] for members in clusters]
+    metrics.incr("articles_skipped", sum(len(c) for c in clusters) - len(clusters),
+                 reason="same_story")
+    print(
+        f"[FETCHER] {sum(len(c) for c in clusters)} candidates → "
+        f"{len(clusters)} stories ({repeats} repeats of posted stories)"
+    )
 
-        if len(articles) >= max_articles * 3:
-            break
+    report = [
+        {
+            "url": r["url"],
+            "status": r["status"],
+            "latency": round(r["latency"], 3),
+            "bytes": r["bytes"],
+            "entries": len(r["articles"]),
+            "error": r["error"],
+        }
+        for r in results
+    ]
 
-    # Sort by newest first (best effort)
-    articles = articles[:max_articles]
+    # Sort by newest first (undated last); ranking happens downstream
+    articles.sort(key=lambda a: a["published_ts"] or 0, reverse=True)
+    if max_articles is not None:
+        articles = articles[:max_articles]
     print(f"[FETCHER] Found {len(articles)} new articles")
+    return articles, report
+
+
+def fetch_latest_articles(max_articles: int | None = None) -> list:
+    """
+    Fetch latest unposted articles from all RSS feeds.
+    Returns a list of article dicts.
+    """
+    articles, report = fetch_articles_with_report(max_articles)
+    print_fetch_report(report)
     return articles
 
 
@@ -107,4 +287,4 @@ if __name__ == "__main__":
     # Quick test
     arts = fetch_latest_articles()
     for a in arts:
-        print(f"\n→ {a['title']}\n  {a['link']}")
\ No newline at end of file
+        print(f"\n→ {a['title']}\n  {a['link']}")
@@ -0,0 +1,191 @@
+# bot/http_client.py
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# ── Shared HTTP client ────────────────────────────────────────────
+# One requests.Session for the whole run so feeds, article pages and
+# images reuse keep-alive connections (one DNS/TCP/TLS setup per host)
+# instead of paying a fresh handshake on every call.
+# HTTP/2 isn't available through requests/urllib3; connection reuse is
+# where the handshake savings come from.
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 15
+POOL_HOSTS = 32          # distinct hosts kept in the pool manager
+POOL_PER_HOST = 8        # max open connections per host
+POOL_TIMEOUT = 30        # seconds to wait for a free connection before failing
+MAX_RETRIES = 2
+BACKOFF_BASE = 0.5       # seconds; doubles per attempt, plus jitter
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/124.0.0.0 Safari/537.36"
+    )
+}
+
+STATS = {"requests": 0, "retries": 0, "errors": 0}
+HANDSHAKES = {}  # "scheme://host" -> sockets opened (DNS + TCP [+ TLS] each)
+_session = None
+_adapter = None
+_lock = threading.Lock()
+
+
+def _count(stat: str):
+    """Thread-safe increment of a STATS counter (get() runs on several pools' threads)."""
+    with _lock:
+        STATS[stat] += 1
+
+
+def _count_handshake(conn, scheme: str):
+    key = f"{scheme}://{conn.host}"
+    with _lock:
+        HANDSHAKES[key] = HANDSHAKES.get(key, 0) + 1
+
+
+class _CountingHTTPConnection(HTTPConnection):
+    def connect(self):
+        _count_handshake(self, "http")
+        super().connect()
+
+
+class _CountingHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        _count_handshake(self, "https")
+        super().connect()
+
+
+class _BoundedWaitPool:
+    """
+    requests never passes a pool timeout, so a blocking pool would wait
+    forever for a connection that was never released; fail after
+    POOL_TIMEOUT instead (urllib3 raises EmptyPoolError).
+    """
+
+    def _get_conn(self, timeout=None):
+        return super()._get_conn(timeout=POOL_TIMEOUT if timeout is None else timeout)
+
+
+class _CountingHTTPPool(_BoundedWaitPool, HTTPConnectionPool):
+    ConnectionCls = _CountingHTTPConnection
+
+
+class _CountingHTTPSPool(_BoundedWaitPool, HTTPSConnectionPool):
+    ConnectionCls = _CountingHTTPSConnection
+
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools count every new socket they open."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPPool,
+            "https": _CountingHTTPSPool,
+        }
+
+
+def get_session() -> requests.Session:
+    """The process-wide pooled session (created on first use)."""
+    global _session, _adapter
+    with _lock:
+        if _session is None:
+            _adapter = PooledAdapter(
+                pool_connections=POOL_HOSTS,
+                pool_maxsize=POOL_PER_HOST,
+                pool_block=True,  # wait (up to POOL_TIMEOUT) for a free connection rather than opening extras
+                max_retries=0,    # retries are handled in get() with jittered backoff
+            )
+            _session = requests.Session()
+            _session.headers.update(DEFAULT_HEADERS)
+            _session.mount("https://", _adapter)
+            _session.mount("http://", _adapter)
+        return _session
+
+
+def _backoff(attempt: int, retry_after: str | None = None) -> float:
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), 30.0)
+    delay = BACKOFF_BASE * (2 ** attempt)
+    return delay + random.uniform(0, delay)  # full jitter on top of the base delay
+
+
+def get(url: str, headers: dict | None = None, stream: bool = False,
+        timeout: tuple | None = None, retries: int = MAX_RETRIES) -> requests.Response:
+    """
+    GET through the shared pool. Connection errors, timeouts and
+    429/5xx responses are retried with exponential backoff + jitter.
+    Returns the final response (which may still be an error status).
+    """
+    session = get_session()
+    timeout = timeout or (CONNECT_TIMEOUT, READ_TIMEOUT)
+    attempt = 0
+    while True:
+        _count("requests")
+        try:
+            resp = session.get(url, headers=headers, stream=stream, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt >= retries:
+                _count("errors")
+                raise
+            print(f"[HTTP] {type(e).__name__} for {url}, retrying")
+        else:
+            if resp.status_code not in RETRY_STATUSES or attempt >= retries:
+                return resp
+            retry_after = resp.headers.get("Retry-After")
+            resp.close()
+            print(f"[HTTP] {resp.status_code} for {url}, retrying")
+            time.sleep(_backoff(attempt, retry_after))
+            attempt += 1
+            _count("retries")
+            continue
+        time.sleep(_backoff(attempt))
+        attempt += 1
+        _count("retries")
+
+
+def pool_stats() -> dict:
+    """
+    Connection reuse across the run. `handshakes` is how many sockets
+    were opened (each one a DNS + TCP + TLS setup); `reuse_rate` is the
+    share of requests served over an already-open connection.
+    """
+    per_host = {}
+    if _adapter is not None:
+        pools = _adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            per_host[f"{pool.scheme}://{pool.host}"] = {"requests": pool.num_requests}
+    with _lock:
+        for host, count in HANDSHAKES.items():
+            per_host.setdefault(host, {"requests": 0})["handshakes"] = count
+        retries, errors = STATS["retries"], STATS["errors"]
+    total_requests = sum(p["requests"] for p in per_host.values())
+    total_handshakes = sum(p.get("handshakes", 0) for p in per_host.values())
+    reuse = max(0.0, 1 - total_handshakes / total_requests) if total_requests else 0.0
+    return {
+        "requests": total_requests,
+        "handshakes": total_handshakes,
+        "reuse_rate": round(reuse, 3),
+        "retries": retries,
+        "errors": errors,
+        "hosts": per_host,
+    }
+
+
+def print_pool_stats():
+    stats = pool_stats()
+    print(
+        f"[HTTP] {stats['requests']} requests over {stats['handshakes']} connections "
+        f"(reuse {stats['reuse_rate']:.0%}, retries={stats['retries']}, errors={stats['errors']})"
+    )
+    for host, s in stats["hosts"].items():
+        print(f"  {host}: {s['requests']} requests / {s.get('handshakes', 0)} handshakes")
@@ -1,91 +1,60 @@
 # bot/image_extractor.py
-import requests
-from bs4 import BeautifulSoup
-import os
-import hashlib
-
-HEADERS = {
-    "User-Agent": (
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/124.0.0.0 Safari/537.36"
-    )
-}
-IMAGE_DIR = "/tmp/bot_images"
-MAX_IMAGE_SIZE_MB = 5  # X limit is 5MB for images
-
-
-def ensure_image_dir():
-    os.makedirs(IMAGE_DIR, exist_ok=True)
+from bot import http_client, image_pipeline, image_probe, metrics
 
 
+@metrics.traced()
 def extract_og_image(article_url: str) -> str | None:
     """
-    Scrape the og:image or twitter:image meta tag from an article URL.
-    Returns the image URL string, or None if not found.
+    The best image of an article: every candidate on the page (og:image,
+    twitter:image, <img> and srcset variants, from the shared page cache)
+    is probed for its size with a ranged request and the best fit wins.
+    Returns the absolute image URL, or None if no usable image was found.
     """
-    try:
-        resp = requests.get(article_url, headers=HEADERS, timeout=10)
-        resp.raise_for_status()
-    except Exception as e:
-        print(f"[IMAGE] Failed to fetch article page: {e}")
-        return None
-
-    soup = BeautifulSoup(resp.text, "lxml")
-
-    # Try og:image first
-    og = soup.find("meta", property="og:image")
-    if og and og.get("content"):
-        return og["content"]
-
-    # Fallback: twitter:image
-    tw = soup.find("meta", attrs={"name": "twitter:image"})
-    if tw and tw.get("content"):
-        return tw["content"]
-
-    # Fallback: first <img> in article body
-    img = soup.find("img", src=True)
-    if img:
-        src = img["src"]
-        if src.startswith("http"):
-            return src
-
-    print(f"[IMAGE] No og:image found for {article_url}")
-    return None
+    image_url = image_probe.choose_image(article_url)
+    if not image_url:
+        print(f"[IMAGE] No usable image found for {article_url}")
+    return image_url
 
 
+@metrics.traced()
 def download_image(image_url: str) -> str | None:
     """
-    Download image to /tmp/. Returns local file path or None.
+    Download an image, enforcing the size cap while streaming, and run it
+    through the normalisation pipeline (downscale, strip metadata,
+    re-encode under 5MB). Returns local file path or None.
     """
-    ensure_image_dir()
-
-    # Generate filename from URL hash
-    url_hash = hashlib.md5(image_url.encode()).hexdigest()[:10]
-    ext = image_url.split("?")[0].split(".")[-1].lower()
-    if ext not in ["jpg", "jpeg", "png", "gif", "webp"]:
-        ext = "jpg"
-    filepath = os.path.join(IMAGE_DIR, f"{url_hash}.{ext}")
-
     # Skip download if already cached
-    if os.path.exists(filepath):
-        return filepath
+    cached = image_pipeline.cached_path(image_url)
+    if cached:
+        print(f"[IMAGE] Cache hit: {cached}")
+        metrics.incr("image_cache", result="hits")
+        return cached
 
+    metrics.incr("image_cache", result="misses")
     try:
-        resp = requests.get(image_url, headers=HEADERS, timeout=15, stream=True)
-        resp.raise_for_status()
-
-        # Check size before downloading
-        content_length = resp.headers.get("Content-Length")
-        if content_length and int(content_length) > MAX_IMAGE_SIZE_MB * 1024 * 1024:
-            print(f"[IMAGE] Image too large, skipping")
-            return None
-
-        with open(filepath, "wb") as f:
+        # The with block closes the streamed response on every exit, so
+        # error statuses and early returns hand the connection back
+        with http_client.get(image_url, stream=True) as resp:
+            resp.raise_for_status()
+
+            # Check size before downloading
+            content_length = resp.headers.get("Content-Length")
+            if content_length and int(content_length) > image_pipeline.MAX_SOURCE_BYTES:
+                print(f"[IMAGE] Image too large, skipping")
+                return None
+
+            # ...and keep checking while streaming, Content-Length is often missing
+            data = bytearray()
             for chunk in resp.iter_content(8192):
-                f.write(chunk)
-
-        print(f"[IMAGE] Downloaded to {filepath}")
+                data.extend(chunk)
+                if len(data) > image_pipeline.MAX_SOURCE_BYTES:
+                    print(f"[IMAGE] Image exceeded {image_pipeline.MAX_SOURCE_BYTES} B while streaming, skipping")
+                    return None
+
+        metrics.incr("bytes", len(data), kind="image")
+        out, ext = image_pipeline.normalise_image(bytes(data))
+        filepath = image_pipeline.store(image_url, out, ext)
+        print(f"[IMAGE] Downloaded {len(data)} B → {len(out)} B {ext} at {filepath}")
         return filepath
 
     except Exception as e:
@@ -95,7 +64,7 @@ def download_image(image_url: str) -> str | None:
 
 def get_article_image(article_url: str) -> str | None:
     """
-    Full pipeline: extract OG image URL then download it.
+    Full pipeline: pick the best image URL then download it.
     Returns local file path or None.
     """
     image_url = extract_og_image(article_url)
@@ -0,0 +1,156 @@
+# bot/image_pipeline.py
+import hashlib
+import io
+import json
+import os
+import threading
+from PIL import Image, ImageOps
+
+# ── Image normalisation + content-addressed cache ─────────────────
+# Every downloaded image is decoded, downscaled to what X actually
+# displays, stripped of metadata and re-encoded under the 5MB upload
+# limit. Results are stored under the hash of their bytes, with a
+# url -> file index so repeated runs skip the download entirely.
+IMAGE_DIR = "/tmp/bot_images"
+INDEX_PATH = os.path.join(IMAGE_DIR, "index.json")
+IMAGE_CACHE_MAX_MB = 100           # total size budget, least recently used evicted first
+MAX_UPLOAD_BYTES = 5 * 1024 * 1024  # X limit is 5MB for images
+MAX_SOURCE_BYTES = 20 * 1024 * 1024 # refuse to even download beyond this
+MAX_DIMENSIONS = (1600, 1600)       # X shows images at most ~1200px wide
+JPEG_QUALITIES = (85, 75, 65, 55)
+
+_lock = threading.Lock()
+
+
+class ImageTooLarge(Exception):
+    pass
+
+
+# ── Normalisation ─────────────────────────────────────────────────
+def _encode(img: Image.Image, fmt: str, quality: int) -> bytes:
+    buf = io.BytesIO()
+    if fmt == "PNG":
+        img.save(buf, "PNG", optimize=True)
+    else:
+        img.save(buf, "JPEG", quality=quality, optimize=True, progressive=True)
+    return buf.getvalue()
+
+
+def normalise_image(data: bytes) -> tuple:
+    """
+    Decode, downscale and re-encode image bytes for upload to X.
+    Returns (bytes, extension). Metadata (EXIF, ICC, comments) is dropped.
+    Raises ImageTooLarge if no encoding fits MAX_UPLOAD_BYTES, or
+    PIL's errors for undecodable data.
+    """
+    img = Image.open(io.BytesIO(data))
+
+    # Animated GIFs can't be re-encoded as a still; pass them through if small enough
+    if getattr(img, "is_animated", False) and img.format == "GIF":
+        if len(data) <= MAX_UPLOAD_BYTES:
+            return data, "gif"
+        img.seek(0)
+
+    # JPEG draft mode decodes at 1/2, 1/4 or 1/8 scale straight away
+    if img.format == "JPEG":
+        img.draft("RGB", MAX_DIMENSIONS)
+
+    img = ImageOps.exif_transpose(img)
+    img.thumbnail(MAX_DIMENSIONS, Image.LANCZOS)
+
+    has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+    if has_alpha:
+        img = img.convert("RGBA")
+        out = _encode(img, "PNG", 0)
+        if len(out) <= MAX_UPLOAD_BYTES:
+            return out, "png"
+        # Too big as PNG: flatten onto white and fall through to JPEG
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel("A"))
+        img = background
+    elif img.mode != "RGB":
+        img = img.convert("RGB")
+
+    for _ in range(3):
+        for quality in JPEG_QUALITIES:
+            out = _encode(img, "JPEG", quality)
+            if len(out) <= MAX_UPLOAD_BYTES:
+                return out, "jpg"
+        img = img.resize((int(img.width * 0.75), int(img.height * 0.75)), Image.LANCZOS)
+    raise ImageTooLarge("could not fit image under the upload limit")
+
+
+# ── Content-addressed LRU cache ───────────────────────────────────
+def _load_index() -> dict:
+    if not os.path.exists(INDEX_PATH):
+        return {}
+    try:
+        with open(INDEX_PATH, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_index(index: dict):
+    tmp_path = INDEX_PATH + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, INDEX_PATH)
+
+
+def cached_path(image_url: str) -> str | None:
+    """Local file for an already-processed URL (marked as recently used), or None."""
+    with _lock:
+        name = _load_index().get(image_url)
+        if not name:
+            return None
+        path = os.path.join(IMAGE_DIR, name)
+        if not os.path.exists(path):
+            return None
+        os.utime(path)  # LRU: mtime = last use
+        return path
+
+
+def store(image_url: str, data: bytes, ext: str) -> str:
+    """Save processed bytes under their content hash and index the URL."""
+    os.makedirs(IMAGE_DIR, exist_ok=True)
+    name = f"{hashlib.sha256(data).hexdigest()[:32]}.{ext}"
+    path = os.path.join(IMAGE_DIR, name)
+    with _lock:
+        if os.path.exists(path):
+            os.utime(path)
+        else:
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        index = _load_index()
+        index[image_url] = name
+        _evict(index, keep=name)
+        _save_index(index)
+    return path
+
+
+def _evict(index: dict, keep: str):
+    """Delete least recently used images until the cache fits its budget."""
+    files = []
+    for entry in os.scandir(IMAGE_DIR):
+        if entry.is_file() and entry.name != os.path.basename(INDEX_PATH) \
+                and not entry.name.endswith(".tmp"):
+            st = entry.stat()
+            files.append((st.st_mtime, st.st_size, entry.name))
+    total = sum(size for _, size, _ in files)
+    budget = IMAGE_CACHE_MAX_MB * 1024 * 1024
+    removed = set()
+    for _, size, name in sorted(files):
+        if total <= budget:
+            break
+        if name == keep:
+            continue
+        os.remove(os.path.join(IMAGE_DIR, name))
+        removed.add(name)
+        total -= size
+    if removed:
+        for url in [u for u, n in index.items() if n in removed]:
+            del index[url]
+        print(f"[IMAGE] Evicted {len(removed)} cached images")
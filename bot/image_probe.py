@@ -0,0 +1,148 @@
+# bot/image_probe.py
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import ImageFile
+
+from bot import http_client, image_pipeline, metrics, page_cache
+
+# ── Image candidate probing ───────────────────────────────────────
+# Instead of trusting the first og:image, every image candidate on the
+# page is probed with a ranged GET: Pillow reads the format and pixel
+# size from the first few KB, and Content-Range gives the full size.
+# Logos, tracking pixels, banners and oversized originals are ruled out
+# before anything is downloaded; only the winner is fetched in full.
+PROBE_BYTES = 4 * 1024        # first range: enough for PNG, GIF, WebP and most JPEGs
+PROBE_MAX_BYTES = 64 * 1024   # JPEGs with large EXIF blocks put the size marker later
+PROBE_CHUNK_SIZE = 4096
+PROBE_WORKERS = 6
+PROBE_READ_TIMEOUT = 5
+
+MIN_WIDTH, MIN_HEIGHT = 400, 200   # smaller is a logo, icon or pixel
+MAX_ASPECT = 3.0                   # wider (or taller) than 3:1 is a banner
+TARGET_WIDTH = 1200                # X shows images at most ~1200px wide
+TARGET_ASPECT = 16 / 9
+META_BONUS = 0.15                  # og:/twitter:image is the editor's pick
+OVERSIZE_PENALTY = 0.1             # needs a heavy re-encode to fit the upload limit
+
+CONTENT_RANGE_RE = re.compile(r"bytes \d+-\d+/(\d+)")
+
+
+def _read_range(url: str, start: int, end: int, parser, result: dict) -> bool:
+    """
+    Feed bytes start..end of `url` to `parser`. Returns True if another
+    range could still follow (a 206 that ended before the header did).
+    """
+    resp = http_client.get(
+        url, headers={"Range": f"bytes={start}-{end}"}, stream=True,
+        timeout=(http_client.CONNECT_TIMEOUT, PROBE_READ_TIMEOUT), retries=1,
+    )
+    try:
+        if resp.status_code not in (200, 206):
+            result["error"] = f"HTTP {resp.status_code}"
+            return False
+        content_type = resp.headers.get("Content-Type", "")
+        if not content_type.startswith("image/") or "svg" in content_type:
+            result["error"] = f"not a raster image ({content_type or 'no type'})"
+            return False
+        total = CONTENT_RANGE_RE.match(resp.headers.get("Content-Range", ""))
+        if total:
+            result["bytes"] = int(total.group(1))
+        elif resp.status_code == 200 and resp.headers.get("Content-Length", "").isdigit():
+            result["bytes"] = int(resp.headers["Content-Length"])
+
+        for chunk in resp.iter_content(PROBE_CHUNK_SIZE):
+            result["probe_bytes"] += len(chunk)
+            if parser.image is None:
+                parser.feed(chunk)
+            if result["probe_bytes"] >= PROBE_MAX_BYTES:
+                break  # the cap holds even when no header turned up: size unknown
+            if parser.image is not None and resp.status_code == 200:
+                break  # a full body: stop here rather than download the image
+            # else: finish the (small) range so the connection goes back to the pool
+        return resp.status_code == 206 and parser.image is None and (result["bytes"] or 0) > end + 1
+    finally:
+        resp.close()
+
+
+def probe(candidate: dict) -> dict:
+    """
+    Read just enough of an image to learn its format and dimensions:
+    one PROBE_BYTES range, and a second up to PROBE_MAX_BYTES only if the
+    header runs past it. Returns the candidate plus "format", "width",
+    "height", "bytes" (full size if known), "probe_bytes", "error" and
+    "unreachable" (the error was a network failure or timeout, not a
+    verdict on the image).
+    """
+    result = {**candidate, "format": None, "bytes": None, "probe_bytes": 0,
+              "error": None, "unreachable": False}
+    parser = ImageFile.Parser()
+    try:
+        if _read_range(candidate["url"], 0, PROBE_BYTES - 1, parser, result):
+            _read_range(candidate["url"], PROBE_BYTES, PROBE_MAX_BYTES - 1, parser, result)
+    except Exception as e:
+        result["error"] = str(e)
+        result["unreachable"] = True
+        return result
+    if parser.image is None:
+        result["error"] = result["error"] or f"no image header in {result['probe_bytes']} B"
+        return result
+    result["format"] = parser.image.format
+    result["width"], result["height"] = parser.image.size
+    return result
+
+
+def score(probed: dict) -> float | None:
+    """How well an image fits a tweet; None if it should never be used."""
+    if probed["error"] or not probed.get("width") or not probed.get("height"):
+        return None
+    w, h = probed["width"], probed["height"]
+    if w < MIN_WIDTH or h < MIN_HEIGHT:
+        return None
+    aspect = w / h
+    if max(aspect, 1 / aspect) > MAX_ASPECT:
+        return None
+    if probed["bytes"] and probed["bytes"] > image_pipeline.MAX_SOURCE_BYTES:
+        return None
+
+    size_fit = min(w, TARGET_WIDTH) / TARGET_WIDTH
+    aspect_fit = math.exp(-abs(math.log(aspect / TARGET_ASPECT)))
+    value = 0.55 * size_fit + 0.3 * aspect_fit
+    if probed["origin"] in ("og:image", "twitter:image"):
+        value += META_BONUS
+    if w > 2 * image_pipeline.MAX_DIMENSIONS[0] or (probed["bytes"] or 0) > image_pipeline.MAX_UPLOAD_BYTES:
+        value -= OVERSIZE_PENALTY
+    return round(value, 4)
+
+
+@metrics.traced()
+def choose_image(article_url: str) -> str | None:
+    """
+    URL of the best image on an article page, or None if every candidate
+    is unusable. If no candidate could be reached at all (network errors,
+    timeouts), falls back to the page's first candidate; a 404, an SVG or
+    a non-image is a verdict, not a reason to fall back.
+    """
+    candidates = page_cache.image_candidates(article_url)
+    if not candidates:
+        return None
+    with ThreadPoolExecutor(max_workers=min(PROBE_WORKERS, len(candidates))) as pool:
+        probed = list(pool.map(probe, candidates))
+
+    probe_bytes = sum(p["probe_bytes"] for p in probed)
+    metrics.incr("bytes", probe_bytes, kind="image_probe")
+    metrics.incr("image_candidates", len(probed))
+    scored = [(score(p), p) for p in probed]
+    for value, p in scored:
+        dims = f"{p['width']}x{p['height']} {p['format']}" if p["format"] else p["error"]
+        verdict = f"{value:.2f}" if value is not None else "rejected"
+        print(f"[IMAGE]   {verdict:>8}  {p['origin']:<13} {dims}  {p['url'][:80]}")
+
+    usable = [(value, p) for value, p in scored if value is not None]
+    print(f"[IMAGE] Probed {len(probed)} candidates with {probe_bytes} B")
+    if usable:
+        return max(usable, key=lambda vp: vp[0])[1]["url"]
+    if all(p["unreachable"] for p in probed):
+        return candidates[0]["url"]
+    return None
@@ -0,0 +1,91 @@
+# bot/llm_cache.py
+import hashlib
+import json
+import os
+import threading
+import time
+
+from bot import metrics
+
+# ── Content-addressed cache for LLM completions ───────────────────
+# Keyed by a hash of everything that determines the output, so a
+# retried run gets the same thread back without touching the network.
+LLM_CACHE_PATH = "data/llm_cache.json"
+LLM_CACHE_TTL_HOURS = 48
+LLM_CACHE_MAX_ENTRIES = 500
+
+CACHE_STATS = {"hits": 0, "misses": 0, "evicted": 0}
+_lock = threading.Lock()
+_entries = None  # lazily loaded: key -> {"raw", "created", "used"}
+
+
+def cache_key(*parts) -> str:
+    """Stable SHA-256 over the JSON encoding of `parts`."""
+    blob = json.dumps(parts, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+def _load() -> dict:
+    global _entries
+    if _entries is None:
+        _entries = {}
+        if os.path.exists(LLM_CACHE_PATH):
+            try:
+                with open(LLM_CACHE_PATH, "r") as f:
+                    _entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"[LLMCACHE] Ignoring unreadable cache: {e}")
+    return _entries
+
+
+def _save():
+    os.makedirs(os.path.dirname(LLM_CACHE_PATH) or ".", exist_ok=True)
+    tmp_path = LLM_CACHE_PATH + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(_entries, f, ensure_ascii=False)
+    os.replace(tmp_path, LLM_CACHE_PATH)
+
+
+def _evict(entries: dict):
+    """Drop expired entries, then least-recently-used ones over the size cap."""
+    cutoff = time.time() - LLM_CACHE_TTL_HOURS * 3600
+    for key in [k for k, v in entries.items() if v["created"] < cutoff]:
+        del entries[key]
+        CACHE_STATS["evicted"] += 1
+    overflow = len(entries) - LLM_CACHE_MAX_ENTRIES
+    if overflow > 0:
+        for key in sorted(entries, key=lambda k: entries[k]["used"])[:overflow]:
+            del entries[key]
+            CACHE_STATS["evicted"] += 1
+
+
+def get(key: str) -> str | None:
+    """Cached completion for `key`, or None if missing/expired."""
+    with _lock:
+        entries = _load()
+        entry = entries.get(key)
+        if entry and entry["created"] >= time.time() - LLM_CACHE_TTL_HOURS * 3600:
+            entry["used"] = time.time()
+            CACHE_STATS["hits"] += 1
+            metrics.incr("llm_cache", result="hits")
+            return entry["raw"]
+        CACHE_STATS["misses"] += 1
+        metrics.incr("llm_cache", result="misses")
+        return None
+
+
+def put(key: str, raw: str):
+    """Store a completion and persist the cache."""
+    with _lock:
+        entries = _load()
+        now = time.time()
+        entries[key] = {"raw": raw, "created": now, "used": now}
+        _evict(entries)
+        _save()
+
+
+def print_cache_stats():
+    print(
+        f"[LLMCACHE] hits={CACHE_STATS['hits']} misses={CACHE_STATS['misses']} "
+        f"evicted={CACHE_STATS['evicted']}"
+    )
@@ -0,0 +1,234 @@
+# bot/metrics.py
+import functools
+import itertools
+import json
+import os
+import re
+import threading
+import time
+
+# ── Tracing + metrics ─────────────────────────────────────────────
+# Spans time pipeline stages and hot functions; counters track articles,
+# cache hits and bytes moved. At the end of a run, spans go to a
+# JSON-lines trace file and span totals and counters go to a
+# Prometheus text-format file (for node_exporter's textfile collector).
+# Disabled by default: span() then returns a shared no-op object and
+# incr() returns immediately, so instrumented code pays one flag check.
+TRACE_PATH = "data/trace.jsonl"
+PROM_PATH = "data/metrics.prom"
+METRIC_PREFIX = "bot_"
+
+ENABLED = False
+RUN_ID = f"{int(time.time())}-{os.getpid()}"
+
+_lock = threading.Lock()
+_local = threading.local()
+_ids = itertools.count(1)
+_spans = []        # finished span records not yet written to TRACE_PATH
+_span_totals = {}  # name -> [count, total seconds, errors]
+_counters = {}     # (name, sorted label items) -> value
+
+
+def configure():
+    """(Re)read BOT_METRICS / BOT_TRACE_PATH / BOT_PROM_PATH from the environment."""
+    global ENABLED, TRACE_PATH, PROM_PATH
+    ENABLED = os.environ.get("BOT_METRICS", "").lower() in ("1", "true", "yes", "on")
+    TRACE_PATH = os.environ.get("BOT_TRACE_PATH", TRACE_PATH)
+    PROM_PATH = os.environ.get("BOT_PROM_PATH", PROM_PATH)
+
+
+configure()
+
+
+# ── Spans ─────────────────────────────────────────────────────────
+class _NoopSpan:
+    id = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    def __init__(self, name: str, attrs: dict, parent=None):
+        self.name = name
+        self.attrs = attrs
+        self.id = next(_ids)
+        self.parent = parent
+
+    def set(self, **attrs):
+        """Attach attributes (sizes, counts, outcomes) to the span."""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        if self.parent is None and stack:
+            self.parent = stack[-1].id
+        stack.append(self)
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._t0
+        _local.stack.pop()
+        if exc_type is SystemExit and not exc.code:
+            exc_type = None  # sys.exit(0) is a normal finish
+        record = {
+            "run": RUN_ID,
+            "span": self.id,
+            "parent": self.parent,
+            "name": self.name,
+            "thread": threading.current_thread().name,
+            "start": round(self.start, 6),
+            "duration": round(duration, 6),
+            "ok": exc_type is None,
+        }
+        if exc_type is not None:
+            record["error"] = f"{exc_type.__name__}: {exc}"
+        if self.attrs:
+            record["attrs"] = self.attrs
+        with _lock:
+            _spans.append(record)
+            totals = _span_totals.setdefault(self.name, [0, 0.0, 0])
+            totals[0] += 1
+            totals[1] += duration
+            totals[2] += exc_type is not None
+        return False
+
+
+def span(name: str, parent=None, **attrs):
+    """
+    Context manager timing a block: `with metrics.span("fetch") as s: ...`.
+    Nested spans on the same thread are linked automatically; pass
+    `parent` (a span id) to link work handed off to another thread.
+    """
+    if not ENABLED:
+        return _NOOP
+    return _Span(name, attrs, parent)
+
+
+def current_span_id():
+    """Id of the innermost open span on this thread (None if none/disabled)."""
+    stack = getattr(_local, "stack", None)
+    return stack[-1].id if stack else None
+
+
+def traced(name: str | None = None):
+    """Decorator form of span(); the span is named after the function by default."""
+    def decorate(fn):
+        span_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            with _Span(span_name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# ── Counters ──────────────────────────────────────────────────────
+def incr(name: str, n: float = 1, **labels):
+    """Add `n` to a counter, e.g. incr("bytes", 512, kind="image")."""
+    if not ENABLED:
+        return
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + n
+
+
+# ── Export ────────────────────────────────────────────────────────
+_NAME_RE = re.compile(r"[^a-zA-Z0-9_]")
+
+
+def _metric_name(name: str) -> str:
+    return METRIC_PREFIX + _NAME_RE.sub("_", name)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(items) -> str:
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def prometheus_text() -> str:
+    """Span totals and counters in Prometheus text exposition format."""
+    lines = []
+    with _lock:
+        span_totals = {k: list(v) for k, v in _span_totals.items()}
+        counters = dict(_counters)
+
+    if span_totals:
+        name = _metric_name("span_seconds")
+        lines += [f"# HELP {name} Time spent in traced spans.", f"# TYPE {name} summary"]
+        for span_name, (count, total, _) in sorted(span_totals.items()):
+            lines.append(f"{name}_sum{_labels([('span', span_name)])} {total:.6f}")
+            lines.append(f"{name}_count{_labels([('span', span_name)])} {count}")
+        name = _metric_name("span_errors_total")
+        lines += [f"# HELP {name} Traced spans that raised.", f"# TYPE {name} counter"]
+        for span_name, (_, _, errors) in sorted(span_totals.items()):
+            lines.append(f"{name}{_labels([('span', span_name)])} {errors}")
+
+    by_name = {}
+    for (counter, labels), value in counters.items():
+        by_name.setdefault(counter, []).append((labels, value))
+    for counter in sorted(by_name):
+        name = _metric_name(counter) + "_total"
+        lines.append(f"# TYPE {name} counter")
+        for labels, value in sorted(by_name[counter]):
+            lines.append(f"{name}{_labels(labels)} {value:g}")
+
+    name = _metric_name("last_flush_timestamp_seconds")
+    lines += [f"# TYPE {name} gauge", f"{name} {time.time():.0f}"]
+    return "\n".join(lines) + "\n"
+
+
+def flush():
+    """Append buffered spans to TRACE_PATH and rewrite PROM_PATH. No-op when disabled."""
+    if not ENABLED:
+        return
+    with _lock:
+        spans = _spans[:]
+        del _spans[:]
+    os.makedirs(os.path.dirname(TRACE_PATH) or ".", exist_ok=True)
+    with open(TRACE_PATH, "a") as f:
+        for record in spans:
+            f.write(json.dumps(record, default=str) + "\n")
+
+    # Write-then-rename so a scraper never reads a half-written file
+    os.makedirs(os.path.dirname(PROM_PATH) or ".", exist_ok=True)
+    tmp_path = PROM_PATH + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(prometheus_text())
+    os.replace(tmp_path, PROM_PATH)
+    print_summary()
+
+
+def print_summary():
+    """Per-span totals for the run, slowest first."""
+    with _lock:
+        span_totals = sorted(_span_totals.items(), key=lambda kv: -kv[1][1])
+    if not span_totals:
+        return
+    print(f"[METRICS] Span totals (trace: {TRACE_PATH}, metrics: {PROM_PATH}):")
+    for span_name, (count, total, errors) in span_totals:
+        line = f"  {total:8.2f}s  {count:>4}×  {span_name}"
+        if errors:
+            line += f"  ({errors} failed)"
+        print(line)
@@ -0,0 +1,378 @@
+# bot/page_cache.py
+import codecs
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+from bot import http_client, metrics
+
+# ── Per-URL article page cache ────────────────────────────────────
+# Every stage that needs something from an article page (image, canonical
+# URL, body text for the prompt) reads it from here. A page is streamed
+# and parsed once into a small record; concurrent requests for the same
+# URL wait for the fetch already in flight instead of starting another.
+# Reading stops once the head and an image candidate are in, unless a
+# caller asked for body text (enrich_article): only then does the read go
+# on into the body until BODY_TEXT_CHARS of paragraph text are collected.
+# A text request that joins a fetch in flight extends it. Pipelines that
+# will enrich an article later call expect_text() first, so whichever
+# stage fetches the page reads the text in the same pass; a text request
+# that finds a head-only record anyway reads the page again (counted as
+# "refetched").
+PAGE_CHUNK_SIZE = 16 * 1024
+MAX_PAGE_BYTES = 5 * 1024 * 1024   # give up on pages bigger than this
+BODY_TEXT_CHARS = 3000             # paragraph text kept for enrichment (when asked for)
+PAGE_CACHE_TTL_MINUTES = 30
+PAGE_CACHE_ERROR_TTL_SECONDS = 60  # failed fetches are retried after this
+PAGE_CACHE_MAX_MB = 16
+PREFETCH_WORKERS = 4
+MAX_IMAGE_CANDIDATES = 12
+SRCSET_TARGET_WIDTH = 1200          # from a srcset, keep the smallest variant at least this wide
+
+IMAGE_META_KEYS = ("og:image", "og:image:secure_url", "twitter:image", "twitter:image:src")
+META_KEYS = {
+    *IMAGE_META_KEYS, "og:image:width", "og:image:height", "og:title", "og:description",
+    "description", "og:url", "author", "article:author",
+}
+SKIP_TEXT_TAGS = {"script", "style", "noscript", "template"}
+
+CACHE_STATS = {"hits": 0, "misses": 0, "joined": 0, "refetched": 0, "evicted": 0, "bytes": 0}
+_lock = threading.Lock()
+_pages = OrderedDict()  # url -> page record, least recently used first
+_inflight = {}          # url -> {"done": Event set when its fetch finishes, "text": wanted}
+_text_expected = set()  # urls whose body text a later stage will ask for
+_cache_bytes = 0
+
+
+class PageScanner(HTMLParser):
+    """
+    Incremental parser collecting everything the stages need in one pass:
+    head <meta> tags, rel=canonical, body image candidates and <p> text.
+    """
+
+    def __init__(self, text_limit: int = BODY_TEXT_CHARS, wants_text=lambda: False):
+        super().__init__(convert_charrefs=True)
+        self.meta = {}
+        self.canonical = None
+        self.images = []  # body <img>/<source> candidates: {"url", "origin", "width", "height"}
+        self.head_done = False
+        self.text_limit = text_limit
+        self.wants_text = wants_text  # checked on every chunk: a joiner may ask for text mid-read
+        self._text = []
+        self._text_len = 0
+        self._in_p = 0
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "meta":
+            attrs = dict(attrs)
+            key = (attrs.get("property") or attrs.get("name") or "").lower()
+            if key in META_KEYS and attrs.get("content"):
+                self.meta.setdefault(key, attrs["content"].strip())
+        elif tag == "link":
+            attrs = dict(attrs)
+            if "canonical" in (attrs.get("rel") or "").lower().split() and attrs.get("href"):
+                self.canonical = self.canonical or attrs["href"].strip()
+        elif tag == "body":
+            self.head_done = True
+        elif tag in ("img", "source") and self.head_done and len(self.images) < MAX_IMAGE_CANDIDATES:
+            self._add_images(tag, dict(attrs))
+        elif tag == "p":
+            self._in_p += 1
+        elif tag in SKIP_TEXT_TAGS:
+            self._skip += 1
+
+    def _add_images(self, tag: str, attrs: dict):
+        width, height = _int(attrs.get("width")), _int(attrs.get("height"))
+        src = attrs.get("src") or attrs.get("data-src")
+        if tag == "img" and src and not src.startswith("data:"):
+            self.images.append({"url": src.strip(), "origin": "img", "width": width, "height": height})
+        srcset = attrs.get("srcset") or attrs.get("data-srcset")
+        variant = pick_srcset_variant(srcset) if srcset else None
+        if variant:
+            self.images.append({"url": variant[0], "origin": "srcset", "width": variant[1], "height": None})
+
+    def handle_endtag(self, tag):
+        if tag == "head":
+            self.head_done = True
+        elif tag == "p" and self._in_p:
+            self._in_p -= 1
+            self._text.append("\n")
+        elif tag in SKIP_TEXT_TAGS and self._skip:
+            self._skip -= 1
+
+    def handle_data(self, data):
+        if self._in_p and not self._skip and self._text_len < self.text_limit:
+            self._text.append(data)
+            self._text_len += len(data)
+
+    @property
+    def text(self) -> str:
+        lines = (" ".join(line.split()) for line in "".join(self._text).split("\n"))
+        return "\n".join(line for line in lines if line)[:self.text_limit]
+
+    @property
+    def text_full(self) -> bool:
+        return self._text_len >= self.text_limit
+
+    @property
+    def done(self) -> bool:
+        """Nothing left worth reading: head parsed, an image candidate seen, and text if wanted."""
+        if not self.head_done:
+            return False
+        if not (self.images or any(self.meta.get(k) for k in IMAGE_META_KEYS)):
+            return False
+        return self.text_full or not self.wants_text()
+
+
+def _int(value) -> int | None:
+    try:
+        return int(str(value).strip().rstrip("px"))
+    except (TypeError, ValueError):
+        return None
+
+
+def pick_srcset_variant(srcset: str) -> tuple | None:
+    """
+    (url, width) of the srcset variant to consider: the smallest one at
+    least SRCSET_TARGET_WIDTH wide, else the widest. Width is None when
+    the srcset uses density (2x) descriptors.
+    """
+    variants = []
+    for part in srcset.split(","):
+        fields = part.split()
+        if not fields or fields[0].startswith("data:"):
+            continue
+        descriptor = fields[1] if len(fields) > 1 else ""
+        variants.append((fields[0], _int(descriptor[:-1]) if descriptor.endswith("w") else None))
+    if not variants:
+        return None
+    sized = [v for v in variants if v[1]]
+    if not sized:
+        return variants[-1]  # density descriptors are listed low to high
+    wide = [v for v in sized if v[1] >= SRCSET_TARGET_WIDTH]
+    return min(wide, key=lambda v: v[1]) if wide else max(sized, key=lambda v: v[1])
+
+
+def _image_candidates(base: str, scanner: PageScanner) -> list:
+    """Absolute, de-duplicated candidates: meta images first, then body images in page order."""
+    meta = scanner.meta
+    found = [
+        {"url": meta[key], "origin": key.split(":")[0] + ":image",
+         "width": _int(meta.get("og:image:width")) if key.startswith("og:") else None,
+         "height": _int(meta.get("og:image:height")) if key.startswith("og:") else None}
+        for key in IMAGE_META_KEYS if meta.get(key)
+    ] + scanner.images
+    candidates, seen = [], set()
+    for c in found:
+        url = _absolute(base, c["url"])
+        if url and url not in seen:
+            seen.add(url)
+            candidates.append({**c, "url": url})
+    return candidates
+
+
+def _absolute(base: str, url: str | None) -> str | None:
+    if not url:
+        return None
+    url = urljoin(base, url)
+    return url if url.startswith("http") else None
+
+
+def _record_size(page: dict) -> int:
+    return (len(page["text"]) + sum(len(v) for v in page["meta"].values())
+            + sum(len(c["url"]) + 64 for c in page["images"])
+            + len(page["url"]) + len(page.get("canonical") or "") + 256)
+
+
+def fetch_page(url: str, wants_text=lambda: True) -> dict:
+    """
+    Stream and parse one page (uncached). Never raises; see page["error"].
+    `wants_text()` says whether to read on for body text; page["partial_text"]
+    is set when reading stopped before the text was complete.
+    """
+    start = time.monotonic()
+    page = {
+        "url": url, "final_url": url, "canonical": None, "images": [],
+        "meta": {}, "text": "", "partial_text": False, "bytes": 0, "stopped": "eof", "error": None,
+    }
+    resp = None
+    try:
+        resp = http_client.get(url, stream=True, timeout=(http_client.CONNECT_TIMEOUT, 10))
+        resp.raise_for_status()
+    except Exception as e:
+        if resp is not None:
+            resp.close()  # an unread error body still holds a pooled connection
+        page["error"] = str(e)
+        print(f"[PAGE] Failed to fetch {url}: {e}")
+        return page
+
+    scanner = PageScanner(wants_text=wants_text)
+    decoder = codecs.getincrementaldecoder(resp.encoding or "utf-8")(errors="replace")
+    parse_time = 0.0
+    try:
+        for chunk in resp.iter_content(PAGE_CHUNK_SIZE):
+            page["bytes"] += len(chunk)
+            text = decoder.decode(chunk)
+            t0 = time.perf_counter()
+            scanner.feed(text)
+            parse_time += time.perf_counter() - t0
+            if scanner.done:
+                page["stopped"] = "enough"
+                break
+            if page["bytes"] > MAX_PAGE_BYTES:
+                page["stopped"] = "size cap"
+                break
+    except Exception as e:
+        print(f"[PAGE] Failed while reading {url}: {e}")
+        page["stopped"] = "error"
+    finally:
+        # Closing early drops the connection instead of draining the body
+        resp.close()
+
+    base = resp.url or url
+    page["final_url"] = base
+    page["meta"] = scanner.meta
+    page["canonical"] = _absolute(base, scanner.canonical or scanner.meta.get("og:url"))
+    page["images"] = _image_candidates(base, scanner)
+    page["text"] = scanner.text
+    page["partial_text"] = page["stopped"] == "enough" and not scanner.text_full
+    metrics.incr("bytes", page["bytes"], kind="article_page")
+    print(
+        f"[PAGE] Read {page['bytes']} B of {url}, parsed in {parse_time * 1000:.1f} ms "
+        f"(stopped: {page['stopped']})"
+    )
+    page["latency"] = round(time.monotonic() - start, 3)
+    return page
+
+
+def _fresh(page: dict) -> bool:
+    ttl = PAGE_CACHE_ERROR_TTL_SECONDS if page["error"] else PAGE_CACHE_TTL_MINUTES * 60
+    return time.time() - page["fetched_at"] < ttl
+
+
+def _store(url: str, page: dict):
+    global _cache_bytes
+    old = _pages.pop(url, None)
+    if old is not None:
+        _cache_bytes -= old["size"]
+    page["size"] = _record_size(page)
+    _pages[url] = page
+    _cache_bytes += page["size"]
+    while _cache_bytes > PAGE_CACHE_MAX_MB * 1024 * 1024 and len(_pages) > 1:
+        _, evicted = _pages.popitem(last=False)
+        _cache_bytes -= evicted["size"]
+        CACHE_STATS["evicted"] += 1
+
+
+def _usable(page: dict | None, text: bool) -> bool:
+    return page is not None and not (text and page["partial_text"])
+
+
+def get_page(url: str, text: bool = False) -> dict:
+    """
+    The parsed page for `url`: from cache, from a fetch already in flight,
+    or fetched now. With `text`, the record includes the body text.
+    """
+    while True:
+        with _lock:
+            page = _pages.get(url)
+            if _usable(page, text) and _fresh(page):
+                _pages.move_to_end(url)
+                CACHE_STATS["hits"] += 1
+                metrics.incr("page_cache", result="hits")
+                return page
+            pending = _inflight.get(url)
+            if pending is None:
+                pending = _inflight[url] = {"done": threading.Event(),
+                                            "text": text or url in _text_expected}
+                if page is not None and not _usable(page, text):
+                    CACHE_STATS["refetched"] += 1
+                    metrics.incr("page_cache", result="refetched")
+                else:
+                    CACHE_STATS["misses"] += 1
+                    metrics.incr("page_cache", result="misses")
+                break
+            pending["text"] = pending["text"] or text
+            CACHE_STATS["joined"] += 1
+            metrics.incr("page_cache", result="joined")
+        pending["done"].wait()
+        with _lock:
+            page = _pages.get(url)
+        if _usable(page, text):
+            return page  # fresh by construction: it was just stored
+        # else the fetch had stopped at the head before text was asked for: read again
+
+    try:
+        page = fetch_page(url, wants_text=lambda: pending["text"])
+        page["fetched_at"] = time.time()
+        with _lock:
+            _store(url, page)
+            CACHE_STATS["bytes"] += page["bytes"]
+            if not page["partial_text"]:
+                _text_expected.discard(url)
+        return page
+    finally:
+        with _lock:
+            _inflight.pop(url)["done"].set()
+
+
+def expect_text(urls: list):
+    """
+    Say that body text of `urls` will be asked for later, so the first
+    fetch of each (whichever stage makes it) reads the text too.
+    """
+    with _lock:
+        _text_expected.update(urls)
+
+
+def prefetch(urls: list, text: bool = False, max_workers: int = PREFETCH_WORKERS):
+    """Warm the cache for several pages concurrently (with body text if `text`)."""
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        list(pool.map(lambda url: get_page(url, text), urls))
+
+
+# ── Readers ───────────────────────────────────────────────────────
+def image_candidates(url: str) -> list:
+    """Every image the page offers (meta tags, <img>, srcset), best guesses first."""
+    return get_page(url)["images"]
+
+
+def canonical_url(url: str) -> str:
+    """rel=canonical (or og:url) of the page, resolved; falls back to the final URL."""
+    page = get_page(url)
+    return page["canonical"] or page["final_url"]
+
+
+def enrich_article(article: dict) -> dict:
+    """
+    Add the page's canonical URL and body text to an article in place.
+    The prompt gets real article text instead of only the RSS teaser.
+    """
+    page = get_page(article["link"], text=True)
+    if page["error"]:
+        return article
+    article["canonical"] = page["canonical"] or page["final_url"]
+    if page["text"]:
+        article["body"] = page["text"]
+    description = page["meta"].get("og:description") or page["meta"].get("description")
+    if description and len(description) > len(article.get("summary") or ""):
+        article["summary"] = description[:500]
+    return article
+
+
+def print_cache_stats():
+    with _lock:
+        fetches = CACHE_STATS["misses"] + CACHE_STATS["refetched"]
+        lookups = CACHE_STATS["hits"] + CACHE_STATS["joined"] + fetches
+        reused = lookups - fetches
+        ratio = reused / lookups if lookups else 0.0
+        print(
+            f"[PAGECACHE] hits={CACHE_STATS['hits']} joined={CACHE_STATS['joined']} "
+            f"misses={CACHE_STATS['misses']} refetched={CACHE_STATS['refetched']} evicted={CACHE_STATS['evicted']} "
+            f"hit_ratio={ratio:.0%} fetched={CACHE_STATS['bytes']} B "
+            f"({len(_pages)} pages, {_cache_bytes / 1024:.0f} KB)"
+        )
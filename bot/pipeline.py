@@ -0,0 +1,133 @@
+# bot/pipeline.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from bot import metrics
+
+# ── Stage-graph executor ──────────────────────────────────────────
+# Runs a run's stages as soon as their dependencies are done, so
+# independent work (image fetch, LLM generation, browser login) overlaps
+# and wall-clock time approaches the longest chain instead of the sum.
+
+
+class StageFailed(Exception):
+    def __init__(self, stage: str, error: Exception):
+        super().__init__(f"stage '{stage}' failed: {error}")
+        self.stage = stage
+        self.error = error
+
+
+class Cancelled(Exception):
+    """Raised by StageContext.check() once another stage has failed."""
+
+
+class Stage:
+    def __init__(self, name: str, fn, deps: tuple = (), cleanup=None):
+        """
+        fn(ctx) does the work and returns the stage result; ctx.results
+        holds the results of `deps`. cleanup(result) is called if the run
+        fails after this stage succeeded (e.g. to quit a browser).
+        """
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.cleanup = cleanup
+
+
+class StageContext:
+    def __init__(self, results: dict, cancel_event: threading.Event):
+        self.results = results
+        self.cancel_event = cancel_event
+
+    def check(self):
+        """Long-running stages call this between steps to stop early on failure."""
+        if self.cancel_event.is_set():
+            raise Cancelled()
+
+
+def run_stages(stages: list, max_workers: int | None = None) -> dict:
+    """
+    Execute `stages` respecting their dependencies. Returns
+    {stage name: result}. On the first failure no new stages start,
+    queued ones are cancelled, running ones stop at their next
+    ctx.check(), cleanups run for finished stages, and StageFailed is
+    raised.
+    """
+    by_name = {s.name: s for s in stages}
+    for s in stages:
+        missing = [d for d in s.deps if d not in by_name]
+        if missing:
+            raise ValueError(f"stage '{s.name}' depends on unknown {missing}")
+
+    results = {}
+    timings = {}
+    cancel_event = threading.Event()
+    pending = list(stages)
+    running = {}
+    failure = None
+    start = time.monotonic()
+    parent_span = metrics.current_span_id()
+
+    def run(stage):
+        if cancel_event.is_set():
+            raise Cancelled()
+        t0 = time.monotonic()
+        try:
+            ctx = StageContext({d: results[d] for d in stage.deps}, cancel_event)
+            with metrics.span(f"stage.{stage.name}", parent=parent_span):
+                return stage.fn(ctx)
+        except Cancelled:
+            raise
+        except Exception:
+            # Set here, not when the main loop gets to it: this worker
+            # thread picks up the next queued stage as soon as it returns
+            cancel_event.set()
+            raise
+        finally:
+            timings[stage.name] = time.monotonic() - t0
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(stages) or 1) as pool:
+        while pending or running:
+            if failure is None:
+                for stage in [s for s in pending if all(d in results for d in s.deps)]:
+                    pending.remove(stage)
+                    running[pool.submit(run, stage)] = stage
+            if not running:
+                break  # failed, or a dependency cycle left stages unschedulable
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                if future.cancelled():
+                    continue
+                try:
+                    results[stage.name] = future.result()
+                    print(f"[PIPELINE] {stage.name} done in {timings[stage.name]:.2f}s")
+                except Exception as e:
+                    if failure is None and not isinstance(e, Cancelled):
+                        failure = StageFailed(stage.name, e)
+                        print(f"[PIPELINE] {stage.name} failed after "
+                              f"{timings[stage.name]:.2f}s: {e} — cancelling run")
+                        cancel_event.set()
+                        for queued in list(running):
+                            if queued.cancel():  # only succeeds if it never started
+                                print(f"[PIPELINE] {running[queued].name} cancelled before starting")
+
+    if failure is None and pending:
+        failure = StageFailed(pending[0].name, RuntimeError("unsatisfiable dependencies"))
+
+    elapsed = time.monotonic() - start
+    print(f"[PIPELINE] Wall clock {elapsed:.2f}s vs {sum(timings.values()):.2f}s "
+          f"of stage time")
+
+    if failure is not None:
+        for name, result in results.items():
+            stage = by_name[name]
+            if stage.cleanup is not None:
+                try:
+                    stage.cleanup(result)
+                except Exception as e:
+                    print(f"[PIPELINE] Cleanup of {name} failed: {e}")
+        raise failure
+    return results
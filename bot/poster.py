@@ -1,17 +1,27 @@
 # bot/poster.py
 import os
+import re
 import time
 import shutil
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from dotenv import load_dotenv
 
+from bot import browser_profile, debug_capture, metrics, session_store, waits
+from bot.tweet_text import truncate_to_weight
+
 load_dotenv()
 
+X_BASE_URL = os.environ.get("X_BASE_URL", "https://x.com").rstrip("/")
+# Optional persistent Chrome profile; keeps cookies/local storage between runs
+CHROME_PROFILE_DIR = os.environ.get("X_CHROME_PROFILE_DIR")
+SESSION_PROBE_TIMEOUT = 10
+LOGGED_IN_SELECTOR = (
+    '[data-testid="SideNav_NewTweet_Button"], [data-testid="AppTabBar_Home_Link"]'
+)
+
 
 def get_driver():
     options = Options()
@@ -19,11 +29,13 @@ def get_driver():
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
     options.add_argument("--disable-gpu")
-    options.add_argument("--window-size=1920,1080")
+    browser_profile.configure_options(options)
     options.add_argument("--disable-blink-features=AutomationControlled")
     options.add_argument("--disable-extensions")
     options.add_argument("--dns-prefetch-disable")
     options.add_argument("--disable-web-security")
+    if CHROME_PROFILE_DIR:
+        options.add_argument(f"--user-data-dir={os.path.abspath(CHROME_PROFILE_DIR)}")
     options.add_experimental_option("excludeSwitches", ["enable-automation"])
     options.add_experimental_option("useAutomationExtension", False)
     options.add_argument(
@@ -41,6 +53,7 @@ def get_driver():
             Object.defineProperty(navigator, 'languages', {get: () => ['en-US', 'en']});
         """
     })
+    browser_profile.apply_resource_policy(driver)
     return driver
 
 
@@ -50,237 +63,506 @@ def js_click(driver, element):
 
 
 def js_type(driver, element, text):
-    """Type text using JavaScript — avoids stale element issues."""
+    """Focus element and type text in one send_keys call."""
     driver.execute_script("arguments[0].focus();", element)
-    for char in text:
-        element.send_keys(char)
-        time.sleep(0.05)
+    element.send_keys(text)
 
 
 def wait_and_find(driver, css, timeout=30):
     """Wait for element and return it fresh."""
-    WebDriverWait(driver, timeout).until(
-        EC.presence_of_element_located((By.CSS_SELECTOR, css))
+    return waits.present(driver, css, f"find {css}", timeout)
+
+
+def find_button(driver, label):
+    """Button whose visible text is `label`, or None."""
+    found = driver.find_elements(
+        By.XPATH,
+        f'//span[text()="{label}"]/ancestor::button | //div[@role="button"][.//span[text()="{label}"]]'
     )
-    time.sleep(1.5)
-    return driver.find_element(By.CSS_SELECTOR, css)
+    return found[0] if found else None
 
 
+@metrics.traced()
 def login_to_x(driver):
     username = os.environ["X_USERNAME"]
     password = os.environ["X_PASSWORD"]
 
     print("[SELENIUM] Loading X login...")
-    driver.get("https://x.com/i/flow/login")
-    time.sleep(8)
+    browser_profile.load(driver, f"{X_BASE_URL}/i/flow/login")
 
     # ── Username ──────────────────────────────────────────
     print("[SELENIUM] Typing username...")
     try:
-        WebDriverWait(driver, 15).until(
-            EC.presence_of_element_located(
-                (By.CSS_SELECTOR, 'input[autocomplete="username"]')
-            )
-        )
-        time.sleep(3)
-        el = driver.find_element(By.CSS_SELECTOR, 'input[autocomplete="username"]')
+        el = waits.clickable(driver, 'input[autocomplete="username"]', "login: username field", 20)
         js_click(driver, el)
-        time.sleep(1)
         # Clear field first
         driver.execute_script("arguments[0].value = '';", el)
-        # Type username
-        for char in username:
-            el.send_keys(char)
-            time.sleep(0.1)
-        time.sleep(2)
-        driver.save_screenshot("/tmp/s1_username_typed.png")
+        el.send_keys(username)
+        debug_capture.snapshot(driver, "login: username typed")
 
         # ── Click Next using XPATH text match ────────────
-        try:
-            next_btn = driver.find_element(
-                By.XPATH,
-                '//span[text()="Next"]/ancestor::button | //div[@role="button"][.//span[text()="Next"]]'
-            )
+        next_btn = find_button(driver, "Next")
+        if next_btn:
             js_click(driver, next_btn)
             print("[SELENIUM] Clicked Next via XPATH")
-        except Exception:
+        else:
             print("[SELENIUM] XPATH Next failed, trying Enter key")
             el.send_keys("\n")
 
     except Exception as e:
-        driver.save_screenshot("/tmp/s1_fail.png")
+        debug_capture.failure(driver, "login: username", e)
         raise Exception(f"Username step failed: {e}")
 
-    time.sleep(6)
-    driver.save_screenshot("/tmp/s2_after_next.png")
-    print(f"[SELENIUM] URL after Next: {driver.current_url}")
-    print(f"[SELENIUM] Page title after Next: {driver.title}")
-
-    # ── Extra verification step ───────────────────────────
+    # Next leads either to the password field or to an extra verification prompt
     try:
-        extra = driver.find_element(
-            By.CSS_SELECTOR, 'input[data-testid="ocfEnterTextTextInput"]'
+        sel, _ = waits.first_present(
+            driver,
+            ['input[type="password"]', 'input[data-testid="ocfEnterTextTextInput"]'],
+            "login: after next", 20,
         )
+    except Exception:
+        sel = None
+    debug_capture.snapshot(driver, "login: after next")
+    print(f"[SELENIUM] After Next: {sel or 'neither password nor verification field'}")
+
+    # ── Extra verification step ───────────────────────────
+    if sel == 'input[data-testid="ocfEnterTextTextInput"]':
+        extra = driver.find_element(By.CSS_SELECTOR, sel)
         print("[SELENIUM] Extra verification, entering username...")
         js_type(driver, extra, username)
         extra.send_keys("\n")
-        time.sleep(4)
-    except Exception:
+    else:
         print("[SELENIUM] No extra verification needed")
 
     # ── Password ──────────────────────────────────────────
     print("[SELENIUM] Looking for password field...")
-    driver.save_screenshot("/tmp/s3_before_password.png")
+    debug_capture.snapshot(driver, "login: before password")
 
     try:
-        WebDriverWait(driver, 15).until(
-            EC.presence_of_element_located(
-                (By.XPATH, '//input[@type="password"]')
-            )
-        )
-        time.sleep(2)
-        pw_el = driver.find_element(By.XPATH, '//input[@type="password"]')
+        pw_el = waits.clickable(driver, 'input[type="password"]', "login: password field", 20)
         print("[SELENIUM] ✅ Found password field!")
         js_click(driver, pw_el)
-        time.sleep(1)
-        for char in password:
-            pw_el.send_keys(char)
-            time.sleep(0.1)
-        time.sleep(2)
-        driver.save_screenshot("/tmp/s4_password_typed.png")
+        pw_el.send_keys(password)
+        debug_capture.snapshot(driver, "login: password typed")
 
         # Click Log in button
-        try:
-            login_btn = driver.find_element(
-                By.XPATH,
-                '//span[text()="Log in"]/ancestor::button | //div[@role="button"][.//span[text()="Log in"]]'
-            )
+        login_btn = find_button(driver, "Log in")
+        if login_btn:
             js_click(driver, login_btn)
             print("[SELENIUM] Clicked Log in button")
-        except Exception:
+        else:
             print("[SELENIUM] Log in button not found, pressing Enter")
             pw_el.send_keys("\n")
 
     except Exception as e:
-        driver.save_screenshot("/tmp/s3_password_fail.png")
-        print("[SELENIUM] Page source:")
-        print(driver.page_source[:2000])
+        debug_capture.failure(driver, "login: password", e)
         raise Exception(f"Password step failed: {e}")
 
-    time.sleep(8)
-    driver.save_screenshot("/tmp/s5_final.png")
+    try:
+        waits.url_leaves(driver, ("login", "flow"), "login: redirect home", 30)
+    except Exception:
+        pass  # reported below
     print(f"[SELENIUM] Final URL: {driver.current_url}")
 
     if "login" in driver.current_url or "flow" in driver.current_url:
+        debug_capture.failure(driver, "login: redirect home")
         raise Exception(f"Login failed. Still at: {driver.current_url}")
+    debug_capture.snapshot(driver, "login: done")
 
     print("[SELENIUM] ✅ Logged in!")
 
-def post_single_tweet(driver, text, image_path=None):
-    """Post one tweet via compose page."""
-    print("[SELENIUM] Opening compose page...")
-    driver.get("https://x.com/compose/tweet")
-    time.sleep(6)
-
-    # ── Find tweet box using multiple strategies ──────────
-    tweet_box = None
-    selectors = [
-        '[data-testid="tweetTextarea_0"]',
-        '.public-DraftEditor-content',
-        '[contenteditable="true"]',
-        'div[role="textbox"]',
-    ]
-
-    for sel in selectors:
-        try:
-            WebDriverWait(driver, 8).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, sel))
-            )
-            time.sleep(2)
-            tweet_box = driver.find_element(By.CSS_SELECTOR, sel)
-            print(f"[SELENIUM] Found tweet box with: {sel}")
-            break
-        except Exception:
-            continue
-
-    if not tweet_box:
-        driver.save_screenshot("/tmp/s4_no_tweetbox.png")
-        raise Exception("Could not find tweet box")
 
-    # ── Type tweet using JavaScript ───────────────────────
+def session_is_valid(driver) -> bool:
+    """Cheap probe: load the home timeline and see whether X lets us in."""
+    browser_profile.load(driver, f"{X_BASE_URL}/home")
+    try:
+        waits.wait_for(
+            driver,
+            lambda d: "login" in d.current_url
+            or "flow" in d.current_url
+            or d.find_elements(By.CSS_SELECTOR, LOGGED_IN_SELECTOR),
+            "session: probe", SESSION_PROBE_TIMEOUT,
+        )
+    except Exception:
+        return False
+    return "login" not in driver.current_url and "flow" not in driver.current_url
+
+
+def restore_session(driver) -> bool:
+    """Load saved cookies into the browser and probe them. True if logged in."""
+    cookies = session_store.load_cookies()
+    if cookies:
+        # Cookies can only be set for the domain currently loaded
+        browser_profile.load(driver, f"{X_BASE_URL}/robots.txt")
+        for cookie in cookies:
+            if cookie.get("sameSite") not in ("Strict", "Lax", "None"):
+                cookie.pop("sameSite", None)
+            try:
+                driver.add_cookie(cookie)
+            except Exception as e:
+                print(f"[SESSION] Skipped cookie {cookie.get('name')}: {e}")
+    elif not CHROME_PROFILE_DIR:
+        return False  # nothing to restore
+
+    start = time.monotonic()
+    if session_is_valid(driver):
+        print(f"[SESSION] ✅ Restored session ({time.monotonic() - start:.1f}s probe)")
+        return True
+    print("[SESSION] Saved session expired")
+    session_store.clear_session()
+    return False
+
+
+def ensure_logged_in(driver, checkpoint=None):
+    """
+    Reuse the saved session if it's still valid, else run the login flow.
+    `checkpoint()` is called before the full login (it raises to stop).
+    """
+    if restore_session(driver):
+        return
+    if checkpoint is not None:
+        checkpoint()
+    login_to_x(driver)
+    session_store.save_cookies(driver.get_cookies())
+    print(f"[SESSION] Saved session to {session_store.SESSION_PATH}")
+
+
+TWEET_BOX_SELECTORS = [
+    '[data-testid="tweetTextarea_0"]',
+    '.public-DraftEditor-content',
+    '[contenteditable="true"]',
+    'div[role="textbox"]',
+]
+# The compose modal's button ("Post" / "Post all") first: the home timeline
+# behind the modal can also render an (empty, disabled) inline composer
+POST_BUTTON_SELECTORS = [
+    '[data-testid="tweetButton"]',
+    '[data-testid="tweetButtonInline"]',
+]
+
+
+ADD_TWEET_SELECTOR = '[data-testid="addButton"]'
+TOAST_SELECTOR = '[data-testid="toast"]'
+STATUS_ID_RE = re.compile(r"/status/(\d+)")
+TIMELINE_SELECTORS = ['article a[href*="/status/"]', '[data-testid="emptyState"]']
+TWITTER_EPOCH_MS = 1288834974657  # status IDs are snowflakes: (ms since this) << 22
+CLOCK_SKEW_SECONDS = 120
+URL_RE = re.compile(r"https?://\S+")
+MATCH_WORD_RE = re.compile(r"[a-z0-9]+")
+MATCH_CHARS = 60
+
+# Our newest posts as (status url, text, social context). X renders emoji as
+# <img alt>, which element.text drops, so the text is rebuilt with the alts.
+PROFILE_POSTS_JS = """
+const walk = el => Array.from(el.childNodes).map(n =>
+    n.nodeType === Node.TEXT_NODE ? n.nodeValue : n.tagName === 'IMG' ? (n.alt || '') : walk(n)).join('');
+return Array.from(document.querySelectorAll('article')).slice(0, arguments[0]).map(a => {
+    const time = a.querySelector('a[href*="/status/"] time');
+    const link = time ? time.closest('a') : a.querySelector('a[href*="/status/"]');
+    const text = a.querySelector('[data-testid="tweetText"]');
+    return [link ? link.href : '', text ? walk(text) : a.innerText,
+            !!a.querySelector('[data-testid="socialContext"]')];
+});
+"""
+
+
+class ThreadComposerUnavailable(Exception):
+    """The compose dialog has no "add another post" control."""
+
+
+def fill_tweet_box(driver, tweet_box, text):
+    """Put `text` into a compose box so X registers it."""
     js_click(driver, tweet_box)
-    time.sleep(1)
     # Use JS to set text content directly
     driver.execute_script(
         "arguments[0].innerText = arguments[1];",
         tweet_box, text
     )
-    time.sleep(1)
     # Trigger input event so X registers the text
     driver.execute_script("""
         arguments[0].dispatchEvent(new Event('input', {bubbles: true}));
         arguments[0].dispatchEvent(new Event('change', {bubbles: true}));
     """, tweet_box)
-    time.sleep(2)
 
-    # ── Attach image if available ─────────────────────────
-    if image_path and os.path.exists(image_path):
-        try:
-            file_input = driver.find_element(
-                By.CSS_SELECTOR, 'input[accept*="image"]'
-            )
-            file_input.send_keys(os.path.abspath(image_path))
-            time.sleep(5)
-            print("[SELENIUM] Image attached!")
-        except Exception as e:
-            print(f"[SELENIUM] Image skipped: {e}")
-
-    # ── Click Post button ─────────────────────────────────
-    post_selectors = [
-        '[data-testid="tweetButtonInline"]',
-        '[data-testid="tweetButton"]',
-    ]
-    posted = False
-    for sel in post_selectors:
-        try:
-            btn = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, sel))
-            )
-            time.sleep(1)
-            btn = driver.find_element(By.CSS_SELECTOR, sel)
-            js_click(driver, btn)
-            time.sleep(5)
-            print("[SELENIUM] ✅ Tweet posted!")
-            posted = True
-            break
-        except Exception:
-            continue
 
-    if not posted:
-        driver.save_screenshot("/tmp/s5_no_postbtn.png")
+def attach_image(driver, image_path):
+    """Attach an image to the compose dialog (first file input = first tweet)."""
+    if not image_path or not os.path.exists(image_path):
+        return
+    try:
+        file_input = driver.find_element(
+            By.CSS_SELECTOR, 'input[accept*="image"]'
+        )
+        file_input.send_keys(os.path.abspath(image_path))
+        waits.present(driver, '[data-testid="attachments"]', "compose: image preview", 20)
+        print("[SELENIUM] Image attached!")
+    except Exception as e:
+        print(f"[SELENIUM] Image skipped: {e}")
+
+
+def open_composer(driver, url):
+    """Load a compose URL and return its (first) tweet box."""
+    browser_profile.load(driver, url)
+    try:
+        sel, tweet_box = waits.first_present(
+            driver, TWEET_BOX_SELECTORS, "compose: tweet box", 30
+        )
+        print(f"[SELENIUM] Found tweet box with: {sel}")
+        return tweet_box
+    except Exception as e:
+        debug_capture.failure(driver, "compose: tweet box", e)
+        raise Exception("Could not find tweet box")
+
+
+def submit_composer(driver, on_submit=None):
+    """
+    Click Post / Post all once enabled and wait for X to accept it.
+    `on_submit` is called just before the click (to journal the attempt).
+    """
+    # The button only becomes enabled once X has registered the text and
+    # finished any media upload, so clickable == ready to post
+    try:
+        sel, _ = waits.first_present(driver, POST_BUTTON_SELECTORS, "compose: post button", 15)
+        btn = waits.clickable(driver, sel, "compose: post enabled", 30)
+    except Exception as e:
+        debug_capture.failure(driver, "compose: post button", e)
         raise Exception("Could not find Post button")
 
+    if on_submit is not None:
+        on_submit()
+    js_click(driver, btn)
+    # Posted once the composer goes away or X shows its "sent" toast. Not
+    # adaptive: the click may already have landed, and timing out early
+    # here turns one slow confirm into a failed (and retried) post.
+    waits.wait_for(
+        driver,
+        lambda d: not d.find_elements(By.CSS_SELECTOR, sel)
+        or d.find_elements(By.CSS_SELECTOR, TOAST_SELECTOR),
+        "compose: post confirmed", 20, adaptive=False,
+    )
+
 
-def post_tweet_thread(tweets: list, image_path: str = None) -> bool:
+def status_time(status_id: str) -> float:
+    """Creation time (epoch seconds) encoded in a status ID."""
+    return ((int(status_id) >> 22) + TWITTER_EPOCH_MS) / 1000
+
+
+def profile_posts(driver, depth: int = 10) -> list:
+    """
+    (status id, text) of our `depth` newest posts and replies, pinned posts
+    and reposts left out. Raises if the timeline doesn't load.
+    """
+    browser_profile.load(driver, f"{X_BASE_URL}/{os.environ['X_USERNAME']}/with_replies")
+    waits.first_present(driver, TIMELINE_SELECTORS, "profile: timeline", 20)
+    posts = []
+    for href, text, labelled in driver.execute_script(PROFILE_POSTS_JS, depth):
+        match = STATUS_ID_RE.search(href or "")
+        if match and not labelled:
+            posts.append((match.group(1), text))
+    return posts
+
+
+def latest_status_id(driver) -> str | None:
+    """ID of the tweet just posted: from the "View" link in X's toast, else the profile."""
+    for link in driver.find_elements(By.CSS_SELECTOR, f'{TOAST_SELECTOR} a[href*="/status/"]'):
+        match = STATUS_ID_RE.search(link.get_attribute("href") or "")
+        if match:
+            return match.group(1)
+    try:
+        posts = profile_posts(driver, depth=3)
+    except Exception:
+        return None
+    return posts[0][0] if posts else None
+
+
+@metrics.traced()
+def post_single_tweet(driver, text, image_path=None, reply_to=None, on_submit=None):
+    """Post one tweet via compose page, optionally as a reply to status `reply_to`."""
+    print("[SELENIUM] Opening compose page...")
+    if reply_to:
+        url = f"{X_BASE_URL}/intent/post?in_reply_to={reply_to}"
+    else:
+        url = f"{X_BASE_URL}/compose/tweet"
+    tweet_box = open_composer(driver, url)
+    fill_tweet_box(driver, tweet_box, text)
+    attach_image(driver, image_path)
+    submit_composer(driver, on_submit)
+    print("[SELENIUM] ✅ Tweet posted!")
+
+
+@metrics.traced()
+def compose_thread(driver, tweets, image_path=None, on_submit=None) -> list:
+    """
+    Fill the whole thread into one compose dialog via "add another post"
+    and submit it once, so it goes out as a real reply chain.
+    Returns per-tweet fill timings in seconds.
+    Raises ThreadComposerUnavailable (before anything is posted) if the
+    add control can't be found.
+    """
+    timings = []
+    start = time.monotonic()
+    tweet_box = open_composer(driver, f"{X_BASE_URL}/compose/tweet")
+    fill_tweet_box(driver, tweet_box, tweets[0])
+    attach_image(driver, image_path)
+    timings.append(time.monotonic() - start)
+
+    for i, text in enumerate(tweets[1:], 1):
+        start = time.monotonic()
+        try:
+            add_btn = waits.clickable(driver, ADD_TWEET_SELECTOR, "thread: add button", 10)
+        except Exception:
+            raise ThreadComposerUnavailable("no 'add another post' control")
+        js_click(driver, add_btn)
+        box = waits.present(driver, f'[data-testid="tweetTextarea_{i}"]', "thread: new box", 10)
+        fill_tweet_box(driver, box, text)
+        timings.append(time.monotonic() - start)
+
+    submit_composer(driver, on_submit)
+    print(f"[SELENIUM] ✅ Thread of {len(tweets)} posted in one compose")
+    return timings
+
+
+def post_reply_chain(driver, tweets, image_path=None, journal=None) -> list:
+    """
+    Fallback: post each tweet as a reply to the previous one. Returns
+    per-tweet timings. With a RunJournal, tweets it already records as
+    posted are skipped and each new one is recorded as it goes out.
+    """
+    timings = []
+    posted = journal.posted() if journal else []
+    reply_to = posted[-1] if posted else None
+    if posted and reply_to is None:
+        reply_to = latest_status_id(driver)
+    for i in range(len(posted), len(tweets)):
+        print(f"\n[SELENIUM] Posting tweet {i+1}/{len(tweets)}...")
+        start = time.monotonic()
+        on_submit = (lambda i=i: journal.record_submit(i)) if journal else None
+        post_single_tweet(driver, tweets[i], image_path if i == 0 else None, reply_to, on_submit)
+        if journal:
+            journal.record_posted(1)
+        timings.append(time.monotonic() - start)
+        if i < len(tweets) - 1:
+            reply_to = latest_status_id(driver)
+            if not reply_to:
+                print("[SELENIUM] Could not find the posted tweet, next one goes out unlinked")
+            elif journal:
+                journal.set_last_status_id(reply_to)
+    return timings
+
+
+def _match_text(text: str) -> str:
+    """Comparable form of tweet text: links, emoji and punctuation dropped, lowercased."""
+    return " ".join(MATCH_WORD_RE.findall(URL_RE.sub(" ", text).lower()))
+
+
+def find_on_profile(driver, text: str, since: float | None = None, depth: int = 10) -> str | None:
+    """
+    Status ID of our post that starts like `text`, or None if it isn't there.
+    With `since` (when Post was clicked), older posts don't count: the
+    status ID says when each post was created.
+    Raises if the timeline can't be read: "unknown" must not become "not posted".
+    """
+    snippet = _match_text(text.split("\n", 1)[0])[:MATCH_CHARS]
+    for status_id, shown in profile_posts(driver, depth):
+        if since is not None and status_time(status_id) < since - CLOCK_SKEW_SECONDS:
+            continue
+        if snippet and snippet in _match_text(shown):
+            return status_id
+    return None
+
+
+def resume_pending_submit(driver, tweets: list, journal):
+    """
+    Settle a Post click from a crashed run: count it if it landed, else
+    retry it. If the profile can't tell, this raises and the click stays
+    pending for the next run instead of being posted twice.
+    """
+    pending = journal.pending_submit()
+    if pending is None:
+        return
+    last = pending["index"] + pending["count"] - 1  # a compose-dialog thread lands whole
+    status_id = find_on_profile(driver, tweets[last], pending.get("at"))
+    if status_id:
+        print(f"[SELENIUM] Tweet {last + 1} went out before the crash ({status_id}), not reposting")
+        journal.record_posted(pending["count"], status_id)
+    else:
+        journal.clear_pending()
+
+
+@metrics.traced()
+def open_session(checkpoint=None):
+    """
+    Launch Chrome and log in; returns the ready driver (quit on failure).
+    `checkpoint()` is called before each slow step and may raise to stop.
+    """
+    if checkpoint is not None:
+        checkpoint()
     driver = get_driver()
     try:
-        login_to_x(driver)
+        if checkpoint is not None:
+            checkpoint()
+        ensure_logged_in(driver, checkpoint)
+    except Exception:
+        driver.quit()
+        raise
+    return driver
+
 
-        for i, tweet_text in enumerate(tweets):
-            print(f"\n[SELENIUM] Posting tweet {i+1}/{len(tweets)}...")
-            img = image_path if i == 0 else None
-            post_single_tweet(driver, tweet_text[:280], img)
-            if i < len(tweets) - 1:
-                time.sleep(5)
+def post_tweet_thread(tweets: list, image_path: str = None, driver=None,
+                      keep_open: bool = False, journal=None) -> bool:
+    """
+    Post `tweets` as a thread. Pass a driver from open_session() to reuse
+    an already logged-in browser. The driver is quit afterwards unless
+    keep_open is set, in which case the caller owns it.
+    With a RunJournal, progress is recorded per Post click and a resumed
+    run only posts the tweets that are not on X yet.
+    """
+    try:
+        if driver is None:
+            driver = open_session()
+    except Exception as e:
+        print(f"[SELENIUM] Fatal: {e}")
+        waits.print_timing_report()
+        waits.save_history()
+        return False
 
+    try:
+        tweets = [truncate_to_weight(t) for t in tweets]
+        if journal:
+            resume_pending_submit(driver, tweets, journal)
+        already = len(journal.posted()) if journal else 0
+
+        if already >= len(tweets):
+            print("[SELENIUM] Whole thread already posted")
+            timings = []
+        elif already:
+            print(f"[SELENIUM] Resuming thread at tweet {already + 1}/{len(tweets)}")
+            timings = post_reply_chain(driver, tweets, image_path, journal)
+        else:
+            try:
+                on_submit = (lambda: journal.record_submit(0, len(tweets))) if journal else None
+                timings = compose_thread(driver, tweets, image_path, on_submit)
+                if journal:
+                    journal.record_posted(len(tweets))
+            except ThreadComposerUnavailable as e:
+                print(f"[SELENIUM] Thread composer unavailable ({e}), falling back to replies")
+                timings = post_reply_chain(driver, tweets, image_path, journal)
+
+        for i, seconds in enumerate(timings, 1):
+            print(f"[SELENIUM] Tweet {i} filled in {seconds:.2f}s")
         return True
 
     except Exception as e:
         print(f"[SELENIUM] Fatal: {e}")
         try:
-            driver.save_screenshot("/tmp/fatal_error.png")
+            debug_capture.failure(driver, "post thread", e)
         except Exception:
             pass
         return False
     finally:
-        driver.quit()
+        waits.print_timing_report()
+        waits.save_history()
+        browser_profile.print_report(driver)
+        debug_capture.finish()
+        if not keep_open:
+            driver.quit()
@@ -0,0 +1,223 @@
+# bot/ranker.py
+import os
+import re
+import time
+
+import numpy as np
+
+# ── Article ranking ───────────────────────────────────────────────
+# Every candidate gets a weighted sum of normalised features, computed
+# for the whole batch at once:
+#   recency   — exponential decay on article age
+#   source    — per-outlet priority
+#   relevance — TF-IDF weighted keyword hits in title + summary
+#   cluster   — how many outlets are covering the same story
+#   trend     — burst score of the article's hottest term over the last
+#               hours of every feed entry seen (bot.trends, set by the fetcher)
+RANK_WEIGHTS = {
+    "recency": 1.0,
+    "source": 0.5,
+    "relevance": 0.8,
+    "cluster": 0.7,
+    "trend": 0.6,
+}
+RECENCY_HALF_LIFE_HOURS = 6
+UNDATED_AGE_HOURS = 12  # articles without a date are treated as this old
+
+# Matched as case-insensitive substrings of the feed title
+SOURCE_PRIORITY = {
+    "techcrunch": 1.0,
+    "the verge": 0.9,
+    "ars technica": 0.9,
+    "wired": 0.8,
+    "venturebeat": 0.7,
+    "hacker news": 0.6,
+}
+DEFAULT_SOURCE_PRIORITY = 0.5
+
+KEYWORDS = {
+    "ai": 1.0, "openai": 1.0, "anthropic": 1.0, "gemini": 0.9, "chatgpt": 0.9,
+    "llm": 0.9, "gpt": 0.9, "nvidia": 0.8, "apple": 0.8, "google": 0.7,
+    "microsoft": 0.7, "meta": 0.6, "iphone": 0.7, "android": 0.6, "chip": 0.6,
+    "launch": 0.5, "release": 0.5, "acquire": 0.6, "acquisition": 0.6,
+    "funding": 0.5, "raise": 0.4, "breach": 0.7, "hack": 0.6, "outage": 0.6,
+    "leak": 0.6, "lawsuit": 0.5, "open source": 0.6, "startup": 0.4,
+}
+
+KEYWORD_LIST = list(KEYWORDS)
+KEYWORD_WEIGHTS = np.array([KEYWORDS[k] for k in KEYWORD_LIST], dtype=np.float64)
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _surface_forms(keyword: str) -> list:
+    # "raise" -> raises/raised, "launch" -> launches/launched/launching
+    if keyword.endswith("e"):
+        return [keyword, keyword + "s", keyword + "d"]
+    return [keyword, keyword + "s", keyword + "es", keyword + "ed", keyword + "ing"]
+
+
+# Single-word keywords are matched with one C-level set intersection
+# per document; the few multi-word ones with a substring check
+KEYWORD_FORMS = {
+    form: i
+    for i, k in enumerate(KEYWORD_LIST) if " " not in k
+    for form in _surface_forms(k)
+}
+KEYWORD_FORM_SET = frozenset(KEYWORD_FORMS)
+PHRASE_KEYWORDS = [(i, k) for i, k in enumerate(KEYWORD_LIST) if " " in k]
+
+
+def keyword_hits(article: dict) -> tuple:
+    """
+    (keyword indices present, word count) for an article's title + summary.
+    Text only changes when the article does, so the result is memoised on
+    the article and re-ranking the same pool is pure array work.
+    """
+    cached = article.get("_kw")
+    if cached is None:
+        text = f"{article.get('title', '')} {article.get('summary', '')}".lower()
+        words = WORD_RE.findall(text)
+        hits = {KEYWORD_FORMS[w] for w in KEYWORD_FORM_SET.intersection(words)}
+        hits.update(i for i, phrase in PHRASE_KEYWORDS if phrase in text)
+        cached = article["_kw"] = (tuple(hits), len(words) or 1)
+    return cached
+
+
+def load_weights() -> dict:
+    """
+    RANK_WEIGHTS, optionally overridden by the RANK_WEIGHTS env var,
+    e.g. RANK_WEIGHTS="recency=1.5,cluster=1".
+    """
+    weights = dict(RANK_WEIGHTS)
+    for part in os.environ.get("RANK_WEIGHTS", "").split(","):
+        if "=" not in part:
+            continue
+        name, value = part.split("=", 1)
+        name = name.strip()
+        if name in weights:
+            weights[name] = float(value)
+        else:
+            print(f"[RANKER] Unknown weight '{name}' in RANK_WEIGHTS, ignored")
+    return weights
+
+
+def source_priority(source: str) -> float:
+    source = (source or "").lower()
+    for name, priority in SOURCE_PRIORITY.items():
+        if name in source:
+            return priority
+    return DEFAULT_SOURCE_PRIORITY
+
+
+def _normalise(col: np.ndarray) -> np.ndarray:
+    """Scale a feature column to [0, 1]."""
+    top = col.max() if col.size else 0.0
+    return col / top if top > 0 else np.zeros_like(col)
+
+
+def feature_matrix(articles: list, now: float | None = None) -> tuple:
+    """
+    Build the (N, F) matrix of normalised features for a batch.
+    Returns (features, feature_names).
+    """
+    now = now if now is not None else time.time()
+    n = len(articles)
+    k = len(KEYWORD_LIST)
+
+    ages, sources, clusters, lengths, trends = [], [], [], [], []
+    hit_rows, hit_cols = [], []  # sparse keyword hits, densified with bincount
+
+    source_cache = {}
+    for i, a in enumerate(articles):
+        ts = a.get("published_ts")
+        ages.append((now - ts) / 3600 if ts else UNDATED_AGE_HOURS)
+        src = a.get("source", "")
+        if src not in source_cache:
+            source_cache[src] = source_priority(src)
+        sources.append(source_cache[src])
+        clusters.append(a.get("cluster_size", 1))
+        trends.append(a.get("trend_score", 0.0))
+
+        hits, length = keyword_hits(a)
+        lengths.append(length)
+        hit_rows.extend([i] * len(hits))
+        hit_cols.extend(hits)
+
+    ages = np.array(ages, dtype=np.float64)
+    sources = np.array(sources, dtype=np.float64)
+    clusters = np.array(clusters, dtype=np.float64)
+    trends = np.array(trends, dtype=np.float64)
+    lengths = np.array(lengths, dtype=np.float64)
+    flat = np.array(hit_rows, dtype=np.int64) * k + np.array(hit_cols, dtype=np.int64)
+    counts = np.bincount(flat, minlength=n * k).reshape(n, k).astype(np.float64)
+
+    # Recency: 1.0 now, 0.5 after one half-life
+    recency = np.exp2(-np.clip(ages, 0, None) / RECENCY_HALF_LIFE_HOURS)
+
+    # Relevance: sum over keywords of weight * tf * idf (binary tf over
+    # document length — headlines rarely repeat a keyword)
+    df = (counts > 0).sum(axis=0)
+    idf = np.log((1 + n) / (1 + df)) + 1.0
+    tf = counts / lengths[:, None]
+    relevance = (tf * idf) @ KEYWORD_WEIGHTS
+
+    cluster = np.log1p(clusters - 1)
+
+    features = np.column_stack([
+        recency,
+        sources,
+        _normalise(relevance),
+        _normalise(cluster),
+        _normalise(trends),
+    ])
+    return features, ["recency", "source", "relevance", "cluster", "trend"]
+
+
+def rank_articles(articles: list, top_k: int = 1, weights: dict | None = None,
+                  now: float | None = None) -> list:
+    """
+    Score all candidates in one batched pass and return the best `top_k`,
+    highest score first. Each returned article gets "score" and
+    "score_parts" (per-feature weighted contribution) for logging.
+    """
+    if not articles:
+        return []
+    weights = weights or load_weights()
+    features, names = feature_matrix(articles, now)
+    w = np.array([weights.get(name, 0.0) for name in names])
+    contributions = features * w
+    scores = contributions.sum(axis=1)
+
+    top_k = min(top_k, len(articles))
+    # Partial sort: O(N) selection, then only sort the winners
+    idx = np.argpartition(-scores, top_k - 1)[:top_k]
+    idx = idx[np.argsort(-scores[idx], kind="stable")]
+
+    ranked = []
+    for i in idx:
+        article = articles[int(i)]
+        article["score"] = float(scores[i])
+        article["score_parts"] = {
+            name: round(float(contributions[i, j]), 4) for j, name in enumerate(names)
+        }
+        ranked.append(article)
+    return ranked
+
+
+def explain(article: dict) -> str:
+    """One-line breakdown of an article's score."""
+    parts = " + ".join(f"{k}={v:.3f}" for k, v in article.get("score_parts", {}).items())
+    return f"{article.get('score', 0.0):.3f} = {parts}"
+
+
+def log_ranking(ranked: list):
+    for pos, article in enumerate(ranked, 1):
+        print(f"[RANKER] #{pos} {explain(article)}")
+        print(f"         {article['title'][:90]} ({article.get('source', '?')})")
+
+
+if __name__ == "__main__":
+    # Quick test
+    from bot.fetcher import fetch_latest_articles
+    log_ranking(rank_articles(fetch_latest_articles(), top_k=5))
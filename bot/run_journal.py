@@ -0,0 +1,122 @@
+# bot/run_journal.py
+import json
+import os
+import time
+
+# ── Crash-safe run journal ────────────────────────────────────────
+# Each stage's output (chosen article, image, generated thread, which
+# tweets are already on X) is written here as soon as it exists, so a
+# failed run's retry resumes at the first unfinished step instead of
+# regenerating different text and re-posting tweets that went out.
+JOURNAL_PATH = "data/run_journal.json"
+JOURNAL_MAX_AGE_HOURS = 12  # older than this, the article is stale: give up on it
+MAX_RESUME_ATTEMPTS = 3
+
+
+class RunJournal:
+    def __init__(self, path: str = JOURNAL_PATH):
+        self.path = path
+        self.state = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    self.state = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"[JOURNAL] Ignoring unreadable journal: {e}")
+                self.state = {}
+
+    # ── Lifecycle ─────────────────────────────────────────────────
+    @property
+    def active(self) -> bool:
+        return bool(self.state.get("article"))
+
+    def expired(self) -> bool:
+        """Too old or retried too often to be worth resuming."""
+        if not self.active:
+            return False
+        age = time.time() - self.state.get("started_at", 0)
+        return (age > JOURNAL_MAX_AGE_HOURS * 3600
+                or self.state.get("attempts", 0) >= MAX_RESUME_ATTEMPTS)
+
+    def start(self, article: dict):
+        """Begin a journal for a freshly selected article."""
+        self.state = {
+            "started_at": time.time(),
+            "attempts": 0,
+            "article": {k: v for k, v in article.items() if not k.startswith("_")},
+            "post": {"posted": [], "pending": None},
+        }
+        self._save()
+
+    def record_failure(self, error: str):
+        self.state["attempts"] = self.state.get("attempts", 0) + 1
+        self.state["last_error"] = error
+        self._save()
+
+    def clear(self):
+        """Forget the journal: the run completed or was abandoned."""
+        self.state = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    # ── Stage outputs ─────────────────────────────────────────────
+    @property
+    def article(self) -> dict | None:
+        return self.state.get("article")
+
+    def get(self, stage: str):
+        return self.state.get(stage)
+
+    def record(self, stage: str, value):
+        self.state[stage] = value
+        self._save()
+
+    # ── Posting progress ──────────────────────────────────────────
+    # "posted" holds one entry per tweet already on X (its status id, or
+    # None if unknown). "pending" is {"index", "count", "at"} for a Post
+    # click whose success wasn't confirmed (a whole compose-dialog thread,
+    # or one reply): on resume the profile is checked for a matching post
+    # created after "at" before posting it again.
+    def posted(self) -> list:
+        return self.state.get("post", {}).get("posted", [])
+
+    def pending_submit(self) -> dict | None:
+        return self.state.get("post", {}).get("pending")
+
+    def all_posted(self) -> bool:
+        thread = self.get("thread")
+        return bool(thread) and len(self.posted()) >= len(thread["tweets"])
+
+    def record_submit(self, index: int, count: int = 1):
+        """About to click Post for tweets index..index+count-1."""
+        self.state.setdefault("post", {"posted": []})["pending"] = {
+            "index": index, "count": count, "at": time.time(),
+        }
+        self._save()
+
+    def clear_pending(self):
+        self.state.setdefault("post", {"posted": []})["pending"] = None
+        self._save()
+
+    def record_posted(self, count: int, status_id: str | None = None):
+        """`count` more tweets are confirmed on X; the last one has `status_id`."""
+        post = self.state.setdefault("post", {"posted": []})
+        post["posted"].extend([None] * (count - 1) + [status_id])
+        post["pending"] = None
+        self._save()
+
+    def set_last_status_id(self, status_id: str):
+        posted = self.posted()
+        if posted:
+            posted[-1] = status_id
+            self._save()
+
+    def _save(self):
+        self.state["updated_at"] = time.time()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,49 @@
+# bot/session_store.py
+import json
+import os
+import time
+
+# ── Persistent X session ──────────────────────────────────────────
+# Saves the logged-in cookie jar after a successful login and restores
+# it on the next run, so the full login flow (and X's "unusual login"
+# verification) only happens when the session has actually expired.
+# Never commit this file — it is as good as the account password.
+SESSION_PATH = os.environ.get("X_SESSION_PATH", ".session/x_cookies.json")
+SESSION_MAX_AGE_DAYS = 20  # don't bother restoring cookies older than this
+AUTH_COOKIE = "auth_token"
+
+
+def load_cookies() -> list | None:
+    """Saved cookies, or None if missing, unreadable or too old."""
+    if not os.path.exists(SESSION_PATH):
+        return None
+    try:
+        with open(SESSION_PATH, "r") as f:
+            saved = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[SESSION] Ignoring unreadable session file: {e}")
+        return None
+    if time.time() - saved.get("saved_at", 0) > SESSION_MAX_AGE_DAYS * 86400:
+        print("[SESSION] Saved session too old, ignoring")
+        return None
+    cookies = saved.get("cookies", [])
+    now = time.time()
+    cookies = [c for c in cookies if c.get("expiry", now + 1) > now]
+    if not any(c["name"] == AUTH_COOKIE for c in cookies):
+        return None
+    return cookies
+
+
+def save_cookies(cookies: list):
+    """Persist the cookie jar (owner-only permissions, atomic replace)."""
+    os.makedirs(os.path.dirname(SESSION_PATH) or ".", exist_ok=True)
+    tmp_path = SESSION_PATH + ".tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        json.dump({"saved_at": time.time(), "cookies": cookies}, f)
+    os.replace(tmp_path, SESSION_PATH)
+
+
+def clear_session():
+    if os.path.exists(SESSION_PATH):
+        os.remove(SESSION_PATH)
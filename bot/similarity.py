@@ -0,0 +1,231 @@
+# bot/similarity.py
+import hashlib
+import json
+import os
+import random
+import re
+import time
+
+# ── Near-duplicate story detection (MinHash + banded LSH) ─────────
+# Different outlets cover the same announcement under different URLs.
+# Each article gets a MinHash signature over its title+summary tokens;
+# signatures are split into bands and bucketed, so finding similar
+# stories is a few dict lookups instead of a pairwise comparison.
+NUM_BANDS = 30
+ROWS_PER_BAND = 2
+NUM_PERM = NUM_BANDS * ROWS_PER_BAND
+SIMILARITY_THRESHOLD = 0.3  # estimated Jaccard needed to call two stories the same
+SUMMARY_TOKENS = 40         # summaries differ a lot between outlets; only use the lead
+
+STORY_FINGERPRINTS_PATH = "data/story_fingerprints.json"
+STORY_WINDOW_HOURS = 72     # how long a posted story blocks near-duplicates
+
+_MERSENNE = (1 << 61) - 1
+_rng = random.Random(1337)  # fixed seed: signatures must be stable across runs
+_PERMS = [
+    (_rng.randrange(1, _MERSENNE), _rng.randrange(0, _MERSENNE))
+    for _ in range(NUM_PERM)
+]
+
+WORD_RE = re.compile(r"[a-z0-9][a-z0-9+#.-]*")
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have how in into is it its new of
+on or our says said that the their this to up was what when which who why
+will with you your after over more than just now about today announce
+announces announced first one
+""".split())
+
+
+def stem(word: str) -> str:
+    """Very light suffix folding so launches/launched/launch match."""
+    if len(word) <= 4 or not word.isalpha():
+        return word
+    if word.endswith("ies"):
+        word = word[:-3] + "y"
+    elif word.endswith(("ches", "shes", "sses", "xes")):
+        word = word[:-2]
+    elif word.endswith("s") and not word.endswith("ss"):
+        word = word[:-1]
+    elif word.endswith("ed") and len(word) > 5:
+        word = word[:-2]
+    elif word.endswith("ing") and len(word) > 6:
+        word = word[:-3]
+    return word[:-1] if word.endswith("e") else word
+
+
+def tokenize(text: str) -> list:
+    """Lowercase, stemmed words with stopwords removed."""
+    tokens = []
+    for word in WORD_RE.findall(text.lower()):
+        word = word.rstrip(".-")
+        if not word or word in STOPWORDS:
+            continue
+        tokens.append(stem(word))
+    return tokens
+
+
+def shingles(article: dict) -> set:
+    """Feature set for an article: title tokens plus the lead of the summary."""
+    features = set(tokenize(article.get("title", "")))
+    features.update(tokenize(article.get("summary", ""))[:SUMMARY_TOKENS])
+    return features
+
+
+def _token_hash(token: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(token.encode(), digest_size=8).digest(), "little"
+    )
+
+
+def minhash(features: set) -> list:
+    """MinHash signature of NUM_PERM values for a feature set."""
+    if not features:
+        return [_MERSENNE] * NUM_PERM
+    hashes = [_token_hash(f) for f in features]
+    return [min((a * h + b) % _MERSENNE for h in hashes) for a, b in _PERMS]
+
+
+def signature(article: dict) -> list:
+    return minhash(shingles(article))
+
+
+def estimate_similarity(sig_a: list, sig_b: list) -> float:
+    """Estimated Jaccard similarity from two signatures."""
+    same = sum(1 for x, y in zip(sig_a, sig_b) if x == y)
+    return same / NUM_PERM
+
+
+class LSHIndex:
+    """Banded LSH index over MinHash signatures."""
+
+    def __init__(self):
+        self.signatures = {}  # key -> signature
+        self._buckets = [{} for _ in range(NUM_BANDS)]
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def _bands(self, sig: list):
+        for i in range(NUM_BANDS):
+            yield i, tuple(sig[i * ROWS_PER_BAND:(i + 1) * ROWS_PER_BAND])
+
+    def add(self, key, sig: list):
+        self.signatures[key] = sig
+        for i, band in self._bands(sig):
+            self._buckets[i].setdefault(band, []).append(key)
+
+    def remove(self, key):
+        sig = self.signatures.pop(key, None)
+        if sig is None:
+            return
+        for i, band in self._bands(sig):
+            bucket = self._buckets[i].get(band)
+            if bucket and key in bucket:
+                bucket.remove(key)
+                if not bucket:
+                    del self._buckets[i][band]
+
+    def candidates(self, sig: list) -> set:
+        """Keys sharing at least one band with `sig` (unverified)."""
+        found = set()
+        for i, band in self._bands(sig):
+            found.update(self._buckets[i].get(band, ()))
+        return found
+
+    def query(self, sig: list, threshold: float = SIMILARITY_THRESHOLD) -> list:
+        """Keys whose estimated similarity to `sig` is at least `threshold`."""
+        return [
+            key for key in self.candidates(sig)
+            if estimate_similarity(sig, self.signatures[key]) >= threshold
+        ]
+
+
+def cluster_articles(articles: list, threshold: float = SIMILARITY_THRESHOLD) -> list:
+    """
+    Group articles that cover the same story.
+    Returns a list of clusters (lists of articles), each in input order,
+    with clusters ordered by their first article. Also sets
+    article["cluster_size"] on every article.
+    """
+    index = LSHIndex()
+    parent = list(range(len(articles)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, article in enumerate(articles):
+        sig = signature(article)
+        article["_sig"] = sig
+        for j in index.query(sig, threshold):
+            root_i, root_j = find(i), find(j)
+            if root_i != root_j:
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+        index.add(i, sig)
+
+    clusters = {}
+    for i, article in enumerate(articles):
+        clusters.setdefault(find(i), []).append(article)
+    for members in clusters.values():
+        for article in members:
+            article["cluster_size"] = len(members)
+            article.pop("_sig", None)
+    return [clusters[root] for root in sorted(clusters)]
+
+
+# ── Recently posted stories ───────────────────────────────────────
+class StoryIndex:
+    """Fingerprints of stories posted within STORY_WINDOW_HOURS."""
+
+    def __init__(self, path: str = STORY_FINGERPRINTS_PATH,
+                 window_hours: float = STORY_WINDOW_HOURS):
+        self.path = path
+        self.window = window_hours * 3600
+        self.records = {}  # article id -> {"ts", "title", "sig"}
+        self.index = LSHIndex()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                records = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[SIMILARITY] Ignoring unreadable fingerprints: {e}")
+            return
+        cutoff = time.time() - self.window
+        for article_id, rec in records.items():
+            if rec["ts"] >= cutoff:
+                self.records[article_id] = rec
+                self.index.add(article_id, rec["sig"])
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.records, f)
+        os.replace(tmp_path, self.path)
+
+    def find_repeat(self, article: dict) -> str | None:
+        """ID of a recently posted story this article repeats, or None."""
+        matches = self.index.query(signature(article))
+        return matches[0] if matches else None
+
+    def remember(self, article: dict):
+        sig = signature(article)
+        self.records[article["id"]] = {
+            "ts": time.time(),
+            "title": article.get("title", ""),
+            "sig": sig,
+        }
+        self.index.add(article["id"], sig)
+
+
+def remember_posted_story(article: dict):
+    """Add a posted article's fingerprint to the persistent story index."""
+    stories = StoryIndex()
+    stories.remember(article)
+    stories.save()
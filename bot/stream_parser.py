@@ -0,0 +1,64 @@
+# bot/stream_parser.py
+import re
+
+# ── Incremental parser for the LABEL / TWEET1..4 response format ──
+# Fed raw token chunks as they stream in; emits each field as soon as
+# its line is complete so validation can start before generation ends.
+FIELDS = ("LABEL", "TWEET1", "TWEET2", "TWEET3", "TWEET4")
+LAST_FIELD = "TWEET4"
+LINE_RE = re.compile(r"^(LABEL|TWEET[1-4]):\s*(.*)$")
+
+
+class StreamingTweetParser:
+    def __init__(self):
+        self._buf = ""
+        self.fields = {}  # field name -> value, in completion order
+        self.done = False  # True once TWEET4's line has been completed
+
+    def feed(self, chunk: str) -> list:
+        """Consume a chunk; returns [(field, value), ...] for lines it completed."""
+        if self.done or not chunk:
+            return []
+        self._buf += chunk
+        events = []
+        while "\n" in self._buf and not self.done:
+            line, self._buf = self._buf.split("\n", 1)
+            events.extend(self._line(line))
+        return events
+
+    def close(self) -> list:
+        """Flush the trailing line when the stream ends without a newline."""
+        if self.done:
+            return []
+        line, self._buf = self._buf, ""
+        events = self._line(line)
+        self.done = True
+        return events
+
+    def _line(self, line: str) -> list:
+        match = LINE_RE.match(line.strip())
+        if not match:
+            return []
+        field, value = match.group(1), match.group(2).strip()
+        if field in self.fields:
+            return []  # keep the first occurrence, like parse_ai_response
+        self.fields[field] = value
+        if field == LAST_FIELD:
+            self.done = True
+        return [(field, value)]
+
+
+def parse_stream(chunks) -> dict:
+    """Run a recorded token stream (any iterable of str) through the parser."""
+    parser = StreamingTweetParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+        if parser.done:
+            break
+    parser.close()
+    return parser.fields
+
+
+def to_raw(fields: dict) -> str:
+    """Render parsed fields back into the canonical response text."""
+    return "\n".join(f"{name}: {fields[name]}" for name in FIELDS if name in fields)
@@ -0,0 +1,273 @@
+# bot/trends.py
+import os
+import re
+import time
+
+import numpy as np
+
+from bot import metrics
+
+# ── Rolling-window trend index ────────────────────────────────────
+# Every entry the fetcher sees (posted, old or new) is counted once under
+# its normalised terms in a ring of time buckets: a (terms × buckets)
+# count matrix plus running window/recent totals per term, so a poll only
+# touches its new entries and a bucket rollover is one column subtract.
+# A term's burst score compares its rate over the recent hours with its
+# baseline rate over the rest of the window; scores are computed for the
+# whole vocabulary at once and looked up per term. Terms whose counts
+# have all left the window are compacted away on rollover, so the matrix
+# tracks the window rather than everything ever seen. One index lives per
+# process (get_index), loaded once and saved only when it changed.
+TREND_PATH = "data/trend_index.npz"
+BUCKET_MINUTES = 15
+WINDOW_HOURS = 48
+RECENT_HOURS = 2
+MIN_RECENT_DOCS = 3       # fewer mentions than this is never a trend
+BASELINE_PRIOR = 0.5      # pseudo-count per baseline window, so new terms don't score infinite
+INITIAL_TERMS = 1024
+
+BUCKET_SECONDS = BUCKET_MINUTES * 60
+N_BUCKETS = WINDOW_HOURS * 60 // BUCKET_MINUTES
+RECENT_BUCKETS = RECENT_HOURS * 60 // BUCKET_MINUTES
+
+WORD_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9+.\-]*[A-Za-z0-9+]|[A-Za-z0-9]")
+STOPWORDS = frozenset("""
+a about after all also an and any are as at be been but by can could did do does
+for from get gets got has have how if in into is it its just like more most new
+no not now of off on one or our out over says say said so some than that the their
+them then there these they this those to up us was we what when where which who
+why will with would you your vs via here heres what's it's report reports update
+""".split())
+
+
+def terms_of(article: dict) -> set:
+    """
+    Normalised terms of a headline: lowercased words minus stopwords,
+    plus runs of capitalised words as one entity ("Vision Pro").
+    """
+    title = article.get("title") or ""
+    words = [w.rstrip(".-") for w in WORD_RE.findall(title.replace("’", "'").replace("'s ", " "))]
+    terms = {w.lower() for w in words if w.lower() not in STOPWORDS and (len(w) > 2 or w.isupper())}
+    run = []
+    for w in words + [""]:
+        if w[:1].isupper() and w.lower() not in STOPWORDS:
+            run.append(w.lower())
+            continue
+        if len(run) > 1:
+            terms.add(" ".join(run))
+        run = []
+    return terms
+
+
+class TrendIndex:
+    def __init__(self, path: str = TREND_PATH):
+        self.path = path
+        self.vocab = {}                                    # term -> row
+        self.counts = np.zeros((INITIAL_TERMS, N_BUCKETS), dtype=np.uint16)
+        self.window = np.zeros(INITIAL_TERMS, dtype=np.int32)  # per-term sum over all buckets
+        self.recent = np.zeros(INITIAL_TERMS, dtype=np.int32)  # ...over the last RECENT_BUCKETS
+        self.docs = np.zeros(N_BUCKETS, dtype=np.int32)
+        self.head = int(time.time() // BUCKET_SECONDS)     # absolute number of the newest bucket
+        self.seen = {}                                     # entry id -> bucket it was counted in
+        self._scores = None
+        self._load()
+
+    # ── Persistence ───────────────────────────────────────────────
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                if int(data["bucket_seconds"]) != BUCKET_SECONDS or data["counts"].shape[1] != N_BUCKETS:
+                    print("[TRENDS] Bucket layout changed, starting a new index")
+                    return
+                terms = data["terms"].tolist()
+                counts = data["counts"]
+                docs = data["docs"].astype(np.int32)
+                head = int(data["head"])
+                seen = dict(zip(data["seen_ids"].tolist(), data["seen_buckets"].tolist()))
+        except (OSError, KeyError, ValueError) as e:
+            print(f"[TRENDS] Ignoring unreadable index: {e}")
+            return
+        self._grow(len(terms))
+        self.counts[:len(terms)] = counts
+        self.vocab = {t: i for i, t in enumerate(terms)}
+        self.docs, self.head, self.seen = docs, head, seen
+        self._recount()
+        self.advance(time.time())
+
+    def save(self):
+        n = len(self.vocab)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(
+                f,
+                bucket_seconds=BUCKET_SECONDS,
+                head=self.head,
+                terms=np.array(list(self.vocab), dtype=str),
+                counts=self.counts[:n],
+                docs=self.docs,
+                seen_ids=np.array(list(self.seen), dtype=str),
+                seen_buckets=np.array(list(self.seen.values()), dtype=np.int64),
+            )
+        os.replace(tmp_path, self.path)
+
+    # ── Updates ───────────────────────────────────────────────────
+    def _grow(self, rows: int):
+        if rows <= len(self.window):
+            return
+        size = max(rows, 2 * len(self.window))
+        for name in ("counts", "window", "recent"):
+            old = getattr(self, name)
+            new = np.zeros((size,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _row(self, term: str) -> int:
+        row = self.vocab.get(term)
+        if row is None:
+            row = self.vocab[term] = len(self.vocab)
+            self._grow(row + 1)
+        return row
+
+    def _recount(self):
+        """Rebuild the running totals from the matrix (after loading only)."""
+        recent_cols = [(self.head - k) % N_BUCKETS for k in range(RECENT_BUCKETS)]
+        self.window[:] = self.counts.sum(axis=1)
+        self.recent[:] = self.counts[:, recent_cols].sum(axis=1)
+
+    def advance(self, now: float):
+        """Move the head to `now`'s bucket, expiring buckets that leave the window."""
+        target = int(now // BUCKET_SECONDS)
+        if target <= self.head:
+            return
+        steps = target - self.head
+        if steps >= N_BUCKETS:
+            self.counts[:] = 0
+            self.window[:] = 0
+            self.recent[:] = 0
+            self.docs[:] = 0
+        else:
+            for b in range(self.head + 1, target + 1):
+                # The bucket leaving the recent range stops counting as recent...
+                leaving = (b - RECENT_BUCKETS) % N_BUCKETS
+                self.recent -= self.counts[:, leaving]
+                # ...and the slot being reused held the oldest bucket of the window
+                col = b % N_BUCKETS
+                self.window -= self.counts[:, col]
+                self.counts[:, col] = 0
+                self.docs[col] = 0
+        self.head = target
+        oldest = self.head - N_BUCKETS
+        self.seen = {k: b for k, b in self.seen.items() if b > oldest}
+        self.compact()
+        self._scores = None
+
+    def compact(self):
+        """Drop terms with nothing left in the window and shrink the arrays to fit."""
+        n = len(self.vocab)
+        live = np.flatnonzero(self.window[:n])
+        if len(live) == n and len(self.window) <= max(INITIAL_TERMS, 4 * n):
+            return
+        terms = list(self.vocab)
+        size = max(INITIAL_TERMS, 2 * len(live))
+        for name in ("counts", "window", "recent"):
+            old = getattr(self, name)
+            new = np.zeros((size,) + old.shape[1:], dtype=old.dtype)
+            new[:len(live)] = old[live]
+            setattr(self, name, new)
+        self.vocab = {terms[i]: row for row, i in enumerate(live)}
+        self._scores = None
+
+    def add(self, articles: list, now: float | None = None) -> int:
+        """Count entries not seen before; O(new entries). Returns how many were new."""
+        now = now if now is not None else time.time()
+        self.advance(now)
+        added = 0
+        for article in articles:
+            key = article.get("id") or article.get("link")
+            if not key or key in self.seen:
+                continue
+            ts = article.get("published_ts") or now
+            bucket = min(int(ts // BUCKET_SECONDS), self.head)
+            if bucket <= self.head - N_BUCKETS:
+                continue  # older than the window
+            self.seen[key] = bucket
+            col = bucket % N_BUCKETS
+            is_recent = bucket > self.head - RECENT_BUCKETS
+            self.docs[col] += 1
+            for term in terms_of(article):
+                row = self._row(term)
+                if self.counts[row, col] < np.iinfo(np.uint16).max:
+                    self.counts[row, col] += 1
+                    self.window[row] += 1
+                    if is_recent:
+                        self.recent[row] += 1
+            added += 1
+        if added:
+            self._scores = None
+        metrics.incr("trend_entries", added)
+        return added
+
+    # ── Queries ───────────────────────────────────────────────────
+    def scores(self) -> np.ndarray:
+        """
+        Burst score for every term: how far the recent count sits above what
+        the baseline rate predicts, in Poisson standard deviations.
+        """
+        if self._scores is None:
+            n = len(self.vocab)
+            recent = self.recent[:n].astype(np.float64)
+            baseline = (self.window[:n] - self.recent[:n]).astype(np.float64)
+            # Scale by overall entry volume, so a busy news hour doesn't make every term burst
+            recent_docs = int(self.docs[[(self.head - k) % N_BUCKETS for k in range(RECENT_BUCKETS)]].sum())
+            baseline_docs = int(self.docs.sum()) - recent_docs
+            if baseline_docs and recent_docs:
+                ratio = recent_docs / baseline_docs
+            else:
+                ratio = RECENT_BUCKETS / (N_BUCKETS - RECENT_BUCKETS)
+            expected = (baseline + BASELINE_PRIOR) * ratio
+            z = (recent - expected) / np.sqrt(expected + 1.0)
+            z[recent < MIN_RECENT_DOCS] = 0.0
+            self._scores = np.clip(z, 0.0, None)
+        return self._scores
+
+    def score(self, term: str) -> float:
+        row = self.vocab.get(term)
+        return float(self.scores()[row]) if row is not None else 0.0
+
+    def article_score(self, article: dict) -> float:
+        """Trend score of an article: its hottest term."""
+        scores = self.scores()
+        rows = [self.vocab[t] for t in terms_of(article) if t in self.vocab]
+        return float(scores[rows].max()) if rows else 0.0
+
+    def top(self, k: int = 10) -> list:
+        """(term, score, recent count) for the k most bursting terms."""
+        scores = self.scores()
+        if not len(scores):
+            return []
+        terms = list(self.vocab)
+        best = np.argsort(-scores)[:k]
+        return [(terms[i], round(float(scores[i]), 2), int(self.recent[i])) for i in best if scores[i] > 0]
+
+
+_index = None
+
+
+def get_index() -> TrendIndex:
+    """The process-wide index, loaded from TREND_PATH on first use."""
+    global _index
+    if _index is None:
+        _index = TrendIndex()
+    return _index
+
+
+def print_trends(index: TrendIndex, k: int = 5):
+    top = index.top(k)
+    if not top:
+        print(f"[TRENDS] No bursting terms ({len(index.vocab)} terms, {len(index.seen)} entries in window)")
+        return
+    listed = ", ".join(f"{term} ({score:.1f}, {count} recent)" for term, score, count in top)
+    print(f"[TRENDS] Bursting: {listed}")
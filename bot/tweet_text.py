@@ -0,0 +1,88 @@
+# bot/tweet_text.py
+import re
+
+# ── X weighted tweet length (twitter-text v3 rules) ───────────────
+# Most Latin/punctuation code points weigh 1, everything else (CJK,
+# emoji, ...) weighs 2, and every URL counts as 23 regardless of length.
+MAX_WEIGHTED_LENGTH = 280
+URL_WEIGHT = 23
+LIGHT_RANGES = [
+    (0x0000, 0x10FF),
+    (0x2000, 0x200D),
+    (0x2010, 0x201F),
+    (0x2032, 0x2037),
+]
+URL_RE = re.compile(r"https?://\S+", re.IGNORECASE)
+ELLIPSIS = "…"
+
+_ZWJ = 0x200D
+_ZERO_WEIGHT = {0xFE0E, 0xFE0F} | set(range(0x1F3FB, 0x1F400))  # variation selectors, skin tones
+
+
+def _char_weight(cp: int) -> int:
+    for lo, hi in LIGHT_RANGES:
+        if lo <= cp <= hi:
+            return 1
+    return 2
+
+
+def _text_weight(text: str) -> int:
+    weight = 0
+    joined = False
+    for ch in text:
+        cp = ord(ch)
+        if cp == _ZWJ:
+            joined = True  # the next emoji is part of the same glyph
+            continue
+        if cp in _ZERO_WEIGHT:
+            continue
+        if joined:
+            joined = False
+            if cp > 0x10FF:
+                continue
+        weight += _char_weight(cp)
+    return weight
+
+
+def weighted_length(text: str) -> int:
+    """Length of `text` as X counts it against the 280 limit."""
+    weight = 0
+    pos = 0
+    for match in URL_RE.finditer(text):
+        weight += _text_weight(text[pos:match.start()]) + URL_WEIGHT
+        pos = match.end()
+    return weight + _text_weight(text[pos:])
+
+
+def is_valid_tweet(text: str) -> bool:
+    return 0 < weighted_length(text) <= MAX_WEIGHTED_LENGTH
+
+
+def truncate_to_weight(text: str, limit: int = MAX_WEIGHTED_LENGTH) -> str:
+    """
+    Shorten `text` to fit `limit`, ending the body with an ellipsis.
+    A trailing URL (the article link on tweet 1) is kept intact.
+    """
+    if weighted_length(text) <= limit:
+        return text
+
+    body, tail = text, ""
+    match = URL_RE.search(text)
+    if match and not text[match.end():].strip():
+        body, tail = text[:match.start()].rstrip(), "\n\n" + match.group(0)
+
+    budget = limit - weighted_length(tail) - _text_weight(ELLIPSIS)
+    out = []
+    used = 0
+    for ch in body:
+        w = _text_weight(ch)
+        if used + w > budget:
+            break
+        out.append(ch)
+        used += w
+    cut = "".join(out)
+    # Prefer breaking on a word boundary if one is reasonably close
+    space = cut.rfind(" ")
+    if space > len(cut) * 0.8:
+        cut = cut[:space]
+    return cut.rstrip() + ELLIPSIS + tail
@@ -0,0 +1,126 @@
+# bot/waits.py
+import json
+import os
+import time
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+# ── Condition-based waits with learned timeouts ───────────────────
+# Every wait polls for a real page condition instead of sleeping, and
+# records how long it actually took. Timeouts adapt to the p95 of past
+# observations for the same named wait (persisted between runs), so a
+# wait that can never succeed fails in seconds, not after a fixed 30s.
+# Waits after an irreversible action (a Post click) pass adaptive=False
+# and always get their full timeout.
+WAIT_TIMINGS_PATH = "data/wait_timings.json"
+POLL_INTERVAL = 0.1
+MIN_TIMEOUT = 5.0
+SAFETY_FACTOR = 3.0   # timeout = p95 of history * this
+MIN_SAMPLES = 5       # below this, use the caller's timeout as-is
+HISTORY_SIZE = 50
+
+_history = None   # name -> recent durations (persisted)
+RUN_TIMINGS = []  # (name, seconds, ok) for this run's report
+
+
+def _load_history() -> dict:
+    global _history
+    if _history is None:
+        _history = {}
+        if os.path.exists(WAIT_TIMINGS_PATH):
+            try:
+                with open(WAIT_TIMINGS_PATH, "r") as f:
+                    _history = json.load(f)
+            except (OSError, ValueError):
+                _history = {}
+    return _history
+
+
+def save_history():
+    if _history is None:
+        return
+    os.makedirs(os.path.dirname(WAIT_TIMINGS_PATH) or ".", exist_ok=True)
+    tmp_path = f"{WAIT_TIMINGS_PATH}.{os.getpid()}.tmp"  # account workers save concurrently
+    with open(tmp_path, "w") as f:
+        json.dump(_history, f)
+    os.replace(tmp_path, WAIT_TIMINGS_PATH)
+
+
+def adaptive_timeout(name: str, ceiling: float) -> float:
+    """Timeout for a named wait: p95 of past durations * SAFETY_FACTOR, within [MIN_TIMEOUT, ceiling]."""
+    samples = _load_history().get(name, [])
+    if len(samples) < MIN_SAMPLES:
+        return ceiling
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return max(MIN_TIMEOUT, min(ceiling, p95 * SAFETY_FACTOR))
+
+
+def _record(name: str, seconds: float, ok: bool):
+    RUN_TIMINGS.append((name, seconds, ok))
+    if ok:
+        samples = _load_history().setdefault(name, [])
+        samples.append(round(seconds, 3))
+        del samples[:-HISTORY_SIZE]
+
+
+def wait_for(driver, condition, name: str, timeout: float = 30, adaptive: bool = True):
+    """
+    Poll `condition(driver)` until it returns something truthy and return it.
+    Raises selenium's TimeoutException when the (adaptive) timeout expires.
+    """
+    limit = adaptive_timeout(name, timeout) if adaptive else timeout
+    start = time.monotonic()
+    try:
+        result = WebDriverWait(driver, limit, poll_frequency=POLL_INTERVAL).until(condition)
+    except TimeoutException:
+        _record(name, time.monotonic() - start, False)
+        raise TimeoutException(f"wait '{name}' timed out after {limit:.1f}s")
+    _record(name, time.monotonic() - start, True)
+    return result
+
+
+# ── Common conditions ─────────────────────────────────────────────
+def present(driver, css: str, name: str, timeout: float = 30, **kw):
+    """Wait for an element matching `css` and return it."""
+    return wait_for(driver, EC.presence_of_element_located((By.CSS_SELECTOR, css)),
+                    name, timeout, **kw)
+
+
+def clickable(driver, css: str, name: str, timeout: float = 30, **kw):
+    """Wait until an element matching `css` is visible and enabled; return it."""
+    return wait_for(driver, EC.element_to_be_clickable((By.CSS_SELECTOR, css)),
+                    name, timeout, **kw)
+
+
+def first_present(driver, selectors: list, name: str, timeout: float = 30, **kw):
+    """
+    Wait for whichever of `selectors` appears first; earlier selectors win
+    when several are present. Returns (selector, element).
+    """
+    def found(d):
+        for sel in selectors:
+            els = d.find_elements(By.CSS_SELECTOR, sel)
+            if els:
+                return sel, els[0]
+        return False
+    return wait_for(driver, found, name, timeout, **kw)
+
+
+def url_leaves(driver, fragments: tuple, name: str, timeout: float = 30, **kw):
+    """Wait until the current URL contains none of `fragments`."""
+    return wait_for(driver, lambda d: not any(f in d.current_url for f in fragments),
+                    name, timeout, **kw)
+
+
+def print_timing_report():
+    """Per-wait durations for this run, plus the total time spent waiting."""
+    if not RUN_TIMINGS:
+        return
+    print("[WAIT] Timing report:")
+    for name, seconds, ok in RUN_TIMINGS:
+        print(f"  {'ok  ' if ok else 'FAIL'} {seconds:6.2f}s  {name}")
+    total = sum(seconds for _, seconds, _ in RUN_TIMINGS)
+    print(f"  total waited: {total:.2f}s over {len(RUN_TIMINGS)} waits")
@@ -1,15 +1,19 @@
 # main.py
 import os
-import json
 import sys
 from dotenv import load_dotenv
 
-from bot.fetcher import fetch_latest_articles, load_posted_ids, save_posted_ids
-from bot.image_extractor import get_article_image
+from bot import http_client, metrics, page_cache
+from bot.fetcher import fetch_latest_articles, mark_posted
+from bot.image_extractor import download_image, extract_og_image
 from bot.ai_writer import generate_tweet
-from bot.poster import post_tweet_thread
+from bot.poster import open_session, post_tweet_thread
+from bot.pipeline import Stage, StageFailed, run_stages
+from bot.ranker import rank_articles, log_ranking
+from bot.run_journal import RunJournal
 
 load_dotenv()
+metrics.configure()  # BOT_METRICS may come from .env
 
 ARTICLES_PER_RUN = 1  # post 1 article per daily run (safe, avoids spam flags)
 
@@ -19,49 +23,108 @@ def main():
     print("  TECH NEWS BOT — STARTING RUN")
     print("=" * 50)
 
-    # ── 1. Fetch new articles ──────────────────────────
-    print("\n[1/5] Fetching latest tech news...")
-    articles = fetch_latest_articles(max_articles=10)
-
-    if not articles:
-        print("[MAIN] No new articles found. Exiting.")
-        sys.exit(0)
-
-    # ── 2. Pick the best article ───────────────────────
-    # For now: just take the first one
-    # You can add scoring logic here later (by source priority, keyword match etc.)
-    article = articles[0]
-    print(f"\n[2/5] Selected article:\n  → {article['title']}")
-
-    # ── 3. Get article image ───────────────────────────
-    print("\n[3/5] Extracting article image...")
-    image_path = get_article_image(article["link"])
-    if image_path:
-        print(f"  → Image ready: {image_path}")
+    # A previous run that failed part-way left its progress here
+    journal = RunJournal()
+    if journal.expired():
+        print(f"[MAIN] Abandoning unfinished run for: {journal.article['title']}")
+        if journal.posted():
+            mark_posted(journal.article)  # part of the thread is live, never pick it again
+        journal.clear()
+
+    if journal.active:
+        article = journal.article
+        print(f"\n[1-2/5] Resuming unfinished run (attempt {journal.get('attempts') + 1}):"
+              f"\n  → {article['title']}")
     else:
-        print("  → No image found, will post text-only")
+        # ── 1. Fetch new articles ──────────────────────────
+        print("\n[1/5] Fetching latest tech news...")
+        with metrics.span("stage.fetch"):
+            articles = fetch_latest_articles()
+
+        if not articles:
+            print("[MAIN] No new articles found. Exiting.")
+            sys.exit(0)
+
+        # ── 2. Pick the best article ───────────────────────
+        with metrics.span("stage.rank", candidates=len(articles)):
+            ranked = rank_articles(articles, top_k=5)
+        log_ranking(ranked)
+        article = ranked[0]
+        print(f"\n[2/5] Selected article:\n  → {article['title']}")
+        journal.start(article)
 
-    # ── 4. Generate tweet with AI ──────────────────────
-    print("\n[4/5] Generating tweet with Gemini AI...")
-    tweet_data = generate_tweet(article)
-    print(f"  → Label: {tweet_data['label']}")
-    print(f"  → Tweets to post: {len(tweet_data['tweets'])}")
-    for i, t in enumerate(tweet_data["tweets"], 1):
-        print(f"\n  [{i}] {t[:100]}...")
+    # ── 3-5. Image, tweet generation and browser login run concurrently;
+    #         posting joins on all three ─────────────────
+    def image_stage(ctx):
+        print("\n[3/5] Extracting article image...")
+        image = journal.get("image")
+        if image and image["path"] and os.path.exists(image["path"]):
+            image_path = image["path"]
+        else:
+            ctx.check()
+            image_url = image["url"] if image else extract_og_image(article["link"])
+            ctx.check()
+            image_path = download_image(image_url) if image_url else None
+            journal.record("image", {"url": image_url, "path": image_path})
+        if image_path:
+            print(f"  → Image ready: {image_path}")
+        else:
+            print("  → No image found, will post text-only")
+        return image_path
 
-    # ── 5. Post to X ──────────────────────────────────
-    print("\n[5/5] Posting to X...")
-    success = post_tweet_thread(tweet_data["tweets"], image_path=image_path)
+    def generate_stage(ctx):
+        print("\n[4/5] Generating tweet with Gemini AI...")
+        tweet_data = journal.get("thread")
+        if tweet_data:
+            print("  → Reusing the thread generated by the failed run")
+        else:
+            # Same page the image stage reads: one fetch, whichever gets there first
+            ctx.check()
+            page_cache.enrich_article(article)
+            tweet_data = generate_tweet(article, checkpoint=ctx.check)
+            journal.record("thread", tweet_data)
+        print(f"  → Label: {tweet_data['label']}")
+        print(f"  → Tweets to post: {len(tweet_data['tweets'])}")
+        for i, t in enumerate(tweet_data["tweets"], 1):
+            print(f"\n  [{i}] {t[:100]}...")
+        return tweet_data
+
+    def post_stage(ctx):
+        http_client.print_pool_stats()
+        page_cache.print_cache_stats()
+        print("\n[5/5] Posting to X...")
+        return post_tweet_thread(ctx.results["generate"]["tweets"],
+                                 image_path=ctx.results["image"],
+                                 driver=ctx.results["browser"],
+                                 journal=journal)
+
+    if not journal.get("thread"):
+        # The image stage usually fetches the page first: have it read the text too
+        page_cache.expect_text([article["link"]])
+    stages = [Stage("image", image_stage), Stage("generate", generate_stage)]
+    if not journal.all_posted():
+        stages += [
+            Stage("browser", lambda ctx: open_session(ctx.check), cleanup=lambda d: d.quit()),
+            Stage("post", post_stage, deps=("image", "generate", "browser")),
+        ]
+    try:
+        results = run_stages(stages)
+        success = results.get("post", True)
+        error = "post_tweet_thread returned False"
+    except StageFailed as e:
+        print(f"[MAIN] {e}")
+        success = False
+        error = str(e)
 
     if success:
         print("\n✅ Successfully posted!")
         # Mark article as posted
-        posted_ids = load_posted_ids()
-        posted_ids.append(article["id"])
-        save_posted_ids(posted_ids)
+        mark_posted(article)
+        journal.clear()
         print(f"  → Saved article ID to dedup log")
     else:
-        print("\n❌ Posting failed.")
+        journal.record_failure(error)
+        print("\n❌ Posting failed. Progress kept in the run journal for the next run.")
         sys.exit(1)
 
     print("\n" + "=" * 50)
@@ -70,4 +133,20 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if "--daemon" in sys.argv[1:]:
+        from bot.daemon import run
+        run()
+    elif "--accounts" in sys.argv[1:]:
+        from bot.accounts import run
+        try:
+            with metrics.span("run.accounts"):
+                ok = run()
+        finally:
+            metrics.flush()
+        sys.exit(0 if ok else 1)
+    else:
+        try:
+            with metrics.span("run"):
+                main()
+        finally:
+            metrics.flush()
\ No newline at end of file